@@ -0,0 +1,256 @@
+"""
+生日检查基准测试
+
+测量 Config.from_yaml（解析 YAML 和加载快照）、BirthdayChecker.check_birthdays 和 90 天的 upcoming 查询在不同收件人规模下的
+单次耗时、每个收件人的耗时和峰值内存，以及收件人列表和列式收件人表每个收件人常驻占用的内存，
+可以保存为基线并与之前的基线比较。
+
+用法:
+    python -m benchmarks.bench_checker --sizes 1k,100k
+    python -m benchmarks.bench_checker --sizes 1k,100k --save benchmarks/baseline.json
+    python -m benchmarks.bench_checker --compare benchmarks/baseline.json
+"""
+import gc
+import json
+import os
+import pickle
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+import click
+
+from benchmarks.generate import generate_recipients, write_config
+from src.core.config import CHECKER_ENGINES, CheckerConfig, Config
+from src.core.recipient_table import RecipientTable
+
+_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_sizes(value: str) -> List[int]:
+    """解析 1k,100k,1m 这样的规模列表"""
+    sizes = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        factor = _SUFFIXES.get(part[-1], 1)
+        number = part[:-1] if part[-1] in _SUFFIXES else part
+        sizes.append(int(float(number) * factor))
+    return sizes
+
+
+def measure(func: Callable[[], object], repeat: int) -> Tuple[float, int]:
+    """
+    测量函数的耗时和峰值内存
+
+    耗时取 repeat 次中的最小值；峰值内存在单独的一次运行中用 tracemalloc 统计，
+    避免追踪开销影响计时。
+
+    Returns:
+        Tuple[float, int]: (秒, 峰值内存字节数)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def retained_memory(func: Callable[[], object]) -> int:
+    """
+    测量函数返回的对象常驻占用的内存
+
+    Returns:
+        int: 调用结束并回收垃圾后仍被追踪的字节数
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+
+def _make_checker(engine: str):
+    """按引擎创建检查器"""
+    checker_config = CheckerConfig(engine=engine)
+    if engine == "numpy":
+        from src.core.vectorized import create_checker
+        return create_checker(checker_config)
+    from src.core.checker import BirthdayChecker
+    return BirthdayChecker(checker_config)
+
+
+def run_benchmarks(sizes: List[int], engine: str, repeat: int, seed: int,
+                   solar_ratio: float, lunar_ratio: float,
+                   reminder_days: Tuple[int, int], columnar: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    运行所有基准
+
+    Args:
+        columnar: 加载配置和检查生日时是否使用列式收件人表
+
+    Returns:
+        Dict[str, Dict[str, float]]: 基准名 -> 指标
+    """
+    results = {}
+    start = date.today()
+    end = start + timedelta(days=89)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"recipients_{size}.yml")
+            write_config(path, generate_recipients(size, seed, solar_ratio, lunar_ratio, reminder_days),
+                         checker={"columnar": True} if columnar else None)
+            cache_dir = os.path.join(tmp, "cache")
+            recipients = Config.from_yaml(path, cache_dir=cache_dir).recipients
+
+            # 从快照反序列化时所有对象（包括字符串）都重新分配，常驻内存与实际加载一致
+            if isinstance(recipients, RecipientTable):
+                layouts = {"list": list(recipients), "table": recipients}
+            else:
+                layouts = {"list": recipients, "table": RecipientTable.from_recipients(recipients)}
+            memory = {"recipients": size}
+            for layout, value in layouts.items():
+                blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                memory[f"{layout}_bytes_per_recipient"] = retained_memory(lambda: pickle.loads(blob)) / size
+            del layouts
+            key = f"recipients_memory[{size}]"
+            results[key] = memory
+            print(f"{key:<36} {memory['list_bytes_per_recipient']:>10.1f} B/recipient (list) "
+                  f"{memory['table_bytes_per_recipient']:>8.1f} B/recipient (table)")
+
+            warm_checker = _make_checker(engine)
+            warm_checker.check_birthdays(recipients)
+
+            cases = {
+                "config_from_yaml": lambda: Config.from_yaml(path, use_cache=False),
+                "config_from_snapshot": lambda: Config.from_yaml(path, cache_dir=cache_dir),
+                "check_birthdays_cold": lambda: _make_checker(engine).check_birthdays(recipients),
+                "check_birthdays_warm": lambda: warm_checker.check_birthdays(recipients),
+                "upcoming_90d_cold": lambda: _make_checker(engine).upcoming(recipients, start, end),
+                "upcoming_90d_warm": lambda: warm_checker.upcoming(recipients, start, end),
+            }
+            for name, func in cases.items():
+                seconds, peak = measure(func, repeat)
+                key = f"{name}[{size}]"
+                results[key] = {
+                    "recipients": size,
+                    "seconds": seconds,
+                    "us_per_recipient": seconds / size * 1e6,
+                    "peak_mb": peak / 2**20,
+                }
+                _print_result(key, results[key])
+    return results
+
+
+def _print_result(key: str, result: Dict[str, float]) -> None:
+    print(f"{key:<36} {result['seconds'] * 1000:>10.1f} ms "
+          f"{result['us_per_recipient']:>8.2f} us/recipient {result['peak_mb']:>9.1f} MB peak")
+
+
+# 与基线比较的指标 -> 描述，越大越差
+_COMPARED_METRICS = {
+    "seconds": "time",
+    "peak_mb": "peak memory",
+    "list_bytes_per_recipient": "list memory per recipient",
+    "table_bytes_per_recipient": "table memory per recipient",
+}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """
+    与基线比较
+
+    Args:
+        results: 本次结果
+        baseline: 基线结果
+        threshold: 允许的相对变慢或内存增长比例，例如 0.2 表示 20%
+
+    Returns:
+        List[str]: 超出阈值的指标描述
+    """
+    regressions = []
+    print(f"\n{'benchmark':<36} {'metric':<28} {'ratio':>8}")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric, label in _COMPARED_METRICS.items():
+            if metric not in result or metric not in base:
+                continue
+            ratio = result[metric] / base[metric] if base[metric] else 1.0
+            print(f"{key:<36} {metric:<28} {ratio:>7.2f}x")
+            if ratio > 1 + threshold:
+                regressions.append(f"{key}: {label} {ratio:.2f}x baseline")
+    return regressions
+
+
+@click.command()
+@click.option('--sizes', default="1k,100k", show_default=True, help='收件人规模，例如 1k,100k,1m')
+@click.option('--engine', type=click.Choice(CHECKER_ENGINES), default="python", show_default=True,
+              help='生日检查引擎')
+@click.option('--repeat', default=3, show_default=True, help='每个基准的计时次数，取最小值')
+@click.option('--seed', default=0, show_default=True, help='生成收件人的随机种子')
+@click.option('--solar-ratio', default=0.4, show_default=True, help='只有阳历生日的比例')
+@click.option('--lunar-ratio', default=0.3, show_default=True, help='只有农历生日的比例，其余两种都有')
+@click.option('--reminder-days', nargs=2, type=int, default=(0, 30), show_default=True,
+              help='提前提醒天数的范围')
+@click.option('--columnar', is_flag=True, help='加载配置和检查生日时使用列式收件人表')
+@click.option('--save', 'save_path', help='把结果保存为基线 JSON')
+@click.option('--compare', 'compare_path', help='与基线 JSON 比较')
+@click.option('--threshold', default=0.2, show_default=True, help='比较时允许的相对退化比例')
+def main(sizes, engine, repeat, seed, solar_ratio, lunar_ratio, reminder_days, columnar,
+         save_path, compare_path, threshold):
+    """运行生日检查基准测试"""
+    results = run_benchmarks(parse_sizes(sizes), engine, repeat, seed,
+                             solar_ratio, lunar_ratio, tuple(reminder_days), columnar)
+
+    if save_path:
+        data = {
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "engine": engine,
+                "columnar": columnar,
+                "seed": seed,
+            },
+            "results": results,
+        }
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        print(f"\nBaseline saved to {save_path}")
+
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, threshold)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
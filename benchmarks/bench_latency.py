@@ -0,0 +1,163 @@
+"""
+发送延迟基准测试
+
+模拟网络发送（每次发送等待 --io-ms 毫秒），在检查生日和渲染邮件的同时统计每次发送比预期多等待的时间，
+以及事件循环的最大停顿，比较检查和渲染在事件循环中执行（inline）与交给线程池或进程池执行时的发送延迟。
+
+用法:
+    python -m benchmarks.bench_latency --sizes 20k
+    python -m benchmarks.bench_latency --sizes 20k,100k --modes inline,thread,process --workers 4
+"""
+import asyncio
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+import click
+
+from benchmarks.bench_checker import parse_sizes
+from benchmarks.generate import generate_recipients, write_config
+from src.core.config import CONFIG_CACHE_ENV, EXECUTOR_MODES
+from src.core.offload import shutdown_executors
+from src.main import BirthdayReminder
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """取第 q 百分位数，values 为空时返回 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def _measure_run(reminder: BirthdayReminder, io_seconds: float) -> Dict[str, float]:
+    """
+    运行一次提醒流程并统计发送延迟
+
+    Args:
+        reminder: 发送已被替换为模拟网络 I/O 的提醒应用
+        io_seconds: 每次模拟发送的网络等待时间
+
+    Returns:
+        Dict[str, float]: 指标
+    """
+    delays: List[float] = []
+    lags: List[float] = []
+
+    async def fake_send(**kwargs):
+        start = time.perf_counter()
+        await asyncio.sleep(io_seconds)
+        delays.append(time.perf_counter() - start - io_seconds)
+
+    for sender in reminder.notification_senders:
+        sender.send = fake_send
+
+    # 运行期间持续进行的模拟发送，反映检查对与其无关的进行中请求的影响
+    async def probe():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(io_seconds)
+            lags.append(time.perf_counter() - start - io_seconds)
+
+    task = asyncio.ensure_future(probe())
+    # 让模拟发送先开始等待，再开始检查
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    try:
+        await reminder.run()
+    finally:
+        seconds = time.perf_counter() - start
+        task.cancel()
+        await reminder.close()
+
+    return {
+        "sends": len(delays),
+        "seconds": seconds,
+        "send_delay_p50_ms": _percentile(delays, 50) * 1000,
+        "send_delay_p99_ms": _percentile(delays, 99) * 1000,
+        "send_delay_max_ms": max(delays, default=0.0) * 1000,
+        "loop_lag_mean_ms": (statistics.mean(lags) if lags else 0.0) * 1000,
+        "loop_lag_max_ms": max(lags, default=0.0) * 1000,
+    }
+
+
+def run_benchmarks(sizes: List[int], modes: List[str], workers: int, io_ms: float,
+                   seed: int) -> Dict[str, Dict[str, float]]:
+    """
+    在每个规模下依次用各执行模式运行一次完整的提醒流程（冷启动，包括建立索引）
+
+    Returns:
+        Dict[str, Dict[str, float]]: 基准名 -> 指标
+    """
+    results = {}
+    previous_cache = os.environ.get(CONFIG_CACHE_ENV)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ[CONFIG_CACHE_ENV] = os.path.join(tmp, "cache")
+        try:
+            _run_sizes(results, tmp, sizes, modes, workers, io_ms, seed)
+        finally:
+            if previous_cache is None:
+                os.environ.pop(CONFIG_CACHE_ENV, None)
+            else:
+                os.environ[CONFIG_CACHE_ENV] = previous_cache
+    return results
+
+
+def _run_sizes(results: Dict[str, Dict[str, float]], tmp: str, sizes: List[int], modes: List[str],
+               workers: int, io_ms: float, seed: int) -> None:
+    """依次运行各规模和执行模式，结果写入 results"""
+    for size in sizes:
+        recipients = generate_recipients(size, seed)
+        for mode in modes:
+            path = os.path.join(tmp, f"recipients_{size}_{mode}.yml")
+            write_config(path, recipients, executor={"mode": mode, "workers": workers})
+            reminder = BirthdayReminder(path)
+            try:
+                result = asyncio.run(_measure_run(reminder, io_ms / 1000))
+            finally:
+                shutdown_executors()
+            key = f"send_latency_{mode}[{size}]"
+            results[key] = dict(result, recipients=size)
+            print(f"{key:<32} {result['sends']:>6} sends {result['seconds']:>7.2f} s  "
+                  f"delay p50 {result['send_delay_p50_ms']:>7.1f} ms  p99 {result['send_delay_p99_ms']:>7.1f} ms  "
+                  f"max {result['send_delay_max_ms']:>7.1f} ms  loop lag max {result['loop_lag_max_ms']:>7.1f} ms")
+
+
+@click.command()
+@click.option('--sizes', default="20k", show_default=True, help='收件人规模，例如 20k,100k')
+@click.option('--modes', default=",".join(EXECUTOR_MODES), show_default=True, help='要比较的执行模式')
+@click.option('--workers', default=4, show_default=True, help='渲染线程或进程数')
+@click.option('--io-ms', default=5.0, show_default=True, help='每次模拟发送的网络等待毫秒数')
+@click.option('--seed', default=0, show_default=True, help='生成收件人的随机种子')
+@click.option('--save', 'save_path', help='把结果保存为 JSON')
+def main(sizes, modes, workers, io_ms, seed, save_path):
+    """比较各执行模式下检查期间的发送延迟"""
+    mode_list = [mode.strip() for mode in modes.split(",") if mode.strip()]
+    for mode in mode_list:
+        if mode not in EXECUTOR_MODES:
+            raise click.BadParameter(f"unknown mode {mode}", param_hint="--modes")
+    results = run_benchmarks(parse_sizes(sizes), mode_list, workers, io_ms, seed)
+
+    if save_path:
+        data = {
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "workers": workers,
+                "io_ms": io_ms,
+                "seed": seed,
+            },
+            "results": results,
+        }
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        print(f"\nResults saved to {save_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+合成收件人生成器 - 为基准测试生成可复现的大规模收件人配置
+"""
+import random
+from typing import Dict, List, Optional, Tuple
+import yaml
+
+try:
+    from yaml import CSafeDumper as _Dumper
+except ImportError:  # 未编译 libyaml 时使用纯 Python 实现
+    from yaml import SafeDumper as _Dumper
+
+# 基准配置的通知部分，只用于让配置能正常加载
+NOTIFICATION = {
+    "smtp": {
+        "host": "smtp.example.com",
+        "port": 587,
+        "username": "bench@example.com",
+        "password": "bench",
+        "default_template_file": "birthday.html",
+        "default_reminder_days": 3,
+    },
+    "start_notification": "email",
+}
+
+
+def _random_date(rng: random.Random) -> str:
+    """生成 1940-2020 年之间的日期，日取 1-28 以保证阳历和农历都有效"""
+    return f"{rng.randint(1940, 2020):04d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def generate_recipients(
+    count: int,
+    seed: int = 0,
+    solar_ratio: float = 0.4,
+    lunar_ratio: float = 0.3,
+    reminder_days: Tuple[int, int] = (0, 30),
+) -> List[Dict]:
+    """
+    生成收件人配置
+
+    相同的参数总是生成相同的收件人。
+
+    Args:
+        count: 收件人数量
+        seed: 随机种子
+        solar_ratio: 只有阳历生日的比例
+        lunar_ratio: 只有农历生日的比例，其余收件人两种生日都有
+        reminder_days: 提前提醒天数的取值范围（含两端）
+
+    Returns:
+        List[Dict]: 与 config.yml 中 recipients 格式相同的字典列表
+    """
+    if solar_ratio < 0 or lunar_ratio < 0 or solar_ratio + lunar_ratio > 1:
+        raise ValueError("solar_ratio and lunar_ratio must be non-negative and sum to at most 1")
+
+    rng = random.Random(seed)
+    low, high = reminder_days
+    recipients = []
+    for i in range(count):
+        recipient = {
+            "name": f"recipient-{i}",
+            "email": f"recipient-{i}@example.com",
+            "reminder_days": rng.randint(low, high),
+        }
+        kind = rng.random()
+        if kind < solar_ratio:
+            recipient["solar_birthday"] = _random_date(rng)
+        elif kind < solar_ratio + lunar_ratio:
+            recipient["lunar_birthday"] = _random_date(rng)
+        else:
+            recipient["solar_birthday"] = _random_date(rng)
+            recipient["lunar_birthday"] = _random_date(rng)
+        recipients.append(recipient)
+    return recipients
+
+
+def write_config(path: str, recipients: List[Dict], notification: Optional[Dict] = None,
+                 checker: Optional[Dict] = None, executor: Optional[Dict] = None) -> None:
+    """
+    把收件人写成完整的 YAML 配置文件
+
+    Args:
+        path: 输出路径
+        recipients: 收件人字典列表
+        notification: 通知配置，默认使用 NOTIFICATION
+        checker: 检查配置，为空时不写入
+        executor: 执行配置，为空时不写入
+    """
+    data = {"notification": notification or NOTIFICATION, "recipients": recipients}
+    if checker:
+        data["checker"] = checker
+    if executor:
+        data["executor"] = executor
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump(data, f, Dumper=_Dumper, allow_unicode=True, sort_keys=False)
@@ -0,0 +1,121 @@
+"""
+黄历信息模块 - 只依赖日期的干支、节日、节气等信息，按日期缓存
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Union
+
+# 缓存的日期数量，覆盖一次运行及常驻进程中最近几天的查询
+DAY_CONTEXT_CACHE_SIZE = 64
+
+
+@dataclass(frozen=True)
+class DayContext:
+    """某一天的黄历信息，与收件人无关，可被所有收件人的结果共享"""
+
+    day: date
+    gz_year: str            # 干支纪年
+    gz_month: str           # 干支纪月
+    gz_day: str             # 干支纪日
+    gz_hour: str            # 干支纪时
+    lunar_month: str        # 农历月份
+    lunar_day: str          # 农历日期
+    lunar_festival: str     # 农历节日
+    solar_festival: str     # 阳历节日
+    solar_term: str         # 节气
+    week_name: str          # 星期
+    constellation: str      # 星座
+
+    def as_dict(self) -> Dict[str, str]:
+        """返回可直接合并到 extra_info 中的字段"""
+        return {
+            'gz_year': self.gz_year,
+            'gz_month': self.gz_month,
+            'gz_day': self.gz_day,
+            'gz_hour': self.gz_hour,
+            'lunar_month': self.lunar_month,
+            'lunar_day': self.lunar_day,
+            'lunar_festival': self.lunar_festival,
+            'solar_festival': self.solar_festival,
+            'solar_term': self.solar_term,
+            'week_name': self.week_name,
+            'constellation': self.constellation,
+        }
+
+
+@lru_cache(maxsize=DAY_CONTEXT_CACHE_SIZE)
+def _build_day_context(day: date) -> DayContext:
+    """计算某一天的黄历信息（结果按日期做 LRU 缓存）"""
+    # lunar_python 导入较慢，只在第一次计算时导入
+    from lunar_python import Solar
+
+    solar = Solar.fromYmd(day.year, day.month, day.day)
+    lunar = solar.getLunar()
+
+    return DayContext(
+        day=day,
+        gz_year=lunar.getYearInGanZhi(),
+        gz_month=lunar.getMonthInGanZhi(),
+        gz_day=lunar.getDayInGanZhi(),
+        gz_hour=lunar.getTimeInGanZhi(),
+        lunar_month=f"{lunar.getMonthInChinese()}月",
+        lunar_day=lunar.getDayInChinese(),
+        lunar_festival='、'.join(lunar.getFestivals()),
+        solar_festival='、'.join(solar.getFestivals()),
+        solar_term=lunar.getJieQi() or '',
+        week_name=solar.getWeekInChinese(),
+        constellation=solar.getXingZuo(),
+    )
+
+
+def get_day_context(day: Union[date, datetime]) -> DayContext:
+    """
+    获取某一天的黄历信息
+
+    Args:
+        day: 日期，datetime 会被截断为日期
+
+    Returns:
+        DayContext: 当天的黄历信息
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    return _build_day_context(day)
+
+
+# 生肖按地支顺序排列，公元 4 年为鼠年
+_SHENGXIAO = "鼠牛虎兔龙蛇马羊猴鸡狗猪"
+
+
+@lru_cache(maxsize=None)
+def _spring_festival(year: int) -> date:
+    """某一农历年正月初一对应的阳历日期"""
+    from lunar_python import Lunar
+
+    solar = Lunar.fromYmd(year, 1, 1).getSolar()
+    return date(solar.getYear(), solar.getMonth(), solar.getDay())
+
+
+def get_zodiac(year: int, month: int, day: int) -> str:
+    """
+    获取某个阳历日期所在农历年的生肖
+
+    生肖只取决于农历年份，按正月初一划分，每个年份只做一次农历转换；
+    逐个日期调用 lunar_python 会在不同年份之间反复重建农历年数据。
+
+    Args:
+        year: 年
+        month: 月
+        day: 日
+
+    Returns:
+        str: 生肖
+    """
+    lunar_year = year if date(year, month, day) >= _spring_festival(year) else year - 1
+    return _SHENGXIAO[(lunar_year - 4) % 12]
+
+
+def clear_day_context_cache() -> None:
+    """清空黄历信息缓存"""
+    _build_day_context.cache_clear()
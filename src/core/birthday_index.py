@@ -0,0 +1,163 @@
+"""
+生日索引模块 - 按 (月, 日) 倒排收件人，按提前提醒天数分桶
+"""
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# (月, 日) -> 收件人编号列表
+MonthDayIndex = Dict[Tuple[int, int], List[int]]
+
+
+class BirthdayMatch(NamedTuple):
+    """单个收件人的匹配结果"""
+
+    solar_match: bool
+    lunar_match: bool
+    days_until: int
+    age: int
+
+
+class Occurrence(NamedTuple):
+    """日期范围内的一次生日"""
+
+    day: date
+    rid: int
+    solar_match: bool
+    lunar_match: bool
+    age: int
+
+
+class BirthdayIndex:
+    """
+    生日倒排索引
+
+    阳历和农历生日分别按 (月, 日) 建立倒排表，并按收件人的 reminder_days 分桶，
+    这样一次检查只需在每个桶的提醒窗口内按日期查表，耗时与命中数量相关，
+    而不是与收件人数量 × 提醒天数相关。日期范围查询不考虑提醒天数，
+    第一次查询时把各个桶合并为不分桶的倒排表，之后每天只需查一次表。
+    """
+
+    def __init__(self, size: int = 0):
+        self.size = size
+        self._solar: Dict[int, MonthDayIndex] = {}
+        self._lunar: Dict[int, MonthDayIndex] = {}
+        self._solar_days: Optional[MonthDayIndex] = None
+        self._lunar_days: Optional[MonthDayIndex] = None
+        self._solar_years: Dict[int, int] = {}
+        self._lunar_years: Dict[int, int] = {}
+
+    def add(self, rid: int, reminder_days: int,
+            solar: Optional[Tuple[int, int, int]] = None,
+            lunar: Optional[Tuple[int, int, int]] = None) -> None:
+        """
+        添加一个收件人
+
+        Args:
+            rid: 收件人编号（在收件人列表中的下标）
+            reminder_days: 提前提醒天数
+            solar: 阳历生日的年月日
+            lunar: 农历生日的年月日
+        """
+        if solar:
+            year, month, day = solar
+            self._solar.setdefault(reminder_days, {}).setdefault((month, day), []).append(rid)
+            self._solar_years[rid] = year
+            self._solar_days = None
+        if lunar:
+            year, month, day = lunar
+            self._lunar.setdefault(reminder_days, {}).setdefault((month, day), []).append(rid)
+            self._lunar_years[rid] = year
+            self._lunar_days = None
+        self.size = max(self.size, rid + 1)
+
+    @property
+    def max_reminder_days(self) -> int:
+        """所有桶中最大的提前提醒天数"""
+        return max(list(self._solar) + list(self._lunar), default=0)
+
+    def match(self, today: date,
+              lunar_month_day: Callable[[date], Tuple[int, int]]) -> Dict[int, BirthdayMatch]:
+        """
+        查找提醒窗口内过生日的收件人
+
+        Args:
+            today: 当前日期
+            lunar_month_day: 把阳历日期转换为农历 (月, 日) 的函数，闰月以负数月份表示
+
+        Returns:
+            Dict[int, BirthdayMatch]: 收件人编号到匹配结果的映射，按编号升序
+        """
+        window = [today + timedelta(days=i) for i in range(self.max_reminder_days + 1)]
+        years = [d.year for d in window]
+
+        solar_keys = [(d.month, d.day) for d in window]
+        solar_hits = self._scan(self._solar, self._solar_years, solar_keys, years)
+        lunar_hits: Dict[int, Tuple[int, int]] = {}
+        if self._lunar:
+            lunar_keys = [lunar_month_day(d) for d in window[:max(self._lunar) + 1]]
+            lunar_hits = self._scan(self._lunar, self._lunar_years, lunar_keys, years)
+
+        matches = {}
+        for rid in sorted(solar_hits.keys() | lunar_hits.keys()):
+            # 同时命中时以农历结果为准
+            days_until, age = lunar_hits.get(rid) or solar_hits[rid]
+            matches[rid] = BirthdayMatch(rid in solar_hits, rid in lunar_hits, days_until, age)
+        return matches
+
+    def between(self, start: date, end: date,
+                lunar_month_day: Callable[[date], Tuple[int, int]]) -> List[Occurrence]:
+        """
+        查找日期范围内（包含首尾两天）过生日的收件人，不考虑提前提醒天数
+
+        Args:
+            start: 起始日期
+            end: 结束日期
+            lunar_month_day: 把阳历日期转换为农历 (月, 日) 的函数，闰月以负数月份表示
+
+        Returns:
+            List[Occurrence]: 按日期和收件人编号排序；同一天阳历和农历都命中时合并为一条
+        """
+        if self._solar_days is None:
+            self._solar_days = self._merge(self._solar)
+        if self._lunar_days is None:
+            self._lunar_days = self._merge(self._lunar)
+        occurrences = []
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            solar = self._solar_days.get((day.month, day.day), ())
+            lunar = self._lunar_days.get(lunar_month_day(day), ()) if self._lunar_days else ()
+            if lunar:
+                solar, lunar = set(solar), set(lunar)
+                rids = sorted(solar | lunar)
+            else:
+                rids = solar
+            for rid in rids:
+                # 同时命中时以农历结果为准
+                if rid in lunar:
+                    occurrences.append(Occurrence(day, rid, rid in solar, True, day.year - self._lunar_years[rid]))
+                else:
+                    occurrences.append(Occurrence(day, rid, True, False, day.year - self._solar_years[rid]))
+        return occurrences
+
+    @staticmethod
+    def _merge(buckets: Dict[int, MonthDayIndex]) -> MonthDayIndex:
+        """把各个提醒天数桶合并为一张倒排表，每个 (月, 日) 的收件人编号升序排列"""
+        merged: MonthDayIndex = {}
+        for index in buckets.values():
+            for key, rids in index.items():
+                merged.setdefault(key, []).extend(rids)
+        for rids in merged.values():
+            rids.sort()
+        return merged
+
+    @staticmethod
+    def _scan(buckets: Dict[int, MonthDayIndex], birth_years: Dict[int, int],
+              keys: List[Tuple[int, int]], years: List[int]) -> Dict[int, Tuple[int, int]]:
+        """在每个桶的提醒窗口内查表，返回收件人编号到 (距离天数, 年龄) 的映射"""
+        hits: Dict[int, Tuple[int, int]] = {}
+        for reminder_days, index in buckets.items():
+            for days_until in range(reminder_days + 1):
+                for rid in index.get(keys[days_until], ()):
+                    if rid not in hits:
+                        hits[rid] = (days_until, years[days_until] - birth_years[rid])
+        return hits
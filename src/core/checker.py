@@ -1,173 +1,320 @@
 """
 生日检查模块
 """
-from datetime import datetime, timedelta, date
-from typing import List, Tuple, Dict, Union
-from lunar_python import Solar
-from src.core.config import Recipient
+from datetime import datetime, date, timedelta
+from typing import Iterator, List, NamedTuple, Tuple, Dict, Optional, Sequence, Union
+from src.core.almanac import DayContext, get_day_context
+from src.core.birthday_index import BirthdayIndex, BirthdayMatch
+from src.core.config import CheckerConfig, Recipient
+from src.core.lunar_table import LunarTable, get_lunar_table
+from src.core.recipient_table import RecipientTable, recipient_rows
+from src.core.sharding import ShardSpec, filter_recipients
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class UpcomingBirthday(NamedTuple):
+    """日期范围查询的一条结果"""
+
+    day: date               # 生日对应的阳历日期
+    days_until: int         # 距离查询起始日期的天数
+    recipient: Recipient
+    solar_match: bool
+    lunar_match: bool
+    age: int
+
+
+class CheckResults(Sequence[Tuple[Recipient, bool, Dict]]):
+    """
+    列式收件人表的检查结果
+
+    与 check_birthdays 返回的列表用法相同，但只保存命中收件人的额外信息，
+    按下标访问时才构造收件人视图。birthdays() 只遍历命中的收件人。
+    """
+
+    def __init__(self, recipients: RecipientTable, matches: Dict[int, Dict], base_extra_info: Dict):
+        self.recipients = recipients
+        self.matches = matches
+        self._base_extra_info = base_extra_info
+
+    @property
+    def birthday_count(self) -> int:
+        """命中的收件人数"""
+        return len(self.matches)
+
+    def birthdays(self) -> Iterator[Tuple[Recipient, Dict]]:
+        """按收件人顺序返回命中的收件人和额外信息"""
+        for rid, extra_info in self.matches.items():
+            yield self.recipients[rid], extra_info
+
+    def __len__(self) -> int:
+        return len(self.recipients)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        recipient = self.recipients[index]
+        if index < 0:
+            index += len(self)
+        extra_info = self.matches.get(index)
+        if extra_info is None:
+            return recipient, False, dict(self._base_extra_info)
+        return recipient, True, extra_info
+
+
 class BirthdayChecker:
-    def check_birthdays(self, recipients: List[Recipient]) -> List[Tuple[Recipient, bool, Dict]]:
+    def __init__(self, checker_config: Optional[CheckerConfig] = None):
+        self.checker_config = checker_config or CheckerConfig()
+        # 最近一次建立索引的收件人列表及其索引
+        self._index_source: Optional[Sequence[Recipient]] = None
+        self._index_size = 0
+        self._index: Optional[BirthdayIndex] = None
+        # 最近一次分片的收件人列表、分片和结果
+        self._shard_key: Optional[Tuple[int, int, ShardSpec]] = None
+        self._shard_source: Optional[Sequence[Recipient]] = None
+        self._shard_recipients: Sequence[Recipient] = []
+
+    def check_birthdays(self, recipients: List[Recipient],
+                        shard: Optional[ShardSpec] = None) -> Sequence[Tuple[Recipient, bool, Dict]]:
         """
         检查所有人的生日
 
         Args:
-            recipients: 收件人列表
+            recipients: 收件人列表或列式收件人表
+            shard: 只检查属于该分片的收件人，为空时检查全部
 
         Returns:
-            List[Tuple[Recipient, bool, Dict]]: 返回收件人、是否生日和额外信息的元组列表
+            Sequence[Tuple[Recipient, bool, Dict]]: 返回收件人、是否生日和额外信息的元组列表；
+                传入列式表时返回按需构造的 CheckResults
         """
+        if shard is not None:
+            recipients = self.select_shard(recipients, shard)
         today = datetime.now()
+        day_context = get_day_context(today)
+        matches = dict(self._find_matches(recipients, today, day_context))
+        if isinstance(recipients, RecipientTable):
+            return CheckResults(recipients, matches, self._base_extra_info(day_context))
         results = []
 
-        for recipient in recipients:
-            is_birthday, extra_info = self._check_birthday(recipient, today)
-            results.append((recipient, is_birthday, extra_info))
+        for rid, recipient in enumerate(recipients):
+            extra_info = matches.get(rid)
+            if extra_info is None:
+                results.append((recipient, False, self._base_extra_info(day_context)))
+            else:
+                results.append((recipient, True, extra_info))
 
         return results
 
-    def _convert_to_date_parts(self, date_obj: Union[str, datetime, date]) -> Tuple[int, int, int]:
+    def find_birthdays(self, recipients: Sequence[Recipient],
+                       today: Optional[Union[datetime, date]] = None,
+                       shard: Optional[ShardSpec] = None) -> List[Tuple[Recipient, Dict]]:
+        """
+        只返回提醒窗口内过生日的收件人
+
+        Args:
+            recipients: 收件人列表
+            today: 当前日期，默认为今天
+            shard: 只检查属于该分片的收件人，为空时检查全部
+
+        Returns:
+            List[Tuple[Recipient, Dict]]: 按收件人顺序排列的收件人和额外信息
+        """
+        return list(self.iter_birthdays(recipients, today, shard))
+
+    def iter_birthdays(self, recipients: Sequence[Recipient],
+                       today: Optional[Union[datetime, date]] = None,
+                       shard: Optional[ShardSpec] = None) -> Iterator[Tuple[Recipient, Dict]]:
         """
-        转换日期为年月日元组
+        逐个返回提醒窗口内过生日的收件人
+
+        只为命中的收件人生成额外信息，调用方可以在检查完成之前开始处理已经返回的结果。
 
         Args:
-            date_obj: 日期对象，可以是字符串、datetime或date类型
+            recipients: 收件人列表
+            today: 当前日期，默认为今天
+            shard: 只检查属于该分片的收件人，为空时检查全部
 
         Returns:
-            Tuple[int, int, int]: 年月日的元组
+            Iterator[Tuple[Recipient, Dict]]: 按收件人顺序排列的收件人和额外信息
         """
-        if isinstance(date_obj, str):
-            dt = datetime.strptime(date_obj, "%Y-%m-%d")
-        elif isinstance(date_obj, datetime):
-            dt = date_obj
-        elif isinstance(date_obj, date):
-            dt = datetime.combine(date_obj, datetime.min.time())
-        else:
-            raise ValueError(f"Unsupported date type: {type(date_obj)}")
-        return dt.year, dt.month, dt.day
+        if shard is not None:
+            recipients = self.select_shard(recipients, shard)
+        today = today or datetime.now()
+        day_context = get_day_context(today)
+        for _, recipient, extra_info in self._iter_matches(recipients, today, day_context):
+            yield recipient, extra_info
 
-    def _check_birthday(self, recipient: Recipient, today: datetime) -> Tuple[bool, Dict]:
+    def upcoming(self, recipients: Sequence[Recipient], start: Union[datetime, date],
+                 end: Union[datetime, date], shard: Optional[ShardSpec] = None) -> List[UpcomingBirthday]:
         """
-        检查是否是生日（包括提前提醒）
+        查询日期范围内（包含首尾两天）的所有生日，不考虑收件人的提前提醒天数
+
+        阳历和农历生日都通过索引和农历查找表换算为具体的阳历日期，不逐人逐日转换农历。
+
+        Args:
+            recipients: 收件人列表
+            start: 起始日期
+            end: 结束日期
+            shard: 只查询属于该分片的收件人，为空时查询全部
+
+        Returns:
+            List[UpcomingBirthday]: 按日期排序，同一天按收件人顺序排列
+
+        Raises:
+            ValueError: 结束日期早于起始日期
+        """
+        if isinstance(start, datetime):
+            start = start.date()
+        if isinstance(end, datetime):
+            end = end.date()
+        if end < start:
+            raise ValueError(f"end date {end} is before start date {start}")
+        if shard is not None:
+            recipients = self.select_shard(recipients, shard)
+        index = self.get_index(recipients)
+        lunar_table = self.get_lunar_table(start, end)
+        return [
+            UpcomingBirthday(occurrence.day, (occurrence.day - start).days, recipients[occurrence.rid],
+                             occurrence.solar_match, occurrence.lunar_match, occurrence.age)
+            for occurrence in index.between(start, end, lunar_table.month_day)
+        ]
+
+    def select_shard(self, recipients: Sequence[Recipient], shard: ShardSpec) -> Sequence[Recipient]:
+        """
+        取出属于分片的收件人，同一列表只筛选一次，以便继续命中索引缓存
+
+        Args:
+            recipients: 收件人列表
+            shard: 分片说明
+
+        Returns:
+            Sequence[Recipient]: 属于该分片的收件人，列式表筛选后仍为列式表
+        """
+        key = (id(recipients), len(recipients), shard)
+        if self._shard_source is not recipients or self._shard_key != key:
+            if isinstance(recipients, RecipientTable):
+                self._shard_recipients = recipients.take(
+                    i for i, (name, email) in enumerate(zip(recipients.names, recipients.emails))
+                    if shard.owns(name, email)
+                )
+            else:
+                self._shard_recipients = filter_recipients(recipients, shard)
+            self._shard_source = recipients
+            self._shard_key = key
+        return self._shard_recipients
+
+    def get_index(self, recipients: Sequence[Recipient]) -> BirthdayIndex:
+        """
+        获取收件人列表的生日索引，同一列表只建立一次
+
+        Args:
+            recipients: 收件人列表
+
+        Returns:
+            BirthdayIndex: 生日索引
+        """
+        if (self._index is None or self._index_source is not recipients
+                or self._index_size != len(recipients)):
+            self._index = self.build_index(recipients)
+            self._index_source = recipients
+            self._index_size = len(recipients)
+        return self._index
+
+    def build_index(self, recipients: Sequence[Recipient]) -> BirthdayIndex:
+        """
+        根据收件人列表建立生日索引
+
+        Args:
+            recipients: 收件人列表
+
+        Returns:
+            BirthdayIndex: 生日索引
+        """
+        index = BirthdayIndex(len(recipients))
+        for rid, (reminder_days, solar, lunar) in enumerate(recipient_rows(recipients)):
+            index.add(rid, reminder_days, solar, lunar)
+        return index
+
+    def _find_matches(self, recipients: Sequence[Recipient], today: Union[datetime, date],
+                      day_context: DayContext) -> List[Tuple[int, Dict]]:
+        """查索引并为命中的收件人生成额外信息"""
+        return [(rid, extra_info) for rid, _, extra_info in self._iter_matches(recipients, today, day_context)]
+
+    def _iter_matches(self, recipients: Sequence[Recipient], today: Union[datetime, date],
+                      day_context: DayContext) -> Iterator[Tuple[int, Recipient, Dict]]:
+        """
+        按收件人顺序逐个返回命中的收件人
+
+        Returns:
+            Iterator[Tuple[int, Recipient, Dict]]: (收件人位置, 收件人, 额外信息)
+        """
+        if isinstance(today, datetime):
+            today = today.date()
+        index = self.get_index(recipients)
+        lunar_table = self.get_lunar_table(today, today + timedelta(days=index.max_reminder_days))
+        for rid, match in index.match(today, lunar_table.month_day).items():
+            recipient = recipients[rid]
+            yield rid, recipient, self._build_extra_info(recipient, match, day_context)
+
+    def get_lunar_table(self, start: date, end: date) -> LunarTable:
+        """
+        获取覆盖指定日期范围的农历查找表
+
+        配置的年份范围不足以覆盖时会自动扩展到包含该日期范围。
+
+        Args:
+            start: 起始日期
+            end: 结束日期
+
+        Returns:
+            LunarTable: 农历查找表
+        """
+        start_year = self.checker_config.lunar_table_start_year or start.year
+        end_year = self.checker_config.lunar_table_end_year or end.year
+        return get_lunar_table(min(start_year, start.year), max(end_year, end.year))
+
+    def close(self) -> None:
+        """释放检查器持有的资源"""
+
+    @staticmethod
+    def _base_extra_info(day_context: DayContext) -> Dict:
+        """未命中生日时的额外信息"""
+        extra_info = {
+            'solar_match': False,
+            'lunar_match': False,
+            'days_until': 0,
+            'zodiac': '',           # 生肖
+            'age': 0,
+        }
+        extra_info.update(day_context.as_dict())
+        return extra_info
+
+    def _build_extra_info(self, recipient: Recipient, match: BirthdayMatch,
+                          day_context: DayContext) -> Dict:
+        """
+        生成命中生日的额外信息
 
         Args:
             recipient: 收件人信息
-            today: 当前日期
+            match: 索引匹配结果
+            day_context: 当天的黄历信息
 
         Returns:
-            Tuple[bool, Dict]: 是否是生日和额外信息
+            Dict: 额外信息
         """
+        extra_info = self._base_extra_info(day_context)
+        extra_info.update({
+            'solar_match': match.solar_match,
+            'lunar_match': match.lunar_match,
+            'days_until': match.days_until,
+            'age': match.age,
+        })
+
+        # 获取生肖（按收件人缓存）
         try:
-            check_dates = []
-            for i in range(recipient.reminder_days + 1):
-                check_date = today + timedelta(days=i)
-                check_dates.append(check_date)
-
-            extra_info = {
-                'solar_match': False,
-                'lunar_match': False,
-                'days_until': 0,
-                'zodiac': '',           # 生肖
-                'gz_year': '',          # 干支纪年
-                'gz_month': '',         # 干支纪月
-                'gz_day': '',           # 干支纪日
-                'gz_hour': '',          # 干支纪时
-                'lunar_month': '',      # 农历月份
-                'lunar_day': '',        # 农历日期
-                'lunar_festival': '',   # 农历节日
-                'solar_festival': '',   # 阳历节日
-                'solar_term': '',       # 节气
-                'age': 0,
-                'week_name': '',        # 星期
-                'constellation': ''     # 星座
-            }
-
-            # 获取今天的详细信息
-            year, month, day = self._convert_to_date_parts(today)
-            today_solar = Solar.fromYmd(year, month, day)
-            today_lunar = today_solar.getLunar()
-
-            # 填充当天信息
-            extra_info.update({
-                'gz_year': today_lunar.getYearInGanZhi(),
-                'gz_month': today_lunar.getMonthInGanZhi(),
-                'gz_day': today_lunar.getDayInGanZhi(),
-                'gz_hour': today_lunar.getTimeInGanZhi(),
-                'lunar_month': f"{today_lunar.getMonthInChinese()}月",
-                'lunar_day': today_lunar.getDayInChinese(),
-                'week_name': today_solar.getWeekInChinese(),
-                'constellation': today_solar.getXingZuo(),
-            })
-
-            # 获取节日信息
-            lunar_festivals = today_lunar.getFestivals()
-            if lunar_festivals:
-                extra_info['lunar_festival'] = '、'.join(lunar_festivals)
-
-            solar_festivals = today_solar.getFestivals()
-            if solar_festivals:
-                extra_info['solar_festival'] = '、'.join(solar_festivals)
-
-            # 获取节气
-            term = today_lunar.getJieQi()
-            if term:
-                extra_info['solar_term'] = term
-
-            # 检查阳历生日
-            if recipient.solar_birthday:
-                try:
-                    birth_year, birth_month, birth_day = self._convert_to_date_parts(
-                        recipient.solar_birthday)
-                    for i, check_date in enumerate(check_dates):
-                        year, month, day = self._convert_to_date_parts(check_date)
-                        if month == birth_month and day == birth_day:
-                            extra_info['solar_match'] = True
-                            extra_info['days_until'] = i
-                            extra_info['age'] = year - birth_year
-                            break
-                except ValueError as e:
-                    logger.error(f"Invalid solar birthday format for {recipient.name}: {e}")
-
-            # 检查农历生日
-            if recipient.lunar_birthday:
-                try:
-                    birth_year, birth_month, birth_day = self._convert_to_date_parts(
-                        recipient.lunar_birthday)
-                    for i, check_date in enumerate(check_dates):
-                        year, month, day = self._convert_to_date_parts(check_date)
-                        check_solar = Solar.fromYmd(year, month, day)
-                        check_lunar = check_solar.getLunar()
-                        if (check_lunar.getMonth() == birth_month
-                                and check_lunar.getDay() == birth_day):
-                            extra_info['lunar_match'] = True
-                            extra_info['days_until'] = i
-                            extra_info['age'] = year - birth_year
-                            break
-                except ValueError as e:
-                    logger.error(f"Invalid lunar birthday format for {recipient.name}: {e}")
-
-            # 如果是生日，添加生肖和其他信息
-            if extra_info['solar_match'] or extra_info['lunar_match']:
-                try:
-                    # 获取生肖和其他信息
-                    if recipient.lunar_birthday:
-                        year, month, day = self._convert_to_date_parts(
-                            recipient.lunar_birthday)
-                    else:
-                        year, month, day = self._convert_to_date_parts(
-                            recipient.solar_birthday)
-
-                    birth_solar = Solar.fromYmd(year, month, day)
-                    birth_lunar = birth_solar.getLunar()
-                    extra_info['zodiac'] = birth_lunar.getYearShengXiao()
-                except Exception as e:
-                    logger.error(f"Failed to get zodiac info for {recipient.name}: {e}")
-
-            return (extra_info['solar_match'] or extra_info['lunar_match']), extra_info
+            extra_info['zodiac'] = recipient.zodiac
         except Exception as e:
-            logger.error(f"Error checking birthday for {recipient.name}: {e}")
-            return False, {}
+            logger.error(f"Failed to get zodiac info for {recipient.name}: {e}")
+
+        return extra_info
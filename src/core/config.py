@@ -2,9 +2,51 @@
 配置管理模块
 """
 
-from dataclasses import dataclass
-from typing import List, Optional
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from functools import cached_property, lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 import yaml
+from src.core.sharding import ShardSpec
+
+try:
+    from yaml import CSafeLoader as _YAMLLoader
+except ImportError:  # 未编译 libyaml 时使用纯 Python 实现
+    from yaml import SafeLoader as _YAMLLoader
+
+logger = logging.getLogger(__name__)
+
+# 配置快照缓存目录；未设置或设为 0/off/false 时不使用缓存
+CONFIG_CACHE_ENV = "BIRTHDAYRS_CONFIG_CACHE"
+# 快照格式版本，快照结构变化时递增
+SNAPSHOT_VERSION = 1
+
+
+def parse_date_parts(value: Union[str, date], field_name: str = "date") -> Tuple[int, int, int]:
+    """
+    把 YYYY-MM-DD 字符串或日期对象解析为年月日元组
+
+    Args:
+        value: 日期字符串，或 YAML 直接解析出的 date/datetime 对象
+        field_name: 字段名，用于错误信息
+
+    Returns:
+        Tuple[int, int, int]: 年月日的元组
+    """
+    if isinstance(value, date):
+        return value.year, value.month, value.day
+    if isinstance(value, str):
+        try:
+            dt = datetime.strptime(value, "%Y-%m-%d")
+        except ValueError as e:
+            raise ValueError(f"Invalid {field_name} format: {value!r} ({e})") from e
+        return dt.year, dt.month, dt.day
+    raise ValueError(f"Unsupported {field_name} type: {type(value)}")
 
 
 @dataclass
@@ -19,12 +61,146 @@ class SMTPConfig:
     default_receive_email: Optional[str] = None
     default_template_file: str = "birthday.html"
     default_reminder_days: int = 0
+    template_cache_dir: Optional[str] = None  # 模板字节码缓存目录，默认为系统临时目录
+    pool_size: int = 2  # 连接池最大连接数
+    max_messages_per_connection: int = 100  # 单个连接最多发送的邮件数
+    idle_timeout: float = 30.0  # 空闲连接的最长保留时间（秒）
+    max_concurrency: int = 4  # 同时进行的最大发送数
+    rate_limit: float = 0  # 每秒最多发送数，0 表示不限速
+    rate_burst: int = 1  # 允许的瞬时突发发送数
 
 
 @dataclass
 class ServerChanConfig:
     default_sckey: Optional[str] = None
     default_reminder_days: int = 0
+    base_url: str = "https://sctapi.ftqq.com"
+    timeout: float = 10.0  # 请求超时时间（秒）
+    max_connections: int = 10  # 最大连接数
+    keepalive_expiry: float = 30.0  # 空闲长连接的保留时间（秒）
+    http2: bool = False  # 是否启用 HTTP/2（需要安装 h2）
+    max_concurrency: int = 2  # 同时进行的最大推送数
+    rate_limit: float = 0  # 每秒最多推送数，0 表示不限速
+    rate_burst: int = 1  # 允许的瞬时突发推送数
+
+
+@dataclass
+class DispatchConfig:
+    """发送调度配置"""
+
+    workers: int = 10  # 并发处理的收件人数
+    queue_size: int = 100  # 待发送队列长度
+
+
+@dataclass
+class CircuitBreakerConfig:
+    """每个发送器的熔断器配置"""
+
+    failure_threshold: int = 5  # 连续失败多少次后打开熔断器，0 表示不启用
+    reset_timeout: float = 30.0  # 打开多少秒后放行一次试探发送
+
+
+@dataclass
+class RetryBudgetConfig:
+    """所有发送器共享的重试预算配置"""
+
+    ratio: float = 0.2  # 每次首次发送增加的重试次数
+    min_retries: int = 10  # 每次运行至少允许的重试次数
+
+
+@dataclass
+class DigestConfig:
+    """摘要配置"""
+
+    enabled: bool = False  # 是否把发往同一目的地（邮箱或 sckey）的提醒合并为一条摘要
+    template_file: str = "birthday_digest.html"  # 邮件摘要模板
+    min_size: int = 2  # 同一目的地至少有多少条提醒才合并，不足时逐条发送
+
+
+CHECKER_ENGINES = ("python", "numpy")
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+@dataclass
+class CheckerConfig:
+    """生日检查配置"""
+
+    lunar_table_start_year: Optional[int] = None  # 农历查找表起始年份，默认为当年
+    lunar_table_end_year: Optional[int] = None  # 农历查找表结束年份，默认为提醒窗口结束的年份
+    engine: str = "python"  # 检查引擎: python 或 numpy
+    columnar: bool = False  # 收件人按列保存为 RecipientTable，适合大规模收件人
+
+    def __post_init__(self):
+        """验证检查引擎"""
+        if self.engine not in CHECKER_ENGINES:
+            raise ValueError(
+                f"Unknown checker engine: {self.engine}, expected one of {', '.join(CHECKER_ENGINES)}"
+            )
+
+
+@dataclass
+class ExecutorConfig:
+    """生日检查和模板渲染等 CPU 密集工作的执行配置"""
+
+    mode: str = "inline"  # inline: 在事件循环中执行; thread: 线程池; process: 渲染使用进程池
+    workers: int = 4  # 渲染线程或进程数
+
+    def __post_init__(self):
+        """验证执行模式和线程数"""
+        if self.mode not in EXECUTOR_MODES:
+            raise ValueError(
+                f"Unknown executor mode: {self.mode}, expected one of {', '.join(EXECUTOR_MODES)}"
+            )
+        if self.workers < 1:
+            raise ValueError(f"executor.workers must be at least 1, got {self.workers}")
+
+
+@dataclass
+class ScheduleConfig:
+    """常驻模式的定时配置"""
+
+    times: List[str] = field(default_factory=lambda: ["08:00"])  # 每天触发检查的本地时间 (HH:MM)
+    watch_interval: float = 0  # 检查配置文件变化的间隔（秒），0 表示只在收到 SIGHUP 时重新加载
+
+
+@dataclass
+class LedgerConfig:
+    """发送台账配置"""
+
+    path: Optional[str] = None  # SQLite 数据库路径，为空时不记录发送
+    batch_size: int = 100  # 发送记录批量写入的条数
+
+
+@dataclass
+class OutboxConfig:
+    """发件箱配置：首次发送失败的消息持久化保存，之后按退避时间重试"""
+
+    path: Optional[str] = None  # SQLite 数据库路径，为空时在发送协程内重试
+    batch_size: int = 50  # 每批取出的到期消息数
+    max_attempts: int = 8  # 包括首次发送在内的最多尝试次数，超过后放弃
+    base_delay: float = 30.0  # 第一次重试前等待的秒数，之后每次翻倍
+    max_delay: float = 3600.0  # 重试等待秒数的上限
+    jitter: float = 0.5  # 随机缩短等待时间的最大比例，避免大量消息同时重试
+    poll_interval: float = 30.0  # 常驻模式下检查到期消息的间隔秒数
+    retry_window: float = 60.0  # 发送完成后最多再等待的秒数，期间到期的消息在本次运行中重试；0 表示不等待
+
+    def __post_init__(self):
+        """验证尝试次数、抖动比例和重试等待时间"""
+        if self.max_attempts < 1:
+            raise ValueError(f"outbox.max_attempts must be at least 1, got {self.max_attempts}")
+        if not 0 <= self.jitter <= 1:
+            raise ValueError(f"outbox.jitter must be between 0 and 1, got {self.jitter}")
+        if self.retry_window < 0:
+            raise ValueError(f"outbox.retry_window must not be negative, got {self.retry_window}")
+
+
+@dataclass
+class MetricsConfig:
+    """运行指标配置"""
+
+    textfile: Optional[str] = None  # 每次运行结束后写入的 Prometheus 文本文件路径
+    host: str = "127.0.0.1"  # 常驻模式下指标端点的监听地址
+    port: Optional[int] = None  # 常驻模式下指标端点的端口，为空时不启动
 
 
 @dataclass
@@ -37,13 +213,31 @@ class Recipient:
     lunar_birthday: Optional[str] = None  # YYYY-MM-DD 格式（阳历日期）
     reminder_days: Optional[int] = None
     template_file: Optional[str] = None
+    # 解析后的生日年月日，加载时计算一次
+    solar_ymd: Optional[Tuple[int, int, int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    lunar_ymd: Optional[Tuple[int, int, int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self):
-        """验证至少有一个生日日期"""
+        """验证至少有一个生日日期，并解析生日"""
         if not self.solar_birthday and not self.lunar_birthday:
             raise ValueError(
                 "At least one of solar_birthday or lunar_birthday must be provided"
             )
+        if self.solar_birthday:
+            self.solar_ymd = parse_date_parts(self.solar_birthday, "solar_birthday")
+        if self.lunar_birthday:
+            self.lunar_ymd = parse_date_parts(self.lunar_birthday, "lunar_birthday")
+
+    @cached_property
+    def zodiac(self) -> str:
+        """出生年的生肖（优先按农历生日计算），首次访问时计算"""
+        from src.core.almanac import get_zodiac
+
+        return get_zodiac(*(self.lunar_ymd or self.solar_ymd))
 
 
 @dataclass
@@ -52,15 +246,69 @@ class Config:
 
     smtp_config: Optional[SMTPConfig]
     serverchan_config: Optional[ServerChanConfig]
-    recipients: List[Recipient]
+    recipients: Sequence[Recipient]  # checker.columnar 为 true 时是 RecipientTable
     notification_types: List[str]
+    checker_config: CheckerConfig = field(default_factory=CheckerConfig)
+    executor_config: ExecutorConfig = field(default_factory=ExecutorConfig)
+    dispatch_config: DispatchConfig = field(default_factory=DispatchConfig)
+    circuit_breaker_config: CircuitBreakerConfig = field(default_factory=CircuitBreakerConfig)
+    retry_budget_config: RetryBudgetConfig = field(default_factory=RetryBudgetConfig)
+    digest_config: DigestConfig = field(default_factory=DigestConfig)
+    schedule_config: ScheduleConfig = field(default_factory=ScheduleConfig)
+    ledger_config: LedgerConfig = field(default_factory=LedgerConfig)
+    outbox_config: OutboxConfig = field(default_factory=OutboxConfig)
+    metrics_config: MetricsConfig = field(default_factory=MetricsConfig)
+
+    @classmethod
+    def from_yaml(cls, config_path: str, cache_dir: Optional[str] = None,
+                  use_cache: bool = True, shard: Optional[ShardSpec] = None) -> "Config":
+        """
+        从YAML文件加载配置
+
+        指定了快照目录时，解析并验证后的配置会保存为快照，文件内容和解析代码都未变化时直接加载快照，
+        不再重新解析 YAML 和逐个构造收件人。快照包含 SMTP 密码和 sckey，因此默认不启用。
+
+        Args:
+            config_path: 配置文件路径
+            cache_dir: 快照目录，默认读取 BIRTHDAYRS_CONFIG_CACHE 环境变量，未设置时不使用快照
+            use_cache: 是否使用快照
+            shard: 只保留属于该分片的收件人，为空时保留全部
+
+        Returns:
+            Config: 应用配置
+        """
+        with open(config_path, "rb") as f:
+            raw = f.read()
+
+        snapshot_path = None
+        if use_cache:
+            cache_dir = cache_dir or default_cache_dir()
+            if cache_dir:
+                snapshot_path = _snapshot_path(cache_dir, config_path, shard)
+        if snapshot_path is None:
+            return cls.from_dict(yaml.load(raw, Loader=_YAMLLoader), shard)
+
+        stat = os.stat(config_path)
+        key = (SNAPSHOT_VERSION, _code_fingerprint(), stat.st_mtime_ns, stat.st_size,
+               hashlib.sha256(raw).hexdigest(), shard and str(shard))
+        config = _load_snapshot(snapshot_path, key)
+        if config is None:
+            config = cls.from_dict(yaml.load(raw, Loader=_YAMLLoader), shard)
+            _save_snapshot(snapshot_path, key, config)
+        return config
 
     @classmethod
-    def from_yaml(cls, config_path: str) -> "Config":
-        """从YAML文件加载配置"""
-        with open(config_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+    def from_dict(cls, data: Dict[str, Any], shard: Optional[ShardSpec] = None) -> "Config":
+        """
+        从解析后的配置字典构造配置
+
+        Args:
+            data: 解析后的配置字典
+            shard: 只构造属于该分片的收件人，为空时构造全部
 
+        Returns:
+            Config: 应用配置
+        """
         notification = data.get("notification", {})
         notification_types = [
             t.strip() for t in notification.get("start_notification", "email").split(",") if t.strip()
@@ -74,7 +322,28 @@ class Config:
             else None
         )
 
-        recipients = []
+        dispatch_config = DispatchConfig(**(notification.get("dispatch") or {}))
+        digest_config = DigestConfig(**(notification.get("digest") or {}))
+        circuit_breaker_config = CircuitBreakerConfig(**(notification.get("circuit_breaker") or {}))
+        retry_budget_config = RetryBudgetConfig(**(notification.get("retry_budget") or {}))
+        checker_config = CheckerConfig(**(data.get("checker") or {}))
+        executor_config = ExecutorConfig(**(data.get("executor") or {}))
+        schedule_config = ScheduleConfig(**(data.get("schedule") or {}))
+        ledger_config = LedgerConfig(**(data.get("ledger") or {}))
+        outbox_config = OutboxConfig(**(data.get("outbox") or {}))
+        metrics_config = MetricsConfig(**(data.get("metrics") or {}))
+
+        if checker_config.columnar:
+            from src.core.recipient_table import RecipientTable
+
+            recipients = RecipientTable()
+            add_recipient = recipients.add
+        else:
+            recipients = []
+
+            def add_recipient(**r):
+                recipients.append(Recipient(**r))
+
         for r in data.get("recipients", []):
             # 邮件相关默认
             if smtp_config:
@@ -88,16 +357,94 @@ class Config:
             if serverchan_config:
                 if "reminder_days" not in r:
                     r["reminder_days"] = serverchan_config.default_reminder_days
-            recipients.append(Recipient(**r))
+            # 分片按应用默认值之后的邮箱计算，其他节点的收件人不做校验和构造
+            if shard is not None and not shard.owns(r.get("name"), r.get("email")):
+                continue
+            add_recipient(**r)
 
         return cls(
             smtp_config=smtp_config,
             serverchan_config=serverchan_config,
             recipients=recipients,
             notification_types=notification_types,
+            checker_config=checker_config,
+            executor_config=executor_config,
+            dispatch_config=dispatch_config,
+            circuit_breaker_config=circuit_breaker_config,
+            retry_budget_config=retry_budget_config,
+            digest_config=digest_config,
+            schedule_config=schedule_config,
+            ledger_config=ledger_config,
+            outbox_config=outbox_config,
+            metrics_config=metrics_config,
         )
 
 
+def default_cache_dir() -> Optional[str]:
+    """配置快照的默认目录，只有通过 BIRTHDAYRS_CONFIG_CACHE 指定目录时才启用，否则返回 None"""
+    value = os.environ.get(CONFIG_CACHE_ENV)
+    if value is None or value.strip().lower() in ("", "0", "off", "false", "no"):
+        return None
+    return value
+
+
+def _snapshot_path(cache_dir: str, config_path: str, shard: Optional[ShardSpec] = None) -> str:
+    """每个配置文件路径和分片对应一个快照文件"""
+    name = os.path.abspath(config_path) + (f"#{shard}" if shard is not None else "")
+    digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"config-{digest}.pickle")
+
+
+@lru_cache(maxsize=None)
+def _code_fingerprint() -> str:
+    """
+    决定配置解析结果的源码的哈希
+
+    字段、默认值或解析逻辑变化后旧快照自动失效，不需要手动递增 SNAPSHOT_VERSION。
+    """
+    from src.core import recipient_table, sharding
+
+    digest = hashlib.sha256()
+    for module_file in (__file__, recipient_table.__file__, sharding.__file__):
+        with open(module_file, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _load_snapshot(path: str, key: Tuple) -> Optional["Config"]:
+    """读取与 key 匹配的快照，不存在、过期或损坏时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug(f"Ignoring unreadable config snapshot {path}: {type(e).__name__}: {e}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("key") != key:
+        return None
+    logger.debug(f"Loaded config snapshot {path}")
+    return snapshot["config"]
+
+
+def _save_snapshot(path: str, key: Tuple, config: "Config") -> None:
+    """原子地写入快照，失败时只记录日志"""
+    try:
+        directory = os.path.dirname(path)
+        # 快照包含密码等敏感信息，目录和文件（mkstemp 创建为 0600）只允许当前用户访问
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".config-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump({"key": key, "config": config}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except Exception as e:
+        logger.debug(f"Failed to write config snapshot {path}: {type(e).__name__}: {e}")
+
+
 if __name__ == "__main__":
     config = Config.from_yaml("config.example.yml")
     print(config)
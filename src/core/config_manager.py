@@ -4,6 +4,8 @@
 from pathlib import Path
 from typing import Optional
 from src.core.config import Config
+from src.core.metrics import STAGE_SECONDS
+from src.core.sharding import ShardSpec
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,8 +14,9 @@ logger = logging.getLogger(__name__)
 class ConfigManager:
     """配置管理器 - 只做必要的配置管理"""
 
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, shard: Optional[ShardSpec] = None):
         self.config_path = config_path
+        self.shard = shard
         self._config: Optional[Config] = None
 
     @property
@@ -32,8 +35,15 @@ class ConfigManager:
                 self.config_path = str(root_dir / "config.yml")
 
             logger.info(f"Loading config from: {self.config_path}")
-            config = Config.from_yaml(self.config_path)
-            logger.info("Config loaded successfully")
+            with STAGE_SECONDS.time(stage="config_load"):
+                if self.shard is None:
+                    config = Config.from_yaml(self.config_path)
+                else:
+                    config = Config.from_yaml(self.config_path, shard=self.shard)
+            if self.shard is None:
+                logger.info("Config loaded successfully")
+            else:
+                logger.info(f"Config loaded for shard {self.shard}: {len(config.recipients)} recipients")
             return config
 
         except FileNotFoundError:
@@ -55,8 +65,11 @@ class ConfigManager:
 
             # 验证收件人配置
             if not config.recipients:
-                logger.warning("No recipients configured")
-                return False
+                if self.shard is None:
+                    logger.warning("No recipients configured")
+                    return False
+                # 收件人较少时部分分片可能为空，这是正常情况
+                logger.info(f"No recipients in shard {self.shard}")
 
             # 验证通知类型配置
             if not config.notification_types:
@@ -0,0 +1,156 @@
+"""
+发送调度模块 - 有界队列 + 按通道的并发和速率限制
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, TypeVar, Union
+from src.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 工作协程退出标记
+_STOP = object()
+
+
+class TokenBucket:
+    """令牌桶限速器，rate 为每秒补充的令牌数，burst 为桶容量"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        """取一个令牌，令牌不足时等待"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ChannelLimiter:
+    """单个通道的并发上限和速率限制"""
+
+    def __init__(self, max_concurrency: int, rate_limit: float = 0, burst: int = 1):
+        self.max_concurrency = max(1, max_concurrency)
+        self._bucket = TokenBucket(rate_limit, burst) if rate_limit > 0 else None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """占用一个发送名额"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            if self._bucket is not None:
+                await self._bucket.acquire()
+            yield
+
+
+class Dispatcher:
+    """
+    发送调度器
+
+    待发送的任务经过有界队列交给固定数量的工作协程处理，内存占用与队列长度相关，
+    而不是与命中人数相关；每个通道（email、serverchan）有独立的并发上限和令牌桶，
+    不同通道之间互不阻塞。
+    """
+
+    def __init__(self, workers: int = 10, queue_size: int = 100):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self._limiters: Dict[str, ChannelLimiter] = {}
+
+    @classmethod
+    def from_config(cls, config: Config) -> "Dispatcher":
+        """根据配置创建调度器"""
+        dispatch = config.dispatch_config
+        dispatcher = cls(dispatch.workers, dispatch.queue_size)
+        if config.smtp_config:
+            smtp = config.smtp_config
+            dispatcher.add_channel("email", smtp.max_concurrency, smtp.rate_limit, smtp.rate_burst)
+        if config.serverchan_config:
+            serverchan = config.serverchan_config
+            dispatcher.add_channel("serverchan", serverchan.max_concurrency,
+                                   serverchan.rate_limit, serverchan.rate_burst)
+        return dispatcher
+
+    def add_channel(self, channel: str, max_concurrency: int,
+                    rate_limit: float = 0, burst: int = 1) -> None:
+        """
+        设置通道的限制
+
+        Args:
+            channel: 通道名称
+            max_concurrency: 同时进行的最大发送数
+            rate_limit: 每秒最多发送数，0 表示不限速
+            burst: 令牌桶容量，允许的瞬时突发数
+        """
+        self._limiters[channel] = ChannelLimiter(max_concurrency, rate_limit, burst)
+
+    @asynccontextmanager
+    async def limit(self, channel: str) -> AsyncIterator[None]:
+        """在通道限制内执行一次发送，未配置的通道不受限制"""
+        limiter = self._limiters.get(channel)
+        if limiter is None:
+            yield
+            return
+        async with limiter.slot():
+            yield
+
+    async def dispatch(self, items: Union[Iterable[T], AsyncIterable[T]],
+                       handler: Callable[[T], Awaitable[None]]) -> int:
+        """
+        通过有界队列把任务交给工作协程处理
+
+        Args:
+            items: 待处理的任务，可以是惰性的迭代器或异步迭代器；
+                异步迭代器可以边产生任务边让出事件循环，生产和处理重叠进行
+            handler: 处理单个任务的协程函数，异常会被记录但不会中断其他任务
+
+        Returns:
+            int: 处理的任务数
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is _STOP:
+                    return
+                try:
+                    await handler(item)
+                except Exception as e:
+                    logger.error(f"Dispatch task failed: {type(e).__name__}: {e}")
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(self.workers)]
+        count = 0
+        try:
+            if isinstance(items, AsyncIterable):
+                async for item in items:
+                    await queue.put(item)
+                    count += 1
+            else:
+                for item in items:
+                    await queue.put(item)
+                    count += 1
+            for _ in tasks:
+                await queue.put(_STOP)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return count
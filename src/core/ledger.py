@@ -0,0 +1,152 @@
+"""
+发送记录模块 - 基于 SQLite 的发送台账，保证重复运行不会重复发送
+"""
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Iterable, List, NamedTuple, Set
+from src.core.config import Recipient
+
+logger = logging.getLogger(__name__)
+
+
+class LedgerKey(NamedTuple):
+    """一次发送的唯一标识"""
+
+    recipient: str
+    channel: str
+    occurrence: str  # 生日当天的日期 (YYYY-MM-DD)
+    days_until: int
+
+    @classmethod
+    def for_send(cls, recipient: Recipient, channel: str, today: date, days_until: int) -> "LedgerKey":
+        """
+        根据收件人、通道和提醒距离生成标识
+
+        Args:
+            recipient: 收件人
+            channel: 通知通道
+            today: 检查日期
+            days_until: 距离生日的天数
+
+        Returns:
+            LedgerKey: 发送标识，生日日期为 today + days_until
+        """
+        occurrence = today + timedelta(days=days_until)
+        return cls(recipient_key(recipient), channel, occurrence.isoformat(), days_until)
+
+
+def recipient_key(recipient: Recipient) -> str:
+    """收件人的稳定标识（姓名 + 邮箱）"""
+    return f"{recipient.name}<{recipient.email or ''}>"
+
+
+class SendLedger:
+    """
+    SQLite 发送台账
+
+    所有数据库操作都在一个专用线程中执行，不阻塞事件循环；
+    查询按批进行（每次运行一次），写入先缓冲，达到 batch_size 或调用 flush 时批量提交。
+    """
+
+    def __init__(self, path: str, batch_size: int = 100):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._pending: List[LedgerKey] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="send-ledger")
+        self._conn = self._executor.submit(self._connect).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sent (
+                recipient TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                occurrence TEXT NOT NULL,
+                days_until INTEGER NOT NULL,
+                sent_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (recipient, channel, occurrence, days_until)
+            )
+            """
+        )
+        conn.commit()
+        return conn
+
+    def sent(self, keys: Iterable[LedgerKey]) -> Set[LedgerKey]:
+        """
+        批量查询已成功发送的记录
+
+        Args:
+            keys: 待查询的发送标识
+
+        Returns:
+            Set[LedgerKey]: 其中已经发送过的标识
+        """
+        keys = list(keys)
+        if not keys:
+            return set()
+        return self._executor.submit(self._query, keys).result()
+
+    def _query(self, keys: List[LedgerKey]) -> Set[LedgerKey]:
+        """把待查询的标识写入临时表，与台账做一次连接查询"""
+        cur = self._conn.cursor()
+        cur.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS lookup "
+            "(recipient TEXT, channel TEXT, occurrence TEXT, days_until INTEGER)"
+        )
+        cur.execute("DELETE FROM lookup")
+        cur.executemany("INSERT INTO lookup VALUES (?, ?, ?, ?)", keys)
+        rows = cur.execute(
+            "SELECT s.recipient, s.channel, s.occurrence, s.days_until FROM sent s "
+            "JOIN lookup l USING (recipient, channel, occurrence, days_until)"
+        ).fetchall()
+        cur.execute("DELETE FROM lookup")
+        return {LedgerKey(*row) for row in rows}
+
+    def record(self, keys: Iterable[LedgerKey]) -> None:
+        """同步写入发送记录"""
+        keys = list(keys)
+        if keys:
+            self._executor.submit(self._insert, keys).result()
+
+    def _insert(self, keys: List[LedgerKey]) -> None:
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO sent (recipient, channel, occurrence, days_until) VALUES (?, ?, ?, ?)",
+            keys,
+        )
+        self._conn.commit()
+
+    async def sent_async(self, keys: Iterable[LedgerKey]) -> Set[LedgerKey]:
+        """在台账线程中批量查询，不阻塞事件循环"""
+        keys = list(keys)
+        if not keys:
+            return set()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._query, keys)
+
+    async def add(self, key: LedgerKey) -> None:
+        """缓冲一条发送成功的记录，缓冲满后批量写入"""
+        self._pending.append(key)
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """把缓冲的记录批量写入数据库"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._insert, pending)
+        logger.debug(f"Recorded {len(pending)} sends in ledger")
+
+    def close(self) -> None:
+        """写入剩余记录并关闭数据库"""
+        if self._pending:
+            pending, self._pending = self._pending, []
+            self._executor.submit(self._insert, pending).result()
+        self._executor.submit(self._conn.close).result()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,85 @@
+"""
+农历查找表模块 - 预先计算一段年份内每个阳历日期对应的农历月日
+"""
+from array import array
+from datetime import date
+from functools import lru_cache
+from typing import Tuple
+
+# 儒略日（正午）与 date.toordinal() 的差值
+_JULIAN_DAY_OFFSET = 1721425
+
+
+class LunarTable:
+    """
+    阳历日期到农历 (月, 日, 是否闰月) 的查找表
+
+    每个阳历日期占用两个字节：有符号的农历月份（闰月为负数，与 lunar_python 一致）
+    和农历日期。表按农历年的月份整体填充，只需要每个农历年计算一次，
+    之后的查询都是 O(1) 的数组读取。
+    """
+
+    def __init__(self, start_year: int, end_year: int):
+        if end_year < start_year:
+            raise ValueError(f"Invalid lunar table range: {start_year}-{end_year}")
+        self.start_year = start_year
+        self.end_year = end_year
+        self._first = date(start_year, 1, 1).toordinal()
+        size = date(end_year, 12, 31).toordinal() - self._first + 1
+        self._months = array('b', bytes(size))
+        self._days = array('B', bytes(size))
+        self._fill()
+
+    def _fill(self) -> None:
+        """按农历月份填充查找表，阳历年初属于上一个农历年"""
+        # lunar_python 导入较慢，只在建表时导入
+        from lunar_python import LunarYear
+
+        size = len(self._days)
+        for lunar_year in range(self.start_year - 1, self.end_year + 1):
+            for lunar_month in LunarYear.fromYear(lunar_year).getMonthsInYear():
+                month = lunar_month.getMonth()
+                offset = int(lunar_month.getFirstJulianDay()) - _JULIAN_DAY_OFFSET - self._first
+                for day in range(lunar_month.getDayCount()):
+                    pos = offset + day
+                    if 0 <= pos < size:
+                        self._months[pos] = month
+                        self._days[pos] = day + 1
+
+    def covers(self, day: date) -> bool:
+        """查找表是否包含该日期"""
+        return self.start_year <= day.year <= self.end_year
+
+    def month_day(self, day: date) -> Tuple[int, int]:
+        """
+        获取阳历日期对应的农历 (月, 日)
+
+        Args:
+            day: 阳历日期
+
+        Returns:
+            Tuple[int, int]: 农历月份（闰月为负数）和农历日期
+        """
+        pos = day.toordinal() - self._first
+        if not 0 <= pos < len(self._days):
+            raise ValueError(f"{day} is outside lunar table range {self.start_year}-{self.end_year}")
+        return self._months[pos], self._days[pos]
+
+    def lookup(self, day: date) -> Tuple[int, int, bool]:
+        """
+        获取阳历日期对应的农历月日
+
+        Args:
+            day: 阳历日期
+
+        Returns:
+            Tuple[int, int, bool]: 农历月份、农历日期和是否闰月
+        """
+        month, lunar_day = self.month_day(day)
+        return abs(month), lunar_day, month < 0
+
+
+@lru_cache(maxsize=8)
+def get_lunar_table(start_year: int, end_year: int) -> LunarTable:
+    """获取指定年份范围的农历查找表，同一范围只构建一次"""
+    return LunarTable(start_year, end_year)
@@ -1,8 +1,9 @@
 """
 通知发送器工厂 - 简单实用的对象创建
 """
-from typing import List
+from typing import Dict, List, Optional
 from src.core.config import Config
+from src.core.resilience import CircuitBreaker, RetryBudget
 from src.notification.notification_base import NotificationBase
 import logging
 
@@ -12,16 +13,36 @@ logger = logging.getLogger(__name__)
 class NotificationFactory:
     """通知发送器工厂 - 只做必要的对象创建"""
 
-    def __init__(self, templates_dir: str):
+    def __init__(self, templates_dir: str, retry_budget: Optional[RetryBudget] = None):
         self.templates_dir = templates_dir
+        # 新建的发送器共享的重试预算
+        self.retry_budget = retry_budget
 
-    def create_senders(self, config: Config) -> List[NotificationBase]:
-        """根据配置创建通知发送器列表"""
+    def create_senders(self, config: Config,
+                       reuse: Optional[Dict[str, NotificationBase]] = None) -> List[NotificationBase]:
+        """
+        根据配置创建通知发送器列表
+
+        Args:
+            config: 应用配置
+            reuse: 可以直接复用的发送器（通知类型 -> 发送器），这些类型不再新建
+
+        Returns:
+            List[NotificationBase]: 发送器列表
+        """
         senders = []
+        reuse = reuse or {}
 
         for notify_type in config.notification_types:
+            if notify_type in reuse:
+                senders.append(reuse[notify_type])
+                logger.info(f"Reusing {notify_type} sender")
+                continue
             sender = self._create_sender(notify_type, config)
             if sender:
+                # 每个发送器有自己的熔断器，所有发送器共享同一个重试预算
+                sender.circuit_breaker = CircuitBreaker.from_config(notify_type, config.circuit_breaker_config)
+                sender.retry_budget = self.retry_budget
                 senders.append(sender)
                 logger.info(f"Created {notify_type} sender")
 
@@ -36,7 +57,7 @@ class NotificationFactory:
 
             elif notify_type == "serverchan" and config.serverchan_config:
                 from src.notification.sender_serverchan import ServerChanSender
-                return ServerChanSender(config.serverchan_config.default_sckey)
+                return ServerChanSender(config.serverchan_config.default_sckey, config.serverchan_config)
 
             else:
                 logger.warning(f"Unknown notification type or missing config: {notify_type}")
@@ -0,0 +1,94 @@
+"""
+CPU 密集工作的执行器 - 生日检查和模板渲染移出事件循环，事件循环只处理网络 I/O
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+from src.core.config import ExecutorConfig
+
+T = TypeVar("T")
+
+# 推进生日检查的专用线程。检查器的索引缓存和检查生成器不是线程安全的，
+# 所有运行共用一个线程依次推进
+_CHECK_POOL: Optional[ThreadPoolExecutor] = None
+
+# (模式, 大小) -> 共享的渲染执行器，重新加载配置后继续使用已经启动的线程或进程
+_RENDER_POOLS: Dict[Tuple[str, int], Executor] = {}
+
+
+def get_check_pool() -> ThreadPoolExecutor:
+    """获取推进生日检查的专用线程"""
+    global _CHECK_POOL
+    if _CHECK_POOL is None:
+        _CHECK_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="birthday-check")
+    return _CHECK_POOL
+
+
+def get_render_pool(mode: str, workers: int) -> Executor:
+    """
+    获取指定模式和大小的共享渲染执行器
+
+    Args:
+        mode: thread 或 process
+        workers: 线程或进程数
+
+    Returns:
+        Executor: 线程池或进程池
+    """
+    pool = _RENDER_POOLS.get((mode, workers))
+    if pool is None:
+        if mode == "process":
+            pool = ProcessPoolExecutor(max_workers=workers)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="birthday-render")
+        _RENDER_POOLS[(mode, workers)] = pool
+    return pool
+
+
+def shutdown_executors() -> None:
+    """关闭检查线程和所有渲染执行器"""
+    global _CHECK_POOL
+    pools = list(_RENDER_POOLS.values())
+    _RENDER_POOLS.clear()
+    if _CHECK_POOL is not None:
+        pools.append(_CHECK_POOL)
+        _CHECK_POOL = None
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+async def run_check(config: ExecutorConfig, func: Callable[..., T], *args: Any) -> T:
+    """
+    执行一段生日检查
+
+    Args:
+        config: 执行配置，mode 为 inline 时直接在事件循环中执行
+        func: 检查函数
+        *args: 函数参数
+
+    Returns:
+        T: 函数的返回值
+    """
+    if config.mode == "inline":
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(get_check_pool(), func, *args)
+
+
+async def run_render(config: ExecutorConfig, func: Callable[..., T], *args: Any) -> T:
+    """
+    执行一次模板渲染
+
+    process 模式下函数和参数会被序列化到工作进程，发送器按配置序列化，不携带连接。
+
+    Args:
+        config: 执行配置，mode 为 inline 时直接在事件循环中执行
+        func: 渲染函数
+        *args: 函数参数
+
+    Returns:
+        T: 渲染结果
+    """
+    if config.mode == "inline":
+        return func(*args)
+    pool = get_render_pool(config.mode, config.workers)
+    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
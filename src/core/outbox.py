@@ -0,0 +1,220 @@
+"""
+发件箱模块 - 基于 SQLite 的持久化重试队列，首次发送失败的消息按退避时间在之后的批次或运行中重试
+"""
+import asyncio
+import json
+import random
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, NamedTuple, Optional, Set, Tuple
+from src.core.config import OutboxConfig
+from src.core.ledger import LedgerKey
+from src.notification.notification_base import Envelope
+
+
+class OutboxMessage(NamedTuple):
+    """发件箱中等待重试的一条消息"""
+
+    id: int
+    channel: str
+    envelope: Envelope
+    ledger_keys: Tuple[LedgerKey, ...]  # 投递成功后写入发送台账的标识
+    attempts: int  # 已经尝试的次数
+
+
+def backoff_delay(attempts: int, config: OutboxConfig, rand: Callable[[], float] = random.random) -> float:
+    """
+    第 attempts 次尝试失败后到下一次尝试的等待秒数
+
+    等待时间为 base_delay * 2^(attempts-1)，不超过 max_delay，再随机缩短至多 jitter 比例。
+
+    Args:
+        attempts: 已经尝试的次数，从 1 开始
+        config: 发件箱配置
+        rand: 返回 [0, 1) 随机数的函数
+
+    Returns:
+        float: 等待秒数
+    """
+    delay = min(config.max_delay, config.base_delay * 2 ** (attempts - 1))
+    return delay * (1 - config.jitter * rand())
+
+
+class Outbox:
+    """
+    SQLite 发件箱
+
+    与发送台账相同，所有数据库操作都在一个专用线程中执行，不阻塞事件循环。
+    每条消息保存渲染好的内容和下一次尝试的时间；超过最多尝试次数的消息标记为放弃，
+    保留在数据库中便于排查。
+    """
+
+    def __init__(self, config: OutboxConfig):
+        self.config = config
+        self.path = config.path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+        self._conn = self._executor.submit(self._connect).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                content TEXT NOT NULL,
+                ledger_keys TEXT NOT NULL DEFAULT '[]',
+                attempts INTEGER NOT NULL,
+                next_attempt REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)")
+        conn.commit()
+        return conn
+
+    async def _run(self, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def put(self, channel: str, envelope: Envelope, ledger_keys: Iterable[LedgerKey],
+                  error: str, now: Optional[float] = None, attempts: int = 1,
+                  delay: Optional[float] = None) -> bool:
+        """
+        保存一条首次发送失败的消息
+
+        Args:
+            channel: 通知通道
+            envelope: 渲染好的消息
+            ledger_keys: 投递成功后写入发送台账的标识，也用于识别仍在等待重试的提醒
+            error: 首次发送的错误
+            now: 当前 Unix 时间，默认为 time.time()
+            attempts: 已经实际尝试的次数；被熔断器拦下、没有真正发送时为 0
+            delay: 到下一次尝试的秒数，默认按 attempts 计算退避时间
+
+        Returns:
+            bool: 是否会重试；已经达到 max_attempts 时直接放弃
+        """
+        now = time.time() if now is None else now
+        retry = attempts < self.config.max_attempts
+        if delay is None:
+            delay = backoff_delay(attempts, self.config)
+        row = (
+            channel, *envelope, json.dumps([list(key) for key in ledger_keys], ensure_ascii=False),
+            attempts, now + delay, "pending" if retry else "dead", error,
+        )
+        await self._run(self._insert, row)
+        return retry
+
+    def _insert(self, row: Tuple) -> None:
+        self._conn.execute(
+            "INSERT INTO outbox (channel, destination, subject, content, ledger_keys, attempts, "
+            "next_attempt, status, last_error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            row,
+        )
+        self._conn.commit()
+
+    async def due(self, limit: int, now: Optional[float] = None) -> List[OutboxMessage]:
+        """
+        取出已经到达下一次尝试时间的消息，按到期时间排序
+
+        Args:
+            limit: 最多取出的条数
+            now: 当前 Unix 时间，默认为 time.time()
+
+        Returns:
+            List[OutboxMessage]: 到期的消息
+        """
+        now = time.time() if now is None else now
+        rows = await self._run(self._select_due, now, limit)
+        return [
+            OutboxMessage(row[0], row[1], Envelope(*row[2:5]),
+                          tuple(LedgerKey(*key) for key in json.loads(row[5])), row[6])
+            for row in rows
+        ]
+
+    def _select_due(self, now: float, limit: int) -> List[Tuple]:
+        return self._conn.execute(
+            "SELECT id, channel, destination, subject, content, ledger_keys, attempts FROM outbox "
+            "WHERE status = 'pending' AND next_attempt <= ? ORDER BY next_attempt, id LIMIT ?",
+            (now, limit),
+        ).fetchall()
+
+    async def succeeded(self, message: OutboxMessage) -> None:
+        """投递成功后删除消息"""
+        await self._run(self._delete, message.id)
+
+    def _delete(self, message_id: int) -> None:
+        self._conn.execute("DELETE FROM outbox WHERE id = ?", (message_id,))
+        self._conn.commit()
+
+    async def failed(self, message: OutboxMessage, error: str, now: Optional[float] = None) -> bool:
+        """
+        记录一次失败的重试
+
+        Args:
+            message: 重试失败的消息
+            error: 错误信息
+            now: 当前 Unix 时间，默认为 time.time()
+
+        Returns:
+            bool: 是否还会重试；达到 max_attempts 时标记为放弃并返回 False
+        """
+        now = time.time() if now is None else now
+        attempts = message.attempts + 1
+        retry = attempts < self.config.max_attempts
+        await self._run(
+            self._update, message.id, attempts, now + backoff_delay(attempts, self.config),
+            "pending" if retry else "dead", error,
+        )
+        return retry
+
+    def _update(self, message_id: int, attempts: int, next_attempt: float, status: str, error: str) -> None:
+        self._conn.execute(
+            "UPDATE outbox SET attempts = ?, next_attempt = ?, status = ?, last_error = ? WHERE id = ?",
+            (attempts, next_attempt, status, error, message_id),
+        )
+        self._conn.commit()
+
+    async def postpone(self, message: OutboxMessage, delay: float, now: Optional[float] = None) -> None:
+        """推迟一条没有实际尝试的消息（例如熔断器打开），不计入尝试次数"""
+        now = time.time() if now is None else now
+        await self._run(self._postpone, message.id, now + delay)
+
+    def _postpone(self, message_id: int, next_attempt: float) -> None:
+        self._conn.execute("UPDATE outbox SET next_attempt = ? WHERE id = ?", (next_attempt, message_id))
+        self._conn.commit()
+
+    async def pending_keys(self) -> Set[LedgerKey]:
+        """仍在等待重试的消息对应的台账标识，重新运行时不再重复发送这些提醒"""
+        rows = await self._run(self._select_pending_keys)
+        return {LedgerKey(*key) for (keys,) in rows for key in json.loads(keys)}
+
+    def _select_pending_keys(self) -> List[Tuple[str]]:
+        return self._conn.execute("SELECT ledger_keys FROM outbox WHERE status = 'pending'").fetchall()
+
+    async def next_due(self) -> Optional[float]:
+        """等待重试的消息中最早的下一次尝试时间（Unix 时间），没有等待重试的消息时为 None"""
+        return await self._run(self._select_next_due)
+
+    def _select_next_due(self) -> Optional[float]:
+        return self._conn.execute("SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    async def pending_count(self) -> int:
+        """等待重试的消息数"""
+        return await self._run(self._count_pending)
+
+    def _count_pending(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def close(self) -> None:
+        """关闭数据库"""
+        self._executor.submit(self._conn.close).result()
+        self._executor.shutdown(wait=True)
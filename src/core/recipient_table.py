@@ -0,0 +1,168 @@
+"""
+列式收件人表 - 用数组按列保存大量收件人，按需生成 Recipient 视图
+"""
+import sys
+from array import array
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from src.core.config import Recipient, parse_date_parts
+
+# 建立索引所需的收件人数据: (reminder_days, 阳历生日, 农历生日)
+Row = Tuple[int, Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]]]
+
+
+def _pack(ymd: Optional[Tuple[int, int, int]]) -> int:
+    """把年月日压缩为 YYYYMMDD 整数，没有日期时为 0"""
+    if ymd is None:
+        return 0
+    year, month, day = ymd
+    return year * 10000 + month * 100 + day
+
+
+def _unpack(value: int) -> Optional[Tuple[int, int, int]]:
+    """_pack 的逆运算"""
+    if not value:
+        return None
+    return value // 10000, value // 100 % 100, value % 100
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """驻留字符串，默认邮箱和模板等重复值只保存一份"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class RecipientTable(Sequence[Recipient]):
+    """
+    列式收件人表
+
+    每个收件人只占用几列数组中的一个位置：生日解析后压缩为 YYYYMMDD 整数，
+    姓名、邮箱和模板文件名驻留后共享。表实现 Sequence[Recipient]，
+    按下标访问时才构造 Recipient 视图，检查器直接从数组建立索引，
+    只为命中的收件人构造视图。
+
+    视图中的生日为 YYYY-MM-DD 字符串；修改视图不会影响表中的数据。
+    """
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.emails: List[Optional[str]] = []
+        self.template_files: List[Optional[str]] = []
+        self.reminder_days = array("i")  # -1 表示未设置
+        self.solar = array("i")  # YYYYMMDD，0 表示没有阳历生日
+        self.lunar = array("i")  # YYYYMMDD，0 表示没有农历生日
+
+    @classmethod
+    def from_recipients(cls, recipients: Iterable[Recipient]) -> "RecipientTable":
+        """从已有的收件人对象建立表"""
+        table = cls()
+        for r in recipients:
+            table._append(r.name, r.email, r.solar_ymd, r.lunar_ymd, r.reminder_days, r.template_file)
+        return table
+
+    def add(self, name: str, email: Optional[str] = None,
+            solar_birthday: Optional[Any] = None, lunar_birthday: Optional[Any] = None,
+            reminder_days: Optional[int] = None, template_file: Optional[str] = None) -> None:
+        """
+        添加一个收件人，参数和校验规则与 Recipient 相同
+
+        Args:
+            name: 收件人姓名
+            email: 收件人邮箱
+            solar_birthday: 阳历生日，YYYY-MM-DD 字符串或日期对象
+            lunar_birthday: 农历生日，YYYY-MM-DD 字符串或日期对象
+            reminder_days: 提前提醒天数
+            template_file: 邮件模板文件名
+        """
+        if not solar_birthday and not lunar_birthday:
+            raise ValueError(
+                "At least one of solar_birthday or lunar_birthday must be provided"
+            )
+        solar = parse_date_parts(solar_birthday, "solar_birthday") if solar_birthday else None
+        lunar = parse_date_parts(lunar_birthday, "lunar_birthday") if lunar_birthday else None
+        self._append(name, email, solar, lunar, reminder_days, template_file)
+
+    def _append(self, name: str, email: Optional[str],
+                solar: Optional[Tuple[int, int, int]], lunar: Optional[Tuple[int, int, int]],
+                reminder_days: Optional[int], template_file: Optional[str]) -> None:
+        self.names.append(_intern(name))
+        self.emails.append(_intern(email))
+        self.template_files.append(_intern(template_file))
+        self.reminder_days.append(-1 if reminder_days is None else reminder_days)
+        self.solar.append(_pack(solar))
+        self.lunar.append(_pack(lunar))
+
+    def rows(self) -> Iterator[Row]:
+        """逐个返回建立索引所需的数据，不构造 Recipient"""
+        for reminder_days, solar, lunar in zip(self.reminder_days, self.solar, self.lunar):
+            yield max(reminder_days, 0), _unpack(solar), _unpack(lunar)
+
+    def take(self, positions: Iterable[int]) -> "RecipientTable":
+        """按位置取出部分收件人组成新表"""
+        table = RecipientTable()
+        for i in positions:
+            table.names.append(self.names[i])
+            table.emails.append(self.emails[i])
+            table.template_files.append(self.template_files[i])
+            table.reminder_days.append(self.reminder_days[i])
+            table.solar.append(self.solar[i])
+            table.lunar.append(self.lunar[i])
+        return table
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Recipient, "RecipientTable"]:
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RecipientTable index out of range")
+        return self._view(index)
+
+    def _view(self, i: int) -> Recipient:
+        """构造第 i 个收件人的视图，数据已经校验过，跳过 __post_init__"""
+        solar = _unpack(self.solar[i])
+        lunar = _unpack(self.lunar[i])
+        reminder_days = self.reminder_days[i]
+        recipient = Recipient.__new__(Recipient)
+        recipient.__dict__.update(
+            name=self.names[i],
+            email=self.emails[i],
+            solar_birthday=solar and "%04d-%02d-%02d" % solar,
+            lunar_birthday=lunar and "%04d-%02d-%02d" % lunar,
+            reminder_days=None if reminder_days < 0 else reminder_days,
+            template_file=self.template_files[i],
+            solar_ymd=solar,
+            lunar_ymd=lunar,
+        )
+        return recipient
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RecipientTable):
+            return NotImplemented
+        return (self.names == other.names and self.emails == other.emails
+                and self.template_files == other.template_files
+                and self.reminder_days == other.reminder_days
+                and self.solar == other.solar and self.lunar == other.lunar)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"<RecipientTable of {len(self)} recipients>"
+
+
+def recipient_rows(recipients: Sequence[Recipient]) -> Iterable[Row]:
+    """
+    取出建立索引所需的数据
+
+    列式表直接读数组，普通列表读取收件人对象上已解析的生日。
+
+    Args:
+        recipients: 收件人列表或列式表
+
+    Returns:
+        Iterable[Row]: 按收件人顺序排列的 (reminder_days, 阳历生日, 农历生日)
+    """
+    if isinstance(recipients, RecipientTable):
+        return recipients.rows()
+    return ((r.reminder_days or 0, r.solar_ymd, r.lunar_ymd) for r in recipients)
@@ -0,0 +1,169 @@
+"""
+发送容错模块 - 每个发送器的熔断器和一次运行内所有发送器共享的重试预算
+"""
+import logging
+import time
+from functools import wraps
+from typing import Callable, Optional
+from src.core.config import CircuitBreakerConfig, RetryBudgetConfig
+from src.core.metrics import CIRCUIT_OPEN
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时的快速失败"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"circuit for {name} is open, retry after {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    发送器的熔断器
+
+    - closed: 正常发送，连续失败 failure_threshold 次后打开
+    - open: 所有发送立即失败，reset_timeout 秒后进入 half_open
+    - half_open: 只放行一次试探发送，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @classmethod
+    def from_config(cls, name: str, config: CircuitBreakerConfig) -> Optional["CircuitBreaker"]:
+        """按配置创建熔断器，failure_threshold 为 0 时不启用"""
+        if config.failure_threshold <= 0:
+            return None
+        return cls(name, config.failure_threshold, config.reset_timeout)
+
+    @property
+    def state(self) -> str:
+        """当前状态，打开超过 reset_timeout 秒后为 half_open"""
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self) -> None:
+        """
+        发送前检查是否放行
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或半开状态下已经有试探发送在进行
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            logger.info(f"Circuit for {self.name} half-open, probing")
+            return
+        retry_after = max(0.0, self._opened_at + self.reset_timeout - self._clock())
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        """发送成功，关闭熔断器"""
+        if self._opened_at is not None:
+            logger.info(f"Circuit for {self.name} closed")
+            CIRCUIT_OPEN.set(0, channel=self.name)
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """发送失败，连续失败达到阈值或试探失败时打开熔断器"""
+        self._failures += 1
+        if self._probing or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning(f"Circuit for {self.name} opened after {self._failures} consecutive failures")
+            self._opened_at = self._clock()
+            CIRCUIT_OPEN.set(1, channel=self.name)
+        self._probing = False
+
+    def release(self) -> None:
+        """发送被取消时释放试探名额，不计入成功或失败"""
+        self._probing = False
+
+
+def circuit_protected(func):
+    """发送方法装饰器：经过发送器的熔断器执行，熔断器打开时立即失败"""
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        breaker = getattr(self, "circuit_breaker", None)
+        if breaker is None:
+            return await func(self, *args, **kwargs)
+        breaker.before_call()
+        try:
+            result = await func(self, *args, **kwargs)
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return result
+
+    return wrapper
+
+
+class RetryBudget:
+    """
+    所有发送器共享的重试预算
+
+    一次运行内允许的重试次数为 min_retries + ratio × 首次发送次数，用完后失败的发送不再重试，
+    大面积故障时整个运行可以尽快结束，而不是每条提醒都各自重试。
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._attempts = 0
+        self._retries = 0
+
+    def configure(self, config: RetryBudgetConfig) -> None:
+        """按配置更新预算，已经记录的次数保留"""
+        self.ratio = config.ratio
+        self.min_retries = config.min_retries
+
+    def reset(self) -> None:
+        """开始新的一次运行"""
+        self._attempts = 0
+        self._retries = 0
+
+    @property
+    def remaining(self) -> int:
+        """剩余可以重试的次数"""
+        return max(0, int(self.min_retries + self.ratio * self._attempts) - self._retries)
+
+    def record_attempt(self) -> None:
+        """记录一次首次发送"""
+        self._attempts += 1
+
+    def try_acquire(self) -> bool:
+        """
+        申请一次重试
+
+        Returns:
+            bool: 预算是否允许重试
+        """
+        if self.remaining <= 0:
+            return False
+        self._retries += 1
+        return True
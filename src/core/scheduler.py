@@ -0,0 +1,88 @@
+"""
+每日定时调度模块 - 常驻进程内按本地时间触发生日检查
+"""
+import asyncio
+import logging
+from datetime import datetime, time, timedelta
+from typing import Awaitable, Callable, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# 单次等待的最长秒数，避免系统休眠或调整时钟后错过触发时间
+MAX_SLEEP_SECONDS = 60
+
+
+def parse_times(values: Iterable[str]) -> List[time]:
+    """
+    解析 HH:MM 格式的触发时间
+
+    Args:
+        values: 时间字符串列表
+
+    Returns:
+        List[time]: 去重并排序后的时间列表
+    """
+    times = set()
+    for value in values:
+        try:
+            times.add(datetime.strptime(str(value).strip(), "%H:%M").time())
+        except ValueError as e:
+            raise ValueError(f"Invalid schedule time {value!r}, expected HH:MM") from e
+    if not times:
+        raise ValueError("At least one schedule time must be provided")
+    return sorted(times)
+
+
+def next_run_time(now: datetime, times: List[time]) -> datetime:
+    """
+    计算下一次触发时间
+
+    Args:
+        now: 当前本地时间
+        times: 每天的触发时间
+
+    Returns:
+        datetime: 晚于 now 的最近一次触发时间
+    """
+    for day_offset in (0, 1):
+        day = now.date() + timedelta(days=day_offset)
+        for at in times:
+            candidate = datetime.combine(day, at)
+            if candidate > now:
+                return candidate
+    raise ValueError("No schedule times configured")
+
+
+class DailyScheduler:
+    """按每天固定的本地时间执行任务，直到收到停止信号"""
+
+    def __init__(self, times: List[time]):
+        self.times = times
+
+    async def run(self, job: Callable[[], Awaitable[None]], stop: asyncio.Event) -> None:
+        """
+        循环等待触发时间并执行任务
+
+        Args:
+            job: 要执行的协程函数，异常会被记录，不会终止调度
+            stop: 停止事件，设置后在当前等待或任务结束后退出
+        """
+        target = next_run_time(datetime.now(), self.times)
+        logger.info(f"Next birthday check scheduled at {target:%Y-%m-%d %H:%M}")
+
+        while not stop.is_set():
+            delay = (target - datetime.now()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=min(delay, MAX_SLEEP_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"Scheduled run failed: {type(e).__name__}: {e}")
+
+            target = next_run_time(max(datetime.now(), target), self.times)
+            logger.info(f"Next birthday check scheduled at {target:%Y-%m-%d %H:%M}")
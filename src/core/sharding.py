@@ -0,0 +1,76 @@
+"""
+收件人分片 - 按姓名和邮箱的稳定哈希把收件人分给多个节点
+"""
+import hashlib
+from typing import Iterable, List, NamedTuple, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 未指定 --shard 时读取的环境变量，便于在容器编排中为每个节点设置
+SHARD_ENV = "BIRTHDAYRS_SHARD"
+
+
+def shard_of(name: str, email: Optional[str], count: int) -> int:
+    """
+    计算收件人所属的分片
+
+    使用 blake2b 而不是内置 hash()，结果与进程、平台和 PYTHONHASHSEED 无关。
+
+    Args:
+        name: 收件人姓名
+        email: 收件人邮箱（应用默认值之后的值），可以为空
+        count: 分片总数
+
+    Returns:
+        int: 分片序号，范围 [0, count)
+    """
+    key = f"{name}\0{email or ''}".encode("utf-8")
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+class ShardSpec(NamedTuple):
+    """分片说明：共 count 个分片中的第 index 个（从 0 开始）"""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, value: str) -> "ShardSpec":
+        """
+        解析 i/N 格式的分片说明
+
+        Args:
+            value: 例如 0/4 表示 4 个分片中的第一个
+
+        Returns:
+            ShardSpec: 分片说明
+        """
+        try:
+            index, count = (int(part) for part in str(value).split("/"))
+        except ValueError as e:
+            raise ValueError(f"Invalid shard {value!r}, expected i/N such as 0/4") from e
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {value!r}, index must be in [0, {max(count, 1)})")
+        return cls(index, count)
+
+    def owns(self, name: str, email: Optional[str]) -> bool:
+        """收件人是否属于这个分片"""
+        return self.count == 1 or shard_of(name, email, self.count) == self.index
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def filter_recipients(recipients: Iterable[T], shard: ShardSpec) -> List[T]:
+    """
+    只保留属于分片的收件人，保持原有顺序
+
+    Args:
+        recipients: 带 name 和 email 属性的收件人
+        shard: 分片说明
+
+    Returns:
+        List[T]: 属于该分片的收件人
+    """
+    return [r for r in recipients if shard.owns(r.name, r.email)]
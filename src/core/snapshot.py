@@ -0,0 +1,89 @@
+"""
+运行快照模块 - 一次运行使用的配置和组件，重新加载时整体替换
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+from src.core.config import Config
+from src.core.dispatcher import Dispatcher
+from src.notification.notification_base import NotificationBase
+
+if TYPE_CHECKING:
+    from src.core.checker import BirthdayChecker
+    from src.core.ledger import SendLedger
+    from src.core.outbox import Outbox
+
+
+@dataclass(frozen=True)
+class RuntimeSnapshot:
+    """
+    不可变的运行快照
+
+    快照发布后不再修改。重新加载配置时在后台构建新快照，再一次性替换当前快照；
+    进行中的运行继续使用它开始时取得的快照，包括其中的发送台账和发件箱。
+    """
+
+    version: int
+    config: Config
+    checker: "BirthdayChecker"
+    senders: Tuple[NotificationBase, ...]
+    dispatcher: Dispatcher
+    ledger: Optional["SendLedger"] = None
+    outbox: Optional["Outbox"] = None
+
+
+def sender_settings(notify_type: str, config: Config) -> Any:
+    """发送器依赖的配置段，配置段不变时发送器可以复用"""
+    if notify_type == "email":
+        return config.smtp_config
+    if notify_type == "serverchan":
+        return config.serverchan_config
+    return None
+
+
+def reusable_senders(previous: RuntimeSnapshot, config: Config) -> Dict[str, NotificationBase]:
+    """
+    找出新配置下可以原样复用的发送器，熔断器配置变化时全部重建
+
+    Args:
+        previous: 当前快照
+        config: 新配置
+
+    Returns:
+        Dict[str, NotificationBase]: 通知类型 -> 可复用的发送器
+    """
+    reuse = {}
+    if config.circuit_breaker_config != previous.config.circuit_breaker_config:
+        return reuse
+    for sender in previous.senders:
+        channel = sender.channel
+        if not isinstance(channel, str) or channel not in config.notification_types:
+            continue
+        settings = sender_settings(channel, config)
+        if settings is not None and settings == sender_settings(channel, previous.config):
+            reuse[channel] = sender
+    return reuse
+
+
+def dispatcher_settings(config: Config) -> Tuple:
+    """决定发送调度器行为的配置"""
+    return (
+        config.dispatch_config,
+        sender_settings("email", config),
+        sender_settings("serverchan", config),
+    )
+
+
+def retired_senders(previous: RuntimeSnapshot, current: RuntimeSnapshot) -> List[NotificationBase]:
+    """旧快照中没有被新快照复用的发送器"""
+    kept = {id(sender) for sender in current.senders}
+    return [sender for sender in previous.senders if id(sender) not in kept]
+
+
+def retired_stores(previous: RuntimeSnapshot, current: RuntimeSnapshot) -> List[Union["SendLedger", "Outbox"]]:
+    """旧快照中没有被新快照沿用的发送台账和发件箱"""
+    stores = []
+    if previous.ledger is not None and previous.ledger is not current.ledger:
+        stores.append(previous.ledger)
+    if previous.outbox is not None and previous.outbox is not current.outbox:
+        stores.append(previous.outbox)
+    return stores
@@ -0,0 +1,185 @@
+"""
+向量化生日检查模块 - 基于 NumPy 的批量生日检查（可选依赖）
+"""
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from src.core.birthday_index import BirthdayMatch, Occurrence
+from src.core.checker import BirthdayChecker
+from src.core.config import CheckerConfig, Recipient
+from src.core.recipient_table import recipient_rows
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 取决于运行环境
+    np = None
+
+logger = logging.getLogger(__name__)
+
+NUMPY_AVAILABLE = np is not None
+
+# 月日编码: month * 32 + day，0 表示没有该生日
+_KEY_SIZE = 13 * 32
+# 不在提醒窗口内的距离天数
+_NO_MATCH = 2 ** 30
+
+
+class RecipientArrays:
+    """
+    以整数数组保存的收件人生日
+
+    与 BirthdayIndex 提供相同的 match 和 between 接口，但对整个收件人集合做数组运算：
+    先把提醒窗口内每个月日首次出现的偏移量写入一张小表，
+    再用一次 gather 得到每个收件人距离生日的天数。
+    日期范围查询使用建立时按月日编码排好序的收件人编号，每天只需二分查找一段连续的编号。
+    """
+
+    def __init__(self, recipients: Sequence[Recipient]):
+        size = len(recipients)
+        self.size = size
+        self.solar_key = np.zeros(size, dtype=np.int16)
+        self.solar_year = np.zeros(size, dtype=np.int32)
+        self.lunar_key = np.zeros(size, dtype=np.int16)
+        self.lunar_year = np.zeros(size, dtype=np.int32)
+        self.reminder_days = np.zeros(size, dtype=np.int32)
+
+        for rid, (reminder_days, solar, lunar) in enumerate(recipient_rows(recipients)):
+            if solar:
+                year, month, day = solar
+                self.solar_key[rid] = month * 32 + day
+                self.solar_year[rid] = year
+            if lunar:
+                year, month, day = lunar
+                self.lunar_key[rid] = month * 32 + day
+                self.lunar_year[rid] = year
+            self.reminder_days[rid] = reminder_days
+
+        self.has_lunar = bool(self.lunar_key.any())
+        # 稳定排序保证同一月日的收件人编号保持升序
+        self._solar_order = np.argsort(self.solar_key, kind="stable").astype(np.int32)
+        self._solar_sorted = self.solar_key[self._solar_order]
+        self._lunar_order = np.argsort(self.lunar_key, kind="stable").astype(np.int32)
+        self._lunar_sorted = self.lunar_key[self._lunar_order]
+
+    @property
+    def max_reminder_days(self) -> int:
+        """所有收件人中最大的提前提醒天数"""
+        return int(self.reminder_days.max()) if self.size else 0
+
+    def match(self, today: date,
+              lunar_month_day: Callable[[date], Tuple[int, int]]) -> Dict[int, BirthdayMatch]:
+        """
+        查找提醒窗口内过生日的收件人
+
+        Args:
+            today: 当前日期
+            lunar_month_day: 把阳历日期转换为农历 (月, 日) 的函数，闰月以负数月份表示
+
+        Returns:
+            Dict[int, BirthdayMatch]: 收件人编号到匹配结果的映射，按编号升序
+        """
+        window = [today + timedelta(days=i) for i in range(self.max_reminder_days + 1)]
+        years = np.array([d.year for d in window], dtype=np.int32)
+
+        solar_days = self._first_offsets([(d.month, d.day) for d in window])[self.solar_key]
+        solar_hit = solar_days <= self.reminder_days
+        if self.has_lunar:
+            lunar_days = self._first_offsets([lunar_month_day(d) for d in window])[self.lunar_key]
+            lunar_hit = lunar_days <= self.reminder_days
+        else:
+            lunar_days = solar_days
+            lunar_hit = np.zeros(self.size, dtype=bool)
+
+        rids = np.flatnonzero(solar_hit | lunar_hit)
+        # 同时命中时以农历结果为准
+        use_lunar = lunar_hit[rids]
+        days_until = np.where(use_lunar, lunar_days[rids], solar_days[rids])
+        birth_year = np.where(use_lunar, self.lunar_year[rids], self.solar_year[rids])
+        ages = years[days_until] - birth_year
+
+        return {
+            int(rid): BirthdayMatch(bool(solar), bool(lunar), int(days), int(age))
+            for rid, solar, lunar, days, age in zip(
+                rids, solar_hit[rids], use_lunar, days_until, ages)
+        }
+
+    def between(self, start: date, end: date,
+                lunar_month_day: Callable[[date], Tuple[int, int]]) -> List[Occurrence]:
+        """
+        查找日期范围内（包含首尾两天）过生日的收件人，不考虑提前提醒天数
+
+        Args:
+            start: 起始日期
+            end: 结束日期
+            lunar_month_day: 把阳历日期转换为农历 (月, 日) 的函数，闰月以负数月份表示
+
+        Returns:
+            List[Occurrence]: 按日期和收件人编号排序；同一天阳历和农历都命中时合并为一条
+        """
+        occurrences = []
+        no_match = np.zeros(0, dtype=np.int32)
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            solar = self._rids_with(self._solar_order, self._solar_sorted, day.month * 32 + day.day)
+            lunar = no_match
+            if self.has_lunar:
+                month, lunar_day = lunar_month_day(day)
+                if month > 0:
+                    lunar = self._rids_with(self._lunar_order, self._lunar_sorted, month * 32 + lunar_day)
+            rids = np.union1d(solar, lunar)
+            solar_hit = np.isin(rids, solar, assume_unique=True)
+            # 同时命中时以农历结果为准
+            use_lunar = np.isin(rids, lunar, assume_unique=True)
+            ages = day.year - np.where(use_lunar, self.lunar_year[rids], self.solar_year[rids])
+            occurrences.extend(
+                Occurrence(day, rid, solar, lunar, age)
+                for rid, solar, lunar, age in zip(
+                    rids.tolist(), solar_hit.tolist(), use_lunar.tolist(), ages.tolist())
+            )
+        return occurrences
+
+    @staticmethod
+    def _rids_with(order: "np.ndarray", sorted_keys: "np.ndarray", key: int) -> "np.ndarray":
+        """月日编码为 key 的收件人编号，按编号升序"""
+        return order[sorted_keys.searchsorted(key, "left"):sorted_keys.searchsorted(key, "right")]
+
+    @staticmethod
+    def _first_offsets(keys: List[Tuple[int, int]]) -> "np.ndarray":
+        """月日编码到窗口内首次出现偏移量的映射，闰月不参与匹配"""
+        offsets = np.full(_KEY_SIZE, _NO_MATCH, dtype=np.int32)
+        for days_until in range(len(keys) - 1, -1, -1):
+            month, day = keys[days_until]
+            if month > 0:
+                offsets[month * 32 + day] = days_until
+        return offsets
+
+
+class VectorizedBirthdayChecker(BirthdayChecker):
+    """基于 NumPy 数组的生日检查器，结果与 BirthdayChecker 一致"""
+
+    def __init__(self, checker_config: Optional[CheckerConfig] = None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for the vectorized birthday checker")
+        super().__init__(checker_config)
+
+    def build_index(self, recipients: Sequence[Recipient]) -> RecipientArrays:
+        """把收件人生日转换为整数数组"""
+        return RecipientArrays(recipients)
+
+
+def create_checker(checker_config: Optional[CheckerConfig] = None) -> BirthdayChecker:
+    """
+    根据配置创建生日检查器，NumPy 不可用时回退到纯 Python 实现
+
+    Args:
+        checker_config: 生日检查配置
+
+    Returns:
+        BirthdayChecker: 生日检查器
+    """
+    checker_config = checker_config or CheckerConfig()
+    if checker_config.engine == "numpy":
+        if NUMPY_AVAILABLE:
+            return VectorizedBirthdayChecker(checker_config)
+        logger.warning("numpy is not installed, falling back to the pure Python checker")
+    return BirthdayChecker(checker_config)
@@ -3,98 +3,560 @@
 """
 
 import asyncio
+import json
 import logging
+import os
+import signal
 import sys
-from typing import List, Tuple, Dict
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+from functools import partial
+from datetime import date, timedelta
+from itertools import islice
+from typing import (
+    TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple,
+    Union,
+)
 import click
 
+from src.core.config import CHECKER_ENGINES, Config
 from src.core.config_manager import ConfigManager
+from src.core.dispatcher import Dispatcher
+from src.core import metrics
+from src.core.offload import run_check, run_render, shutdown_executors
+from src.core.scheduler import DailyScheduler, parse_times
+from src.core.sharding import SHARD_ENV, ShardSpec
 from src.core.notification_factory import NotificationFactory
-from src.core.checker import BirthdayChecker, Recipient
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("birthday_reminder.log"),
-    ],
+from src.core.checker import BirthdayChecker, CheckResults
+from src.core.resilience import CircuitOpenError, RetryBudget
+from src.core.config import Recipient
+from src.core.snapshot import (
+    RuntimeSnapshot, dispatcher_settings, retired_senders, retired_stores, reusable_senders,
 )
+from src.notification.notification_base import Envelope, NotificationBase
+
+if TYPE_CHECKING:
+    from src.core.ledger import LedgerKey, SendLedger
+    from src.core.outbox import Outbox, OutboxMessage
+
 logger = logging.getLogger(__name__)
 
+LOG_FILE = "birthday_reminder.log"
+
+
+def setup_logging(log_file: Optional[str] = LOG_FILE, level: int = logging.INFO) -> None:
+    """
+    配置日志输出到标准输出和日志文件
+
+    日志文件在第一条日志写入时才创建，不输出日志的命令不会打开文件。
+
+    Args:
+        log_file: 日志文件路径，为空时只输出到标准输出
+        level: 日志级别
+    """
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8", delay=True))
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=handlers,
+    )
+
+
+def _take(matches: Iterator[Tuple[Recipient, Dict]], size: int) -> List[Tuple[Recipient, Dict]]:
+    """从检查结果中取出至多 size 个命中"""
+    return list(islice(matches, size))
+
 
 class BirthdayReminder:
-    def __init__(self, config_path: str = None):
-        # 初始化配置管理器
-        self.config_manager = ConfigManager(config_path)
+    def __init__(self, config_path: str = None, engine: Optional[str] = None,
+                 shard: Optional[ShardSpec] = None):
+        # 初始化配置管理器，指定分片时只加载属于本节点的收件人
+        self.shard = shard
+        self.config_manager = ConfigManager(config_path, shard=shard)
 
         # 验证配置
         if not self.config_manager.validate_config():
             raise ValueError("Invalid configuration")
 
-        # 获取配置
-        self.config = self.config_manager.config
-
         # 初始化组件
+        self._engine = engine
+        self._snapshot: Optional[RuntimeSnapshot] = None
+        # 快照版本 -> 正在使用它的运行数
+        self._snapshots_in_use: Dict[int, int] = {}
+        # (旧快照版本, 不再使用的发送器/发送台账和发件箱)，旧快照没有进行中的运行后关闭
+        self._retired_senders: List[Tuple[int, NotificationBase]] = []
+        self._retired_stores: List[Tuple[int, Union["SendLedger", "Outbox"]]] = []
+        self._reload_lock: Optional[asyncio.Lock] = None
+        # 所有发送器共享的重试预算，每次运行开始时重置；不在运行中时每轮定期投递发件箱也重置
+        self.retry_budget = RetryBudget()
+        # 进行中的运行数
+        self._active_runs = 0
+        self._drain_lock: Optional[asyncio.Lock] = None
+        self._run_date: Optional[date] = None
+        self._already_sent: Set["LedgerKey"] = set()
         self._initialize_components()
 
+    @property
+    def config(self) -> Config:
+        """当前快照的配置"""
+        return self._snapshot.config
+
+    @property
+    def birthday_checker(self) -> BirthdayChecker:
+        """当前快照的生日检查器"""
+        return self._snapshot.checker
+
+    @property
+    def notification_senders(self) -> List[NotificationBase]:
+        """当前快照的通知发送器"""
+        return list(self._snapshot.senders)
+
+    @property
+    def dispatcher(self) -> Dispatcher:
+        """当前快照的发送调度器"""
+        return self._snapshot.dispatcher
+
+    @property
+    def ledger(self) -> Optional["SendLedger"]:
+        """当前快照的发送台账，未启用时为 None"""
+        return self._snapshot.ledger
+
+    @property
+    def outbox(self) -> Optional["Outbox"]:
+        """当前快照的发件箱，未启用时为 None"""
+        return self._snapshot.outbox
+
     def _initialize_components(self):
         """初始化组件 - 简单直接"""
         try:
-            # 创建生日检查器
-            self.birthday_checker = BirthdayChecker()
-
-            # 创建通知发送器
-            notification_factory = NotificationFactory(self.config_manager.get_templates_dir())
-            self.notification_senders = notification_factory.create_senders(self.config)
-
+            self._publish(self._build_snapshot(self.config_manager.config, None))
             logger.info("Components initialized successfully")
 
         except Exception as e:
             logger.error(f"Failed to initialize components: {e}")
             raise
 
-    async def send_birthday_reminder(self, recipient: Recipient, extra_info: Dict) -> None:
-        """发送生日提醒"""
+    def _build_snapshot(self, config: Config, previous: Optional[RuntimeSnapshot]) -> RuntimeSnapshot:
+        """
+        根据配置构建新快照，只重建发生变化的部分
+
+        不修改当前快照和传入的配置，可以在后台线程中执行。
+
+        Args:
+            config: 新配置
+            previous: 当前快照，首次初始化时为空
+
+        Returns:
+            RuntimeSnapshot: 尚未发布的新快照
+        """
+        # 命令行指定的检查引擎覆盖配置文件
+        checker_config = config.checker_config
+        if self._engine:
+            checker_config = replace(checker_config, engine=self._engine)
+
+        # 收件人没有变化时沿用原列表，检查器的索引缓存可以继续命中
+        recipients = config.recipients
+        if previous is not None and recipients == previous.config.recipients:
+            recipients = previous.config.recipients
+
+        if checker_config is not config.checker_config or recipients is not config.recipients:
+            config = replace(config, checker_config=checker_config, recipients=recipients)
+
+        # 创建生日检查器；收件人变化时用新检查器在后台建好索引，不影响进行中的运行
+        if (previous is not None and config.checker_config == previous.config.checker_config
+                and config.recipients is previous.config.recipients):
+            checker = previous.checker
+        else:
+            checker = self._create_checker(config)
+            if previous is not None:
+                checker.get_index(config.recipients)
+
+        # 预编译邮件模板，尽早暴露模板错误
+        self._precompile_templates(config)
+
+        # 创建通知发送器，配置段没有变化的发送器连同连接池一起复用
+        notification_factory = NotificationFactory(self.config_manager.get_templates_dir(), self.retry_budget)
+        reuse = reusable_senders(previous, config) if previous is not None else None
+        senders = notification_factory.create_senders(config, reuse)
+
+        # 创建发送调度器
+        if previous is not None and dispatcher_settings(config) == dispatcher_settings(previous.config):
+            dispatcher = previous.dispatcher
+        else:
+            dispatcher = Dispatcher.from_config(config)
+
+        # 打开发送台账和发件箱，路径没有变化时沿用；放在最后，前面出错时不会留下打开的数据库
+        ledger = self._open_ledger(config, previous)
+        outbox = self._open_outbox(config, previous)
+
+        version = previous.version + 1 if previous is not None else 0
+        return RuntimeSnapshot(version, config, checker, tuple(senders), dispatcher, ledger, outbox)
+
+    def _publish(self, snapshot: RuntimeSnapshot) -> None:
+        """一次性替换当前快照，旧快照中不再使用的发送器、发送台账和发件箱等到旧快照空闲后关闭"""
+        previous, self._snapshot = self._snapshot, snapshot
+        self.config_manager._config = snapshot.config
+        self.retry_budget.configure(snapshot.config.retry_budget_config)
+        if snapshot.outbox is not None:
+            # 沿用的发件箱立即使用新的重试设置
+            snapshot.outbox.config = snapshot.config.outbox_config
+        if previous is not None:
+            self._retired_senders.extend(
+                (previous.version, sender) for sender in retired_senders(previous, snapshot)
+            )
+            self._retired_stores.extend(
+                (previous.version, store) for store in retired_stores(previous, snapshot)
+            )
+
+    @contextmanager
+    def _use_snapshot(self) -> Iterator[RuntimeSnapshot]:
+        """取得当前快照，并在使用期间阻止关闭它的发送器"""
+        snapshot = self._snapshot
+        self._snapshots_in_use[snapshot.version] = self._snapshots_in_use.get(snapshot.version, 0) + 1
+        try:
+            yield snapshot
+        finally:
+            self._snapshots_in_use[snapshot.version] -= 1
+            if not self._snapshots_in_use[snapshot.version]:
+                del self._snapshots_in_use[snapshot.version]
+
+    async def _close_retired(self, force: bool = False) -> None:
+        """关闭旧快照中已经没有运行在使用的发送器、发送台账和发件箱"""
+        def idle(version: int) -> bool:
+            return force or version not in self._snapshots_in_use
+
+        closing = [sender for version, sender in self._retired_senders if idle(version)]
+        self._retired_senders = [item for item in self._retired_senders if not idle(item[0])]
+        stores = [store for version, store in self._retired_stores if idle(version)]
+        self._retired_stores = [item for item in self._retired_stores if not idle(item[0])]
+        await self._close_senders(closing)
+        await self._close_stores(stores)
+
+    @staticmethod
+    async def _close_senders(senders: Iterable[NotificationBase]) -> None:
+        for sender in senders:
+            try:
+                await sender.close()
+            except Exception as e:
+                logger.warning(f"Failed to close {type(sender).__name__}: {e}")
+
+    @staticmethod
+    async def _close_stores(stores: Iterable[Union["SendLedger", "Outbox"]]) -> None:
+        """在线程池中关闭发送台账和发件箱，写入剩余记录时不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        for store in stores:
+            try:
+                await loop.run_in_executor(None, store.close)
+            except Exception as e:
+                logger.warning(f"Failed to close {type(store).__name__}: {e}")
+
+    def _precompile_templates(self, config: Config) -> None:
+        """编译配置中引用的所有邮件模板"""
+        if "email" not in config.notification_types or not config.smtp_config:
+            return
+        from src.notification.templates import compile_config_templates
+        with metrics.STAGE_SECONDS.time(stage="template_compile"):
+            errors = compile_config_templates(config, self.config_manager.get_templates_dir())
+        for name, error in errors.items():
+            logger.error(f"Failed to compile template {name}: {error}")
+
+    @staticmethod
+    def _open_ledger(config: Config, previous: Optional[RuntimeSnapshot]) -> Optional["SendLedger"]:
+        """按配置打开发送台账，路径未变化时沿用当前快照的台账"""
+        ledger_config = config.ledger_config
+        current = previous.ledger if previous is not None else None
+        if current is not None and current.path == ledger_config.path:
+            return current
+        if not ledger_config.path:
+            return None
+        from src.core.ledger import SendLedger
+        logger.info(f"Send ledger enabled at {ledger_config.path}")
+        return SendLedger(ledger_config.path, ledger_config.batch_size)
+
+    @staticmethod
+    def _open_outbox(config: Config, previous: Optional[RuntimeSnapshot]) -> Optional["Outbox"]:
+        """按配置打开发件箱，路径未变化时沿用当前快照的发件箱，发布时再更新重试设置"""
+        outbox_config = config.outbox_config
+        current = previous.outbox if previous is not None else None
+        if current is not None and current.path == outbox_config.path:
+            return current
+        if not outbox_config.path:
+            return None
+        from src.core.outbox import Outbox
+        logger.info(f"Outbox enabled at {outbox_config.path}")
+        return Outbox(outbox_config)
+
+    @staticmethod
+    def _create_checker(config: Config) -> BirthdayChecker:
+        """按配置的检查引擎创建生日检查器"""
+        checker_config = config.checker_config
+        if checker_config.engine == "numpy":
+            from src.core.vectorized import create_checker
+            return create_checker(checker_config)
+        return BirthdayChecker(checker_config)
+
+    async def send_birthday_reminder(self, recipient: Recipient, extra_info: Dict,
+                                     snapshot: Optional[RuntimeSnapshot] = None) -> None:
+        """发送生日提醒，不同通道的发送并发进行"""
+        snapshot = snapshot or self._snapshot
         try:
             logger.info(f"Sending birthday reminder to {recipient.name}")
 
-            for sender in self.notification_senders:
-                try:
-                    # 渲染内容
-                    content = sender.render_content(
-                        name=recipient.name,
-                        template_file=recipient.template_file,
-                        extra_info=extra_info,
-                    )
+            await asyncio.gather(*(
+                self._send_with(snapshot, sender, recipient, extra_info)
+                for sender in snapshot.senders
+            ))
+
+        except Exception as e:
+            logger.error(f"Failed to send birthday reminder to {recipient.name}: {e}")
+            raise
+
+    async def _send_with(self, snapshot: RuntimeSnapshot, sender: NotificationBase,
+                         recipient: Recipient, extra_info: Dict) -> None:
+        """通过单个发送器发送提醒，失败只记录日志"""
+        key = self._ledger_key(sender, recipient, extra_info)
+        if key in self._already_sent:
+            logger.info(f"Skipping {type(sender).__name__} notification to {recipient.name}, already sent")
+            return
 
-                    # 发送通知
+        channel = sender.channel or type(sender).__name__
+        try:
+            # 渲染内容，按 executor.mode 在事件循环外执行
+            with metrics.STAGE_SECONDS.time(stage="render"):
+                content = await run_render(snapshot.config.executor_config, partial(
+                    sender.render_content,
+                    name=recipient.name,
+                    template_file=recipient.template_file,
+                    extra_info=extra_info,
+                ))
+
+            # 在通道的并发和速率限制内发送通知
+            async with snapshot.dispatcher.limit(sender.channel):
+                if snapshot.outbox is None:
                     await sender.send(
                         recipient=recipient,
                         content=content,
                         days_until=extra_info["days_until"],
                         age=extra_info["age"],
                     )
+                else:
+                    envelope = sender.envelope(
+                        recipient=recipient,
+                        content=content,
+                        days_until=extra_info["days_until"],
+                        age=extra_info["age"],
+                    )
+                    if not await self._deliver_or_defer(snapshot, sender, envelope, [key], recipient.name):
+                        return
 
-                    logger.info(f"Successfully sent {type(sender).__name__} notification to {recipient.name}")
-
-                except Exception as e:
-                    logger.error(f"Failed to send {type(sender).__name__} notification to {recipient.name}: {e}")
-                    # 继续尝试其他发送器，不中断整个流程
+            metrics.SENDS_TOTAL.inc(channel=channel, result="success")
+            logger.info(f"Successfully sent {type(sender).__name__} notification to {recipient.name}")
+            if snapshot.ledger is not None:
+                await snapshot.ledger.add(key)
 
         except Exception as e:
-            logger.error(f"Failed to send birthday reminder to {recipient.name}: {e}")
-            raise
+            metrics.SENDS_TOTAL.inc(channel=channel, result="failure")
+            logger.error(f"Failed to send {type(sender).__name__} notification to {recipient.name}: {e}")
+            # 继续尝试其他发送器，不中断整个流程
+
+    def _plan_digests(self, snapshot: RuntimeSnapshot,
+                      birthdays: List[Tuple[Recipient, Dict]]) -> List[Callable[[], Awaitable[None]]]:
+        """
+        按发送器和目的地分组，生成发送任务
+
+        同一发送器发往同一目的地的提醒达到 digest.min_size 时合并为一条摘要，
+        其余提醒（包括不支持摘要的发送器）逐条发送。台账中已经发送过的提醒不再计入。
+
+        Args:
+            snapshot: 本次运行的快照
+            birthdays: 命中的收件人和额外信息
+
+        Returns:
+            List[Callable[[], Awaitable[None]]]: 发送任务
+        """
+        min_size = snapshot.config.digest_config.min_size
+        jobs: List[Callable[[], Awaitable[None]]] = []
+        # 收件人位置 -> 需要逐条发送的发送器
+        individual: Dict[int, List[NotificationBase]] = {}
+        for sender in snapshot.senders:
+            groups: Dict[str, List[int]] = {}
+            for pos, (recipient, extra_info) in enumerate(birthdays):
+                if self._ledger_key(sender, recipient, extra_info) in self._already_sent:
+                    continue
+                destination = sender.digest_destination(recipient)
+                if destination is None:
+                    individual.setdefault(pos, []).append(sender)
+                else:
+                    groups.setdefault(destination, []).append(pos)
+            for destination, positions in groups.items():
+                if len(positions) < min_size:
+                    for pos in positions:
+                        individual.setdefault(pos, []).append(sender)
+                else:
+                    entries = [birthdays[pos] for pos in positions]
+                    jobs.append(partial(self._send_digest_with, snapshot, sender, destination, entries))
+
+        for pos, senders in sorted(individual.items()):
+            recipient, extra_info = birthdays[pos]
+            jobs.extend(partial(self._send_with, snapshot, sender, recipient, extra_info) for sender in senders)
+        return jobs
+
+    async def _send_digest_with(self, snapshot: RuntimeSnapshot, sender: NotificationBase,
+                                destination: str, entries: List[Tuple[Recipient, Dict]]) -> None:
+        """通过单个发送器发送一条摘要，失败只记录日志"""
+        channel = sender.channel or type(sender).__name__
+        try:
+            with metrics.STAGE_SECONDS.time(stage="render"):
+                content = await run_render(snapshot.config.executor_config, sender.render_digest,
+                                           entries, snapshot.config.digest_config.template_file)
+
+            keys = [self._ledger_key(sender, recipient, extra_info) for recipient, extra_info in entries]
+            async with snapshot.dispatcher.limit(sender.channel):
+                if snapshot.outbox is None:
+                    await sender.send_digest(destination=destination, content=content, entries=entries)
+                else:
+                    envelope = sender.digest_envelope(destination=destination, content=content,
+                                                      entries=entries)
+                    label = f"digest of {len(entries)} reminders"
+                    if not await self._deliver_or_defer(snapshot, sender, envelope, keys, label):
+                        return
+
+            metrics.SENDS_TOTAL.inc(channel=channel, result="success")
+            logger.info(f"Successfully sent {type(sender).__name__} digest of {len(entries)} reminders")
+            if snapshot.ledger is not None:
+                for key in keys:
+                    await snapshot.ledger.add(key)
 
-    def check_birthdays(self) -> List[Tuple[Recipient, bool, Dict]]:
+        except Exception as e:
+            metrics.SENDS_TOTAL.inc(channel=channel, result="failure")
+            logger.error(f"Failed to send {type(sender).__name__} digest of {len(entries)} reminders: {e}")
+
+    async def _deliver_or_defer(self, snapshot: RuntimeSnapshot, sender: NotificationBase,
+                                envelope: Envelope, keys: List["LedgerKey"], label: str) -> bool:
+        """
+        投递一次消息，失败时存入发件箱等待重试，不在协程内等待
+
+        Args:
+            snapshot: 本次运行的快照
+            sender: 发送器
+            envelope: 渲染好的消息
+            keys: 消息包含的提醒标识，投递成功后写入台账
+            label: 日志中的消息说明
+
+        Returns:
+            bool: 是否投递成功
+        """
+        self.retry_budget.record_attempt()
+        try:
+            await sender.deliver(envelope)
+            return True
+        except CircuitOpenError as e:
+            # 熔断器打开时没有实际发送，不计入尝试次数，等到熔断器可以试探时再投递
+            attempts, delay, exception = 0, max(e.retry_after, 1.0), e
+        except Exception as e:
+            attempts, delay, exception = 1, None, e
+        channel = sender.channel or type(sender).__name__
+        error = f"{type(exception).__name__}: {exception}"
+        if await snapshot.outbox.put(channel, envelope, keys, error, attempts=attempts, delay=delay):
+            metrics.SEND_RETRIES_TOTAL.inc(channel=channel)
+            logger.warning(f"Failed to send {type(sender).__name__} notification to {label}, "
+                           f"queued in outbox for retry: {error}")
+            return False
+        raise exception
+
+    async def _drain_outbox(self, snapshot: RuntimeSnapshot) -> None:
+        """分批投递发件箱中已经到期的消息，直到没有到期消息"""
+        if snapshot.outbox is None:
+            return
+        if self._drain_lock is None:
+            self._drain_lock = asyncio.Lock()
+        async with self._drain_lock:
+            senders = {sender.channel: sender for sender in snapshot.senders}
+            batch_size = snapshot.config.outbox_config.batch_size
+            while True:
+                messages = await snapshot.outbox.due(batch_size)
+                if not messages:
+                    break
+                logger.info(f"Retrying {len(messages)} messages from the outbox")
+                await snapshot.dispatcher.dispatch(messages, partial(self._redeliver, snapshot, senders))
+            metrics.OUTBOX_PENDING.set(await snapshot.outbox.pending_count())
+            if snapshot.ledger is not None:
+                await snapshot.ledger.flush()
+
+    async def _retry_within_window(self, snapshot: RuntimeSnapshot) -> None:
+        """
+        发送完成后等待 outbox.retry_window 秒内到期的消息并投递
+
+        瞬时故障导致首次发送失败的提醒可以在本次运行中送达，而不是等到下一次运行。
+        重试预算用完或下一条消息超出等待时间时立即结束。
+        """
+        retry_window = snapshot.config.outbox_config.retry_window
+        if retry_window <= 0:
+            return
+        deadline = time.time() + retry_window
+        while self.retry_budget.remaining > 0:
+            next_due = await snapshot.outbox.next_due()
+            if next_due is None or next_due > deadline:
+                return
+            await asyncio.sleep(max(0.0, next_due - time.time()))
+            await self._drain_outbox(snapshot)
+
+    async def _redeliver(self, snapshot: RuntimeSnapshot, senders: Dict[str, NotificationBase],
+                         message: "OutboxMessage") -> None:
+        """重试发件箱中的一条消息，失败时按退避时间重新安排或放弃"""
+        channel = message.channel
+        if not self.retry_budget.try_acquire():
+            # 本次运行的重试预算已经用完，按正常的退避时间推迟，不计入尝试次数
+            from src.core.outbox import backoff_delay
+            await snapshot.outbox.postpone(message, backoff_delay(message.attempts, snapshot.outbox.config))
+            return
+        try:
+            sender = senders.get(channel)
+            if sender is None:
+                raise RuntimeError(f"channel {channel} is not enabled")
+            async with snapshot.dispatcher.limit(channel):
+                await sender.deliver(message.envelope)
+        except CircuitOpenError as e:
+            # 熔断器打开时没有实际发送，等到熔断器可以试探时再重试
+            await snapshot.outbox.postpone(message, max(e.retry_after, 1.0))
+            return
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if await snapshot.outbox.failed(message, error):
+                metrics.SEND_RETRIES_TOTAL.inc(channel=channel)
+                logger.warning(f"Outbox message {message.id} to {message.envelope.destination} "
+                               f"failed attempt {message.attempts + 1}: {error}")
+            else:
+                metrics.SENDS_TOTAL.inc(channel=channel, result="failure")
+                logger.error(f"Giving up outbox message {message.id} to {message.envelope.destination} "
+                             f"after {message.attempts + 1} attempts: {error}")
+            return
+
+        await snapshot.outbox.succeeded(message)
+        metrics.SENDS_TOTAL.inc(channel=channel, result="success")
+        logger.info(f"Successfully sent outbox message {message.id} to {message.envelope.destination}")
+        if snapshot.ledger is not None:
+            for key in message.ledger_keys:
+                await snapshot.ledger.add(key)
+
+    def check_birthdays(self, snapshot: Optional[RuntimeSnapshot] = None) -> Sequence[Tuple[Recipient, bool, Dict]]:
         """检查所有人的生日"""
+        snapshot = snapshot or self._snapshot
+        recipients = snapshot.config.recipients
         try:
-            logger.info(f"Checking birthdays for {len(self.config.recipients)} recipients")
-            results = self.birthday_checker.check_birthdays(self.config.recipients)
+            logger.info(f"Checking birthdays for {len(recipients)} recipients")
+            with metrics.STAGE_SECONDS.time(stage="check"):
+                results = snapshot.checker.check_birthdays(recipients)
 
             # 统计结果
-            birthday_count = sum(1 for _, is_birthday, _ in results if is_birthday)
+            if isinstance(results, CheckResults):
+                birthday_count = results.birthday_count
+            else:
+                birthday_count = sum(1 for _, is_birthday, _ in results if is_birthday)
+            metrics.BIRTHDAYS_FOUND.set(birthday_count)
             logger.info(f"Found {birthday_count} birthdays today")
 
             return results
@@ -104,66 +566,387 @@ class BirthdayReminder:
             raise
 
     async def run(self) -> None:
-        """运行生日提醒主流程"""
+        """运行生日提醒主流程，整个运行使用开始时的快照"""
+        result = "failure"
+        start = time.perf_counter()
         try:
             logger.info("Starting birthday reminder application")
+            with self._use_snapshot() as snapshot:
+                processed = await self._run_with(snapshot)
 
-            # 检查生日
-            birthday_results = self.check_birthdays()
-
-            # 收集需要发送提醒的任务
-            tasks = []
-            for recipient, is_birthday, extra_info in birthday_results:
-                if is_birthday:
-                    logger.info(f"Processing birthday for {recipient.name}")
-                    tasks.append(self.send_birthday_reminder(recipient, extra_info))
-
-            # 并发发送所有提醒
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
-                logger.info(f"Successfully processed {len(tasks)} birthday reminders")
+            if processed:
+                logger.info(f"Successfully processed {processed} birthday reminders")
             else:
                 logger.info("No birthdays to process today")
+            result = "success"
 
         except Exception as e:
             logger.error(f"Application error: {type(e).__name__}: {e}")
             raise
+        finally:
+            metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="run")
+            metrics.RUNS_TOTAL.inc(result=result)
+            metrics.LAST_RUN_TIMESTAMP.set(time.time(), result=result)
+            self._write_metrics()
+            await self._close_retired()
+
+    async def _run_with(self, snapshot: RuntimeSnapshot) -> int:
+        """用指定快照检查生日并发送提醒，返回处理的收件人数"""
+        self._run_date = date.today()
+        self._already_sent = set()
+        self.retry_budget.reset()
+        self._active_runs += 1
+        try:
+            return await self._check_and_dispatch(snapshot)
+        finally:
+            self._active_runs -= 1
+
+    async def _check_and_dispatch(self, snapshot: RuntimeSnapshot) -> int:
+        """投递到期的发件箱消息后边检查边发送提醒，返回处理的收件人数"""
+        if snapshot.outbox is not None:
+            # 先投递之前运行遗留的到期消息，仍在等待重试的提醒本次不再发送
+            await self._drain_outbox(snapshot)
+            self._already_sent |= await snapshot.outbox.pending_keys()
+        birthdays = self._stream_birthdays(snapshot)
+
+        # 边检查边通过有界队列调度发送，发送在检查完成之前就开始
+        try:
+            with metrics.STAGE_SECONDS.time(stage="dispatch"):
+                if snapshot.config.digest_config.enabled:
+                    # 摘要需要全部命中后才能按目的地分组
+                    matched = [item async for item in birthdays]
+                    await snapshot.dispatcher.dispatch(self._plan_digests(snapshot, matched), lambda job: job())
+                    processed = len(matched)
+                else:
+                    processed = await snapshot.dispatcher.dispatch(
+                        birthdays,
+                        lambda item: self.send_birthday_reminder(*item, snapshot=snapshot),
+                    )
+            if snapshot.outbox is not None:
+                await self._retry_within_window(snapshot)
+            return processed
+        finally:
+            if snapshot.ledger is not None:
+                await snapshot.ledger.flush()
+
+    async def _stream_birthdays(self, snapshot: RuntimeSnapshot) -> AsyncIterator[Tuple[Recipient, Dict]]:
+        """
+        逐个产出命中的收件人
+
+        检查器每返回一批命中就让出事件循环，已经取出的提醒可以立即开始渲染和发送；
+        启用发送台账时按台账的批量大小一次查询一批命中中已经发送过的提醒。
+        executor.mode 不是 inline 时检查在专用线程中推进，检查期间事件循环继续处理发送。
+        """
+        recipients = snapshot.config.recipients
+        logger.info(f"Checking birthdays for {len(recipients)} recipients")
+        batch_size = snapshot.ledger.batch_size if snapshot.ledger is not None else 1
+        matches = iter(snapshot.checker.iter_birthdays(recipients))
+        found = 0
+        check_seconds = 0.0
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = await run_check(snapshot.config.executor_config, _take, matches, batch_size)
+            finally:
+                check_seconds += time.perf_counter() - start
+            if not batch:
+                break
+            found += len(batch)
+            if snapshot.ledger is not None:
+                await self._load_sent(snapshot, batch)
+            for recipient, extra_info in batch:
+                logger.info(f"Processing birthday for {recipient.name}")
+                yield recipient, extra_info
+            # 让工作协程在继续检查之前处理已经取出的提醒
+            await asyncio.sleep(0)
+
+        metrics.STAGE_SECONDS.observe(check_seconds, stage="check")
+        metrics.BIRTHDAYS_FOUND.set(found)
+        logger.info(f"Found {found} birthdays today")
+
+    def _write_metrics(self) -> None:
+        """把指标写入配置的 Prometheus 文本文件"""
+        textfile = self.config.metrics_config.textfile
+        if not textfile:
+            return
+        try:
+            metrics.REGISTRY.write_textfile(textfile)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics to {textfile}: {e}")
+
+    async def serve(self, times: Optional[List[str]] = None) -> None:
+        """
+        常驻运行，每天在指定的本地时间检查生日
+
+        检查器缓存、模板和连接池在多次运行之间保留，收到 SIGTERM/SIGINT 后
+        等待当前运行结束再退出。收到 SIGHUP 或检测到配置文件变化
+        （schedule.watch_interval 大于 0 时）后在后台重新加载配置。
+        配置了 metrics.port 时同时提供 /metrics 端点。
+
+        Args:
+            times: 触发时间 (HH:MM)，为空时使用配置中的 schedule.times
+        """
+        scheduler = DailyScheduler(parse_times(times or self.config.schedule_config.times))
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        background: Set[asyncio.Future] = set()
+
+        def request_reload() -> None:
+            task = asyncio.ensure_future(self._reload_safely())
+            background.add(task)
+            task.add_done_callback(background.discard)
+
+        handlers = {signal.SIGTERM: stop.set, signal.SIGINT: stop.set}
+        if hasattr(signal, "SIGHUP"):
+            handlers[signal.SIGHUP] = request_reload
+        handled_signals = []
+        for sig, handler in handlers.items():
+            try:
+                loop.add_signal_handler(sig, handler)
+                handled_signals.append(sig)
+            except (NotImplementedError, RuntimeError):
+                # Windows 或非主线程不支持信号处理
+                pass
+
+        background.add(asyncio.ensure_future(self._drain_outbox_periodically()))
+
+        watch_interval = self.config.schedule_config.watch_interval
+        if watch_interval > 0:
+            background.add(asyncio.ensure_future(self._watch_config(watch_interval, request_reload)))
+
+        metrics_config = self.config.metrics_config
+        metrics_server = None
+        if metrics_config.port is not None:
+            metrics_server = await metrics.start_metrics_server(metrics_config.host, metrics_config.port)
+
+        logger.info("Birthday reminder service started")
+        try:
+            await scheduler.run(self.run, stop)
+        finally:
+            for sig in handled_signals:
+                loop.remove_signal_handler(sig)
+            for task in list(background):
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            if metrics_server is not None:
+                metrics_server.close()
+                await metrics_server.wait_closed()
+            await self.close()
+            logger.info("Birthday reminder service stopped")
+
+    async def _reload_safely(self) -> None:
+        """后台重新加载配置，失败时保留当前快照"""
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.error(f"Configuration reload failed, keeping current configuration: {type(e).__name__}: {e}")
+
+    async def _watch_config(self, interval: float, on_change: Callable[[], None]) -> None:
+        """定期检查配置文件的修改时间和大小，变化时触发重新加载"""
+        def signature():
+            try:
+                stat = os.stat(self.config_manager.config_path)
+                return stat.st_mtime_ns, stat.st_size
+            except OSError:
+                return None
+
+        last = signature()
+        while True:
+            await asyncio.sleep(interval)
+            current = signature()
+            if current is not None and current != last:
+                logger.info("Configuration file changed, reloading")
+                on_change()
+            last = current
+
+    async def _drain_outbox_periodically(self) -> None:
+        """常驻模式下每隔 outbox.poll_interval 秒投递发件箱中到期的消息"""
+        while True:
+            await asyncio.sleep(self.config.outbox_config.poll_interval)
+            if self.outbox is None:
+                continue
+            try:
+                with self._use_snapshot() as snapshot:
+                    if not self._active_runs:
+                        # 两次运行之间的每轮投递使用新的重试预算，否则预算用完后到期消息会一直被推迟到下一次运行
+                        self.retry_budget.reset()
+                    await self._drain_outbox(snapshot)
+            except Exception as e:
+                logger.error(f"Failed to drain outbox: {type(e).__name__}: {e}")
+
+    def _ledger_key(self, sender: NotificationBase, recipient: Recipient, extra_info: Dict) -> "LedgerKey":
+        """生成一次提醒的标识（收件人、通道和生日日期），用于发送台账和发件箱去重"""
+        from src.core.ledger import LedgerKey
+        return LedgerKey.for_send(recipient, sender.channel, self._run_date or date.today(),
+                                  extra_info["days_until"])
+
+    async def _load_sent(self, snapshot: RuntimeSnapshot, birthdays: List[Tuple[Recipient, Dict]]) -> None:
+        """批量查询本次待发送的提醒中已经成功发送过的部分"""
+        keys = [
+            self._ledger_key(sender, recipient, extra_info)
+            for recipient, extra_info in birthdays
+            for sender in snapshot.senders
+        ]
+        already_sent = await snapshot.ledger.sent_async(keys)
+        if already_sent:
+            self._already_sent |= already_sent
+            logger.info(f"{len(already_sent)} reminders already sent, skipping them")
+
+    async def close(self) -> None:
+        """关闭通知发送器持有的连接、发送台账和发件箱"""
+        await self._close_retired(force=True)
+        await self._close_senders(self._snapshot.senders)
+        self._snapshot.checker.close()
+        shutdown_executors()
+        stores = [store for store in (self.ledger, self.outbox) if store is not None]
+        self._snapshot = replace(self._snapshot, ledger=None, outbox=None)
+        await self._close_stores(stores)
 
     def reload_config(self) -> None:
-        """重新加载配置"""
+        """重新加载配置（同步），旧发送器在下一次运行结束或 close() 时释放"""
         try:
-            # 重新加载配置
-            self.config_manager._config = None
-            self.config = self.config_manager.config
-
-            # 重新初始化组件
-            self._initialize_components()
-
+            config = self._load_fresh_config()
+            self._publish(self._build_snapshot(config, self._snapshot))
             logger.info("Configuration reloaded successfully")
 
         except Exception as e:
             logger.error(f"Failed to reload configuration: {e}")
             raise
 
+    async def reload(self) -> None:
+        """
+        在后台线程中加载配置并构建新快照，完成后一次性替换当前快照
+
+        进行中的运行继续使用旧快照，旧快照空闲后关闭不再使用的发送器；
+        加载或构建失败时保留当前快照。
+        """
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        async with self._reload_lock:
+            loop = asyncio.get_running_loop()
+            with metrics.STAGE_SECONDS.time(stage="reload"):
+                config = await loop.run_in_executor(None, self._load_fresh_config)
+                snapshot = await loop.run_in_executor(None, self._build_snapshot, config, self._snapshot)
+            self._publish(snapshot)
+            logger.info(f"Configuration reloaded (snapshot {snapshot.version})")
+            await self._close_retired()
+
+    def _load_fresh_config(self) -> Config:
+        """重新读取配置文件，不影响当前快照；失败时恢复配置管理器的状态"""
+        previous = self.config_manager._config
+        self.config_manager._config = None
+        try:
+            return self.config_manager.config
+        except Exception:
+            self.config_manager._config = previous
+            raise
+
+
+async def _run_and_close(app: BirthdayReminder) -> None:
+    """运行一次提醒流程并释放连接"""
+    try:
+        await app.run()
+    finally:
+        await app.close()
+
 
 @click.group()
-def cli():
+@click.option('--log-file', default=LOG_FILE, show_default=True, help='日志文件路径，设为空字符串时不写文件')
+def cli(log_file):
     """生日提醒系统 - 简洁版本"""
-    pass
+    setup_logging(log_file or None)
+
+
+def _parse_shard(ctx, param, value) -> Optional[ShardSpec]:
+    """解析 --shard 参数"""
+    if value is None:
+        return None
+    try:
+        return ShardSpec.parse(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
 
 
 @cli.command()
 @click.option('--config', '-c', help='配置文件路径', default="config.yml")
-def run(config):
+@click.option('--engine', type=click.Choice(CHECKER_ENGINES), default=None,
+              help='生日检查引擎，覆盖配置文件中的 checker.engine')
+@click.option('--shard', envvar=SHARD_ENV, callback=_parse_shard, default=None, metavar='I/N',
+              help='多节点运行时只处理第 I 个分片（从 0 开始，共 N 个）')
+def run(config, engine, shard):
     """运行生日提醒主流程"""
     try:
-        app = BirthdayReminder(config)
-        asyncio.run(app.run())
+        app = BirthdayReminder(config, engine=engine, shard=shard)
+        asyncio.run(_run_and_close(app))
     except Exception as e:
         logger.error(f"Application failed: {e}")
         sys.exit(1)
 
 
+@cli.command()
+@click.option('--config', '-c', help='配置文件路径', default="config.yml")
+@click.option('--at', 'times', multiple=True, help='每天触发检查的本地时间 (HH:MM)，可多次指定')
+@click.option('--engine', type=click.Choice(CHECKER_ENGINES), default=None,
+              help='生日检查引擎，覆盖配置文件中的 checker.engine')
+@click.option('--shard', envvar=SHARD_ENV, callback=_parse_shard, default=None, metavar='I/N',
+              help='多节点运行时只处理第 I 个分片（从 0 开始，共 N 个）')
+def serve(config, times, engine, shard):
+    """常驻运行，每天定时检查生日"""
+    try:
+        app = BirthdayReminder(config, engine=engine, shard=shard)
+        asyncio.run(app.serve(list(times) or None))
+    except Exception as e:
+        logger.error(f"Service failed: {e}")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--config', '-c', help='配置文件路径', default="config.yml")
+@click.option('--days', type=click.IntRange(min=1), default=30, show_default=True,
+              help='从起始日期开始查询的天数（包含起始日期）')
+@click.option('--start', type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help='起始日期 (YYYY-MM-DD)，默认为今天')
+@click.option('--shard', envvar=SHARD_ENV, callback=_parse_shard, default=None, metavar='I/N',
+              help='多节点运行时只查询第 I 个分片（从 0 开始，共 N 个）')
+@click.option('--json', 'as_json', is_flag=True, help='以 JSON 输出，便于其他工具读取')
+def upcoming(config, days, start, shard, as_json):
+    """列出接下来若干天内的生日，按日期排序"""
+    try:
+        config = ConfigManager(config).config
+        checker = BirthdayReminder._create_checker(config)
+        start = start.date() if start else date.today()
+        try:
+            results = checker.upcoming(config.recipients, start, start + timedelta(days=days - 1), shard=shard)
+        finally:
+            checker.close()
+    except Exception as e:
+        logger.error(f"Upcoming query failed: {e}")
+        sys.exit(1)
+
+    if as_json:
+        print(json.dumps([
+            {
+                "date": item.day.isoformat(),
+                "days_until": item.days_until,
+                "name": item.recipient.name,
+                "email": item.recipient.email,
+                "solar_match": item.solar_match,
+                "lunar_match": item.lunar_match,
+                "age": item.age,
+            }
+            for item in results
+        ], ensure_ascii=False, indent=2))
+        return
+    if not results:
+        print(f"接下来 {days} 天内没有生日")
+        return
+    for item in results:
+        kinds = "/".join(kind for kind, matched in (("阳历", item.solar_match), ("农历", item.lunar_match))
+                         if matched)
+        print(f"{item.day.isoformat()}  {item.days_until:>3}天后  {item.recipient.name}  "
+              f"{kinds}生日  {item.age}岁")
+
+
 @cli.command()
 @click.option('--config', '-c', help='配置文件路径', default="config.yml")
 def preview():
@@ -184,6 +967,13 @@ def validate(config):
     try:
         config_manager = ConfigManager(config)
         if config_manager.validate_config():
+            from src.notification.templates import compile_config_templates
+            errors = compile_config_templates(config_manager.config, config_manager.get_templates_dir())
+            for name, error in errors.items():
+                print(f"❌ 模板编译失败 {name}: {error}")
+            if errors:
+                print("❌ 配置文件验证失败")
+                sys.exit(1)
             print("✅ 配置文件验证通过")
         else:
             print("❌ 配置文件验证失败")
@@ -1,9 +1,42 @@
 from abc import ABC, abstractmethod
-from typing import Dict
-from src.core.checker import Recipient
+from functools import wraps
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+from src.core.config import Recipient
+from src.core.metrics import SEND_SECONDS
+
+if TYPE_CHECKING:
+    from src.core.resilience import CircuitBreaker, RetryBudget
+
+# 摘要中的一条提醒: (收件人, 额外信息)
+DigestEntry = Tuple[Recipient, Dict]
+
+
+class Envelope(NamedTuple):
+    """渲染完成、可以直接投递的一条消息"""
+
+    destination: str  # 邮箱或 sckey
+    subject: str
+    content: str
+
+
+def timed_delivery(func):
+    """投递方法装饰器：按通道记录每次实际投递的耗时，重试之间的等待不计入"""
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        with SEND_SECONDS.time(channel=self.channel or type(self).__name__):
+            return await func(self, *args, **kwargs)
+
+    return wrapper
 
 
 class NotificationBase(ABC):
+    # 通道名称，用于发送调度的并发和速率限制
+    channel: str = ""
+    # 由 NotificationFactory 设置：发送器自己的熔断器和所有发送器共享的重试预算
+    circuit_breaker: Optional["CircuitBreaker"] = None
+    retry_budget: Optional["RetryBudget"] = None
+
     @abstractmethod
     def render_content(self, name: str, template_file: str, extra_info: Dict) -> str:
         pass
@@ -11,3 +44,35 @@ class NotificationBase(ABC):
     @abstractmethod
     async def send(self, recipient: Recipient, content: str, days_until: int, age: int):
         pass
+
+    def digest_destination(self, recipient: Recipient) -> Optional[str]:
+        """
+        提醒的目的地，目的地相同的提醒可以合并为一条摘要
+
+        Returns:
+            Optional[str]: 目的地（例如邮箱或 sckey），为空表示逐条发送
+        """
+        return None
+
+    def render_digest(self, entries: List[DigestEntry], template_file: str) -> str:
+        """渲染一条摘要，entries 按收件人顺序排列"""
+        raise NotImplementedError(f"{type(self).__name__} does not support digests")
+
+    async def send_digest(self, destination: str, content: str, entries: List[DigestEntry]):
+        """把摘要发送到目的地"""
+        raise NotImplementedError(f"{type(self).__name__} does not support digests")
+
+    def envelope(self, recipient: Recipient, content: str, days_until: int, age: int) -> Envelope:
+        """把一条提醒包装成可以投递的消息，参数与 send 相同"""
+        raise NotImplementedError(f"{type(self).__name__} does not support envelopes")
+
+    def digest_envelope(self, destination: str, content: str, entries: List[DigestEntry]) -> Envelope:
+        """把一条摘要包装成可以投递的消息，参数与 send_digest 相同"""
+        raise NotImplementedError(f"{type(self).__name__} does not support envelopes")
+
+    async def deliver(self, envelope: Envelope) -> None:
+        """投递一条消息，只尝试一次，失败时抛出异常"""
+        raise NotImplementedError(f"{type(self).__name__} does not support envelopes")
+
+    async def close(self) -> None:
+        """释放发送器持有的连接等资源"""
@@ -1,14 +1,15 @@
-import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from jinja2 import Environment, FileSystemLoader
-from typing import Dict
+from typing import Dict, List, Optional
 import asyncio
 import logging
 from functools import wraps
-from src.core.config import SMTPConfig
-from src.core.checker import Recipient
-from src.notification.notification_base import NotificationBase
+from src.core.config import Recipient, SMTPConfig
+from src.core.metrics import SEND_RETRIES_TOTAL
+from src.core.resilience import CircuitOpenError, RetryBudget, circuit_protected
+from src.notification.notification_base import DigestEntry, Envelope, NotificationBase, timed_delivery
+from src.notification.smtp_pool import SMTPConnectionPool
+from src.notification.templates import get_environment
 import webbrowser
 from datetime import datetime
 from pathlib import Path
@@ -17,20 +18,37 @@ logger = logging.getLogger(__name__)
 
 
 def retry_on_failure(max_retries=3, delay=1, backoff=2):
-    """重试装饰器 - 支持指数退避"""
+    """
+    重试装饰器 - 支持指数退避
+
+    熔断器打开时不再重试；被装饰方法所属的发送器设置了重试预算时，每次重试都要先申请预算，
+    预算用完后直接抛出最后一次的异常。
+    """
 
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             last_exception = None
             current_delay = delay
+            budget = getattr(args[0], "retry_budget", None) if args else None
+            if not isinstance(budget, RetryBudget):
+                budget = None
+            if budget is not None:
+                budget.record_attempt()
 
             for attempt in range(max_retries):
                 try:
                     return await func(*args, **kwargs)
+                except CircuitOpenError:
+                    raise
                 except Exception as e:
                     last_exception = e
+                    if attempt < max_retries - 1 and budget is not None and not budget.try_acquire():
+                        logger.error(f"Retry budget exhausted, not retrying: {type(e).__name__}: {e}")
+                        break
                     if attempt < max_retries - 1:
+                        channel = getattr(args[0], "channel", "") if args else ""
+                        SEND_RETRIES_TOTAL.inc(channel=channel or func.__qualname__)
                         logger.warning(
                             f"Attempt {attempt + 1}/{max_retries} failed: {type(e).__name__}: {e}. "
                             f"Retrying in {current_delay} seconds..."
@@ -50,9 +68,17 @@ def retry_on_failure(max_retries=3, delay=1, backoff=2):
 
 
 class EmailSender(NotificationBase):
+    channel = "email"
+
     def __init__(self, smtp_config: SMTPConfig, templates_dir: str):
         self.smtp_config = smtp_config
-        self.env = Environment(loader=FileSystemLoader(templates_dir), autoescape=True)
+        self.templates_dir = templates_dir
+        self.env = get_environment(templates_dir, smtp_config.template_cache_dir)
+        self.pool = SMTPConnectionPool(smtp_config)
+
+    def __reduce__(self):
+        # 只按配置序列化，用于在进程池中渲染；工作进程中重新取得共享的 Jinja 环境
+        return type(self), (self.smtp_config, self.templates_dir)
 
     def render_content(self, name: str, template_file: str, extra_info: Dict) -> str:
         try:
@@ -64,28 +90,60 @@ class EmailSender(NotificationBase):
 
     @retry_on_failure()
     async def send(self, recipient: Recipient, content: str, days_until: int, age: int):
+        await self.deliver(self.envelope(recipient, content, days_until, age))
+
+    def envelope(self, recipient: Recipient, content: str, days_until: int, age: int) -> Envelope:
         subject = f"生日提醒- {recipient.name} - {age}岁 - {days_until}天后"
+        return Envelope(recipient.email, subject, content)
+
+    def digest_destination(self, recipient: Recipient) -> Optional[str]:
+        """邮件按收件邮箱合并"""
+        return recipient.email
+
+    def render_digest(self, entries: List[DigestEntry], template_file: str) -> str:
+        """用摘要模板渲染多条提醒，当天的黄历信息取自第一条"""
+        try:
+            template = self.env.get_template(template_file)
+            return template.render(
+                entries=[dict(extra_info, name=recipient.name) for recipient, extra_info in entries],
+                day=entries[0][1],
+            )
+        except Exception as e:
+            logger.error(f"Failed to render template {template_file}: {e}")
+            raise
+
+    @retry_on_failure()
+    async def send_digest(self, destination: str, content: str, entries: List[DigestEntry]):
+        await self.deliver(self.digest_envelope(destination, content, entries))
+
+    def digest_envelope(self, destination: str, content: str, entries: List[DigestEntry]) -> Envelope:
+        return Envelope(destination, f"生日提醒汇总 - {len(entries)}人", content)
+
+    @circuit_protected
+    @timed_delivery
+    async def deliver(self, envelope: Envelope) -> None:
+        """通过连接池发送一封 HTML 邮件"""
+        to, subject, content = envelope
         try:
             message = MIMEMultipart()
             message["From"] = self.smtp_config.username
-            message["To"] = recipient.email
+            message["To"] = to
             message["Subject"] = subject
             message.attach(MIMEText(content, "html"))
 
-            async with aiosmtplib.SMTP(
-                hostname=self.smtp_config.host,
-                port=self.smtp_config.port,
-                use_tls=self.smtp_config.use_tls,
-            ) as smtp:
-                await smtp.login(self.smtp_config.username, self.smtp_config.password)
+            async with self.pool.connection() as smtp:
                 await smtp.send_message(message)
-                logger.info(f"Successfully sent email to {recipient.email}")
+                logger.info(f"Successfully sent email to {to}")
         except Exception as e:
             logger.error(
-                f"Failed to send email to {recipient.email}: {type(e).__name__}: {e}"
+                f"Failed to send email to {to}: {type(e).__name__}: {e}"
             )
             raise
 
+    async def close(self) -> None:
+        """关闭连接池中的SMTP连接"""
+        await self.pool.close()
+
     @staticmethod
     def preview_email(template: str = "templates/birthday.html", web_open: bool = True):
         """只渲染birthday.html模板并直接预览，无自定义外壳"""
@@ -116,7 +174,7 @@ class EmailSender(NotificationBase):
             "week_name": "星期一",
             "constellation": "摩羯座",
         }
-        env = Environment(loader=FileSystemLoader("templates"), autoescape=True)
+        env = get_environment("templates")
         template_obj = env.get_template("birthday.html")
         content = template_obj.render(name=recipient.name, **extra_info)
         preview_dir = Path("previews")
@@ -1,6 +1,8 @@
-from src.notification.notification_base import NotificationBase
-from src.core.checker import Recipient
-from typing import Dict
+from src.notification.notification_base import DigestEntry, Envelope, NotificationBase, timed_delivery
+from src.core.config import Recipient, ServerChanConfig
+from src.core.resilience import circuit_protected
+from typing import Dict, List, Optional
+import importlib.util
 import httpx
 import logging
 
@@ -8,46 +10,113 @@ logger = logging.getLogger(__name__)
 
 
 class ServerChanSender(NotificationBase):
-    def __init__(self, sckey: str):
+    channel = "serverchan"
+
+    def __init__(self, sckey: str, serverchan_config: Optional[ServerChanConfig] = None):
         self.sckey = sckey
+        self.serverchan_config = serverchan_config or ServerChanConfig(default_sckey=sckey)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def __reduce__(self):
+        # 只按配置序列化，用于在进程池中渲染，不携带长连接客户端
+        return type(self), (self.sckey, self.serverchan_config)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """整个运行期间共享的长连接客户端，首次使用时创建"""
+        if self._client is None or self._client.is_closed:
+            config = self.serverchan_config
+            http2 = config.http2
+            if http2 and importlib.util.find_spec("h2") is None:
+                logger.warning("HTTP/2 requested for ServerChan but h2 is not installed, using HTTP/1.1")
+                http2 = False
+            self._client = httpx.AsyncClient(
+                base_url=config.base_url,
+                timeout=httpx.Timeout(config.timeout),
+                limits=httpx.Limits(
+                    max_connections=config.max_connections,
+                    max_keepalive_connections=config.max_connections,
+                    keepalive_expiry=config.keepalive_expiry,
+                ),
+                http2=http2,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """关闭长连接客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     def render_content(self, name: str, template_file: str, extra_info: Dict) -> str:
         # 只渲染纯文本内容
         lines = [f"亲爱的{name}："]
-        if extra_info.get("days_until", 0) == 0:
-            if extra_info.get("solar_match") and extra_info.get("lunar_match"):
-                lines.append("今天是您的阳历和农历生日，祝您生日快乐！🎉")
-            elif extra_info.get("solar_match"):
-                lines.append("今天是您的阳历生日，祝您生日快乐！🎉")
-            else:
-                lines.append("今天是您的农历生日，祝您生日快乐！🎉")
-        else:
-            if extra_info.get("solar_match") and extra_info.get("lunar_match"):
-                lines.append(f"{extra_info['days_until']}天后是您的阳历和农历生日！")
-            elif extra_info.get("solar_match"):
-                lines.append(f"{extra_info['days_until']}天后是您的阳历生日！")
-            else:
-                lines.append(f"{extra_info['days_until']}天后是您的农历生日！")
+        lines.append(_birthday_line(extra_info, "您的"))
         # 追加命理和节日信息
         lines.append(f"生肖：{extra_info.get('zodiac', '')}")
         lines.append(f"星座：{extra_info.get('constellation', '')}")
-        if extra_info.get("solar_term"):
-            lines.append(f"节气：{extra_info['solar_term']}")
-        if extra_info.get("lunar_festival"):
-            lines.append(f"农历节日：{extra_info['lunar_festival']}")
-        if extra_info.get("solar_festival"):
-            lines.append(f"阳历节日：{extra_info['solar_festival']}")
+        lines.extend(_festival_lines(extra_info))
+        return "\n".join(lines)
+
+    def digest_destination(self, recipient: Recipient) -> Optional[str]:
+        """同一发送器的推送都发往同一个 sckey"""
+        return self.sckey
+
+    def render_digest(self, entries: List[DigestEntry], template_file: str) -> str:
+        # 每人一行，当天的节日信息取自第一条
+        lines = [f"- {recipient.name}（{extra_info.get('age', 0)}岁，生肖{extra_info.get('zodiac', '')}）："
+                 f"{_birthday_line(extra_info, '')}" for recipient, extra_info in entries]
+        lines.extend(_festival_lines(entries[0][1]))
         return "\n".join(lines)
 
     async def send(self, recipient: Recipient, content: str, days_until: int, age: int):
-        # Server酱推送API
-        url = f"https://sctapi.ftqq.com/{self.sckey}.send"
+        await self.deliver(self.envelope(recipient, content, days_until, age))
+
+    async def send_digest(self, destination: str, content: str, entries: List[DigestEntry]):
+        await self.deliver(self.digest_envelope(destination, content, entries))
+
+    def envelope(self, recipient: Recipient, content: str, days_until: int, age: int) -> Envelope:
         title = f"生日提醒- {recipient.name} - {age}岁 - {days_until}天后"
+        return Envelope(self.sckey, title, content)
+
+    def digest_envelope(self, destination: str, content: str, entries: List[DigestEntry]) -> Envelope:
+        return Envelope(destination, f"生日提醒汇总 - {len(entries)}人", content)
+
+    @circuit_protected
+    @timed_delivery
+    async def deliver(self, envelope: Envelope) -> None:
+        # Server酱推送API，推送到消息中记录的 sckey
+        sckey, title, content = envelope
+        url = f"/{sckey}.send"
         data = {"title": title, "desp": content}
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(url, data=data)
-            if resp.status_code == 200 and resp.json().get("code") == 0:
-                logger.info(f"Server酱推送成功: {recipient.name}")
-            else:
-                logger.error(f"Server酱推送失败: {recipient.name}, 响应: {resp.text}")
-                raise Exception(f"Server酱推送失败: {resp.text}")
+        resp = await self.client.post(url, data=data)
+        if resp.status_code == 200 and resp.json().get("code") == 0:
+            logger.info(f"Server酱推送成功: {title}")
+        else:
+            logger.error(f"Server酱推送失败: {title}, 响应: {resp.text}")
+            raise Exception(f"Server酱推送失败: {resp.text}")
+
+
+def _birthday_line(extra_info: Dict, subject: str) -> str:
+    """生日提示语，subject 为空时省略称呼"""
+    if extra_info.get("solar_match") and extra_info.get("lunar_match"):
+        kind = "阳历和农历生日"
+    elif extra_info.get("solar_match"):
+        kind = "阳历生日"
+    else:
+        kind = "农历生日"
+    if extra_info.get("days_until", 0) == 0:
+        return f"今天是{subject}{kind}，祝{'您' if subject else ''}生日快乐！🎉"
+    return f"{extra_info['days_until']}天后是{subject}{kind}！"
+
+
+def _festival_lines(extra_info: Dict) -> List[str]:
+    """当天的节气和节日"""
+    lines = []
+    if extra_info.get("solar_term"):
+        lines.append(f"节气：{extra_info['solar_term']}")
+    if extra_info.get("lunar_festival"):
+        lines.append(f"农历节日：{extra_info['lunar_festival']}")
+    if extra_info.get("solar_festival"):
+        lines.append(f"阳历节日：{extra_info['solar_festival']}")
+    return lines
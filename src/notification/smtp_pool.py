@@ -0,0 +1,120 @@
+"""
+SMTP 连接池 - 复用已登录的 SMTP 会话
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+import aiosmtplib
+from src.core.config import SMTPConfig
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection:
+    """连接池中的一个已登录会话"""
+
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    有界的异步 SMTP 连接池
+
+    - 同时存在的连接数不超过 pool_size
+    - 每个连接发送 max_messages_per_connection 封邮件后关闭重建
+    - 空闲超过 idle_timeout 秒的连接在下次取用时关闭
+    - 复用前用 NOOP 做健康检查，失败的连接直接丢弃
+    """
+
+    def __init__(self, smtp_config: SMTPConfig):
+        self.smtp_config = smtp_config
+        self._idle: List[_PooledConnection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def idle_count(self) -> int:
+        """当前空闲连接数"""
+        return len(self._idle)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """
+        取出一个可用的已登录连接，用完后归还
+
+        Yields:
+            aiosmtplib.SMTP: 已登录的 SMTP 连接
+        """
+        if self._semaphore is None:
+            # 在事件循环内创建，避免绑定到其他循环
+            self._semaphore = asyncio.Semaphore(max(1, self.smtp_config.pool_size))
+
+        async with self._semaphore:
+            conn = await self._acquire()
+            try:
+                yield conn.smtp
+            except BaseException:
+                # 出错的连接状态未知，直接断开不再复用
+                conn.smtp.close()
+                raise
+            conn.messages += 1
+            await self._release(conn)
+
+    async def close(self) -> None:
+        """关闭所有空闲连接"""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self._close_connection(conn)
+
+    async def _acquire(self) -> _PooledConnection:
+        """优先复用最近使用的空闲连接，没有可用连接时新建"""
+        while self._idle:
+            conn = self._idle.pop()
+            if time.monotonic() - conn.last_used > self.smtp_config.idle_timeout:
+                logger.debug("Closing idle SMTP connection")
+                await self._close_connection(conn)
+                continue
+            try:
+                await conn.smtp.noop()
+                return conn
+            except Exception as e:
+                logger.debug(f"SMTP connection health check failed: {type(e).__name__}: {e}")
+                await self._close_connection(conn)
+
+        return await self._connect()
+
+    async def _release(self, conn: _PooledConnection) -> None:
+        """归还连接，达到单连接发送上限时关闭"""
+        if conn.messages >= self.smtp_config.max_messages_per_connection:
+            await self._close_connection(conn)
+            return
+        conn.last_used = time.monotonic()
+        self._idle.append(conn)
+
+    async def _connect(self) -> _PooledConnection:
+        """建立新连接并登录"""
+        smtp = aiosmtplib.SMTP(
+            hostname=self.smtp_config.host,
+            port=self.smtp_config.port,
+            use_tls=self.smtp_config.use_tls,
+        )
+        await smtp.connect()
+        try:
+            await smtp.login(self.smtp_config.username, self.smtp_config.password)
+        except Exception:
+            smtp.close()
+            raise
+        logger.debug(f"Opened SMTP connection to {self.smtp_config.host}:{self.smtp_config.port}")
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    async def _close_connection(conn: _PooledConnection) -> None:
+        """关闭连接，忽略关闭过程中的错误"""
+        try:
+            await conn.smtp.quit()
+        except Exception:
+            conn.smtp.close()
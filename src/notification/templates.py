@@ -0,0 +1,89 @@
+"""
+模板管理 - 共享的 Jinja 环境、字节码缓存和启动时预编译
+"""
+import os
+from typing import Dict, Iterable, Optional, Tuple
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from src.core.config import Config
+from src.core.recipient_table import RecipientTable
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (模板目录, 字节码缓存目录) -> 共享的 Jinja 环境
+_ENVIRONMENTS: Dict[Tuple[str, Optional[str]], Environment] = {}
+
+
+def get_environment(templates_dir: str, cache_dir: Optional[str] = None) -> Environment:
+    """
+    获取模板目录对应的共享 Jinja 环境
+
+    同一目录在进程内只创建一个环境，重新加载配置后仍复用已编译的模板；
+    编译结果同时写入字节码缓存目录（默认为系统临时目录），下次启动直接加载。
+
+    Args:
+        templates_dir: 模板目录
+        cache_dir: 字节码缓存目录，为空时使用 Jinja 默认的临时目录
+
+    Returns:
+        Environment: Jinja 环境
+    """
+    key = (os.path.abspath(templates_dir), cache_dir)
+    env = _ENVIRONMENTS.get(key)
+    if env is None:
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        env = Environment(
+            loader=FileSystemLoader(templates_dir),
+            autoescape=True,
+            bytecode_cache=FileSystemBytecodeCache(cache_dir),
+        )
+        _ENVIRONMENTS[key] = env
+    return env
+
+
+def precompile_templates(env: Environment, template_names: Iterable[Optional[str]]) -> Dict[str, str]:
+    """
+    预先编译模板
+
+    Args:
+        env: Jinja 环境
+        template_names: 模板文件名，空值会被忽略
+
+    Returns:
+        Dict[str, str]: 编译失败的模板及错误信息
+    """
+    errors = {}
+    for name in sorted({name for name in template_names if name}):
+        try:
+            env.get_template(name)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+    return errors
+
+
+def compile_config_templates(config: Config, templates_dir: str) -> Dict[str, str]:
+    """
+    编译配置中引用的所有邮件模板（收件人模板、默认模板和摘要模板）
+
+    Args:
+        config: 应用配置
+        templates_dir: 模板目录
+
+    Returns:
+        Dict[str, str]: 编译失败的模板及错误信息，未启用邮件通知时为空
+    """
+    smtp_config = config.smtp_config
+    if "email" not in config.notification_types or not smtp_config:
+        return {}
+    env = get_environment(templates_dir, smtp_config.template_cache_dir)
+    recipients = config.recipients
+    if isinstance(recipients, RecipientTable):
+        # 列式表直接读取模板列，不为每一行构造收件人对象
+        template_names = list(recipients.template_files)
+    else:
+        template_names = [recipient.template_file for recipient in recipients]
+    template_names.append(smtp_config.default_template_file)
+    if config.digest_config.enabled:
+        template_names.append(config.digest_config.template_file)
+    return precompile_templates(env, template_names)
@@ -1,10 +1,26 @@
 """
 测试配置文件
 """
+import os
+from datetime import date
+from unittest.mock import AsyncMock
 import pytest
 from pathlib import Path
 import yaml
-from src.core.config import Config, Recipient, SMTPConfig
+from src.core.config import CONFIG_CACHE_ENV, Config, Recipient, SMTPConfig
+from src.main import BirthdayReminder
+
+
+@pytest.fixture(autouse=True, scope="session")
+def config_cache_dir(tmp_path_factory):
+    """配置快照写入临时目录，不污染用户缓存"""
+    previous = os.environ.get(CONFIG_CACHE_ENV)
+    os.environ[CONFIG_CACHE_ENV] = str(tmp_path_factory.mktemp("config-cache"))
+    yield os.environ[CONFIG_CACHE_ENV]
+    if previous is None:
+        os.environ.pop(CONFIG_CACHE_ENV, None)
+    else:
+        os.environ[CONFIG_CACHE_ENV] = previous
 
 
 @pytest.fixture
@@ -24,3 +40,43 @@ def test_recipients(test_config):
 def test_templates_dir():
     """获取模板目录路径"""
     return str(Path(__file__).parent.parent / "templates")
+
+
+@pytest.fixture
+def birthday_today():
+    """今天过阳历生日的出生日期，出生年 2000 为闰年，2 月 29 日也有效"""
+    return date.today().replace(year=2000).isoformat()
+
+
+@pytest.fixture
+def write_config(tmp_path, birthday_today):
+    """
+    把配置模板写入临时目录下的 config.yml
+
+    模板中的 {birthday} 替换为今天的生日，{tmp_path} 替换为临时目录，其余占位符由关键字参数提供。
+    """
+    path = tmp_path / "config.yml"
+
+    def write(template: str, **values) -> Path:
+        path.write_text(template.format(birthday=birthday_today, tmp_path=tmp_path, **values), encoding="utf-8")
+        return path
+
+    return write
+
+
+@pytest.fixture
+def make_reminder(write_config):
+    """
+    按配置模板创建提醒应用
+
+    mock_send 为真时所有发送器的 send 和 send_digest 替换为 AsyncMock，不会真正发送。
+    """
+    def make(template: str, mock_send: bool = True, **values) -> BirthdayReminder:
+        reminder = BirthdayReminder(str(write_config(template, **values)))
+        if mock_send:
+            for sender in reminder.notification_senders:
+                sender.send = AsyncMock()
+                sender.send_digest = AsyncMock()
+        return reminder
+
+    return make
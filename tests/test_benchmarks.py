@@ -0,0 +1,70 @@
+"""
+基准测试工具的测试
+"""
+import json
+import os
+from pathlib import Path
+from benchmarks.bench_checker import compare, parse_sizes, run_benchmarks
+from benchmarks.bench_latency import run_benchmarks as run_latency_benchmarks
+from benchmarks.generate import generate_recipients, write_config
+from src.core.config import CONFIG_CACHE_ENV, Config
+
+
+def test_generate_recipients_is_deterministic():
+    """测试相同参数生成相同的收件人"""
+    assert generate_recipients(50, seed=1) == generate_recipients(50, seed=1)
+    assert generate_recipients(50, seed=1) != generate_recipients(50, seed=2)
+
+
+def test_generate_recipients_mix():
+    """测试阳历、农历和两种都有的比例以及提醒天数范围"""
+    recipients = generate_recipients(2000, solar_ratio=0.5, lunar_ratio=0.25, reminder_days=(1, 7))
+    solar_only = sum(1 for r in recipients if "lunar_birthday" not in r)
+    lunar_only = sum(1 for r in recipients if "solar_birthday" not in r)
+
+    assert abs(solar_only / 2000 - 0.5) < 0.05
+    assert abs(lunar_only / 2000 - 0.25) < 0.05
+    assert {r["reminder_days"] for r in recipients} == set(range(1, 8))
+
+
+def test_generated_config_loads(tmp_path):
+    """测试生成的配置文件可以正常加载"""
+    path = str(tmp_path / "config.yml")
+    write_config(path, generate_recipients(20))
+    assert len(Config.from_yaml(path).recipients) == 20
+
+
+def test_parse_sizes_and_compare():
+    """测试规模解析和基线比较"""
+    assert parse_sizes("1k, 100k,1m,500") == [1000, 100000, 1000000, 500]
+
+    baseline = {"a[1]": {"seconds": 1.0, "peak_mb": 10.0}}
+    assert compare({"a[1]": {"seconds": 1.1, "peak_mb": 10.0}}, baseline, 0.2) == []
+    assert len(compare({"a[1]": {"seconds": 1.5, "peak_mb": 20.0}}, baseline, 0.2)) == 2
+
+
+def test_compare_memory_per_recipient():
+    """测试每个收件人常驻内存的比较"""
+    baseline = {"m[1]": {"recipients": 1, "list_bytes_per_recipient": 500.0, "table_bytes_per_recipient": 150.0}}
+    current = {"m[1]": {"recipients": 1, "list_bytes_per_recipient": 500.0, "table_bytes_per_recipient": 300.0}}
+    assert compare(current, baseline, 0.2) == ["m[1]: table memory per recipient 2.00x baseline"]
+
+
+def test_committed_baseline_covers_all_benchmarks():
+    """测试仓库中的基线包含默认规模下的所有基准，避免新增或改名的基准无法比较"""
+    baseline = json.loads((Path(__file__).parent.parent / "benchmarks" / "baseline.json").read_text())
+    results = run_benchmarks([1000], "python", repeat=1, seed=0, solar_ratio=0.4, lunar_ratio=0.3,
+                             reminder_days=(0, 30))
+    assert results.keys() <= baseline["results"].keys()
+    assert {f"check_birthdays_warm[{size}]" for size in parse_sizes("1k,100k")} <= baseline["results"].keys()
+
+
+def test_latency_benchmark_runs_each_mode():
+    """测试发送延迟基准在各执行模式下发送相同数量的提醒，并恢复配置快照目录"""
+    cache_dir = os.environ.get(CONFIG_CACHE_ENV)
+    results = run_latency_benchmarks([300], ["inline", "thread"], workers=2, io_ms=1.0, seed=0)
+
+    inline, thread = results["send_latency_inline[300]"], results["send_latency_thread[300]"]
+    assert inline["sends"] == thread["sends"] > 0
+    assert thread["loop_lag_max_ms"] >= 0
+    assert os.environ.get(CONFIG_CACHE_ENV) == cache_dir
@@ -0,0 +1,145 @@
+"""
+测试生日检查器
+"""
+from datetime import date, datetime
+from unittest.mock import patch
+from lunar_python import Solar
+from src.core.almanac import get_day_context, clear_day_context_cache, _build_day_context
+from src.core.birthday_index import BirthdayIndex, BirthdayMatch
+from src.core.checker import BirthdayChecker
+from src.core.config import Recipient
+from src.core.lunar_table import LunarTable
+
+
+def test_day_context_matches_lunar_python():
+    """测试黄历信息与 lunar_python 直接计算的结果一致"""
+    solar = Solar.fromYmd(2024, 2, 10)
+    lunar = solar.getLunar()
+
+    context = get_day_context(date(2024, 2, 10))
+
+    assert context.gz_year == lunar.getYearInGanZhi()
+    assert context.gz_day == lunar.getDayInGanZhi()
+    assert context.lunar_month == f"{lunar.getMonthInChinese()}月"
+    assert context.lunar_day == lunar.getDayInChinese()
+    assert context.lunar_festival == '、'.join(lunar.getFestivals())
+    assert context.week_name == solar.getWeekInChinese()
+    assert context.constellation == solar.getXingZuo()
+
+
+def test_day_context_is_cached_by_date():
+    """测试同一日期只计算一次"""
+    clear_day_context_cache()
+
+    first = get_day_context(datetime(2024, 5, 1, 8, 30))
+    second = get_day_context(date(2024, 5, 1))
+
+    assert first is second
+    assert _build_day_context.cache_info().misses == 1
+
+
+def test_check_birthdays_shares_day_context():
+    """测试所有收件人的结果使用相同的当天信息"""
+    today = datetime.now()
+    recipients = [
+        Recipient(name="A", solar_birthday=today.strftime("%Y-%m-%d"), reminder_days=0),
+        Recipient(name="B", solar_birthday="1990-01-01", reminder_days=0),
+    ]
+
+    results = BirthdayChecker().check_birthdays(recipients)
+
+    expected = get_day_context(today).as_dict()
+    for _, _, extra_info in results:
+        for key, value in expected.items():
+            assert extra_info[key] == value
+    assert results[0][1] is True
+
+
+def test_birthday_index_buckets_by_reminder_days():
+    """测试索引按提前提醒天数分桶匹配"""
+    index = BirthdayIndex()
+    index.add(0, 0, solar=(1990, 3, 5))
+    index.add(1, 3, solar=(1985, 3, 5))
+    index.add(2, 1, solar=(2000, 3, 8))
+
+    matches = index.match(date(2024, 3, 3), lambda d: (0, 0))
+
+    assert list(matches) == [1]
+    assert matches[1] == BirthdayMatch(True, False, 2, 39)
+
+
+def test_birthday_index_prefers_lunar_result():
+    """测试阳历农历同时命中时以农历的距离天数为准"""
+    index = BirthdayIndex()
+    index.add(0, 5, solar=(1990, 1, 3), lunar=(1990, 11, 22))
+
+    lunar_days = {date(2024, 1, 1): (11, 20), date(2024, 1, 2): (11, 21), date(2024, 1, 3): (11, 22)}
+    matches = index.match(date(2024, 1, 1), lambda d: lunar_days.get(d, (11, 23)))
+
+    assert matches[0] == BirthdayMatch(True, True, 2, 34)
+
+
+def test_birthday_index_between_merges_buckets():
+    """测试日期范围查询合并各个提醒天数桶，按编号排序，并在添加收件人后重新合并"""
+    index = BirthdayIndex()
+    index.add(0, 3, solar=(1990, 3, 5))
+    index.add(1, 0, lunar=(1985, 1, 1))
+    index.add(2, 0, solar=(2000, 3, 5), lunar=(2000, 1, 2))
+    lunar_days = {date(2024, 3, 5): (1, 1), date(2024, 3, 6): (1, 2)}
+    start, end = date(2024, 3, 5), date(2024, 3, 6)
+
+    occurrences = index.between(start, end, lambda d: lunar_days[d])
+    assert [(o.day.day, o.rid, o.solar_match, o.lunar_match, o.age) for o in occurrences] == [
+        (5, 0, True, False, 34), (5, 1, False, True, 39), (5, 2, True, False, 24), (6, 2, False, True, 24),
+    ]
+
+    index.add(3, 7, solar=(1999, 3, 6))
+    assert [o.rid for o in index.between(start, end, lambda d: lunar_days[d])] == [0, 1, 2, 2, 3]
+
+
+def test_find_birthdays_only_returns_matches():
+    """测试只返回命中的收件人"""
+    today = date(2024, 3, 3)
+    recipients = [
+        Recipient(name="A", solar_birthday="1990-03-10", reminder_days=3),
+        Recipient(name="B", solar_birthday="1990-03-05", reminder_days=3),
+        Recipient(name="C", lunar_birthday="1990-01-23", reminder_days=0),
+    ]
+
+    matches = BirthdayChecker().find_birthdays(recipients, today)
+
+    assert [(r.name, info['days_until']) for r, info in matches] == [("B", 2), ("C", 0)]
+    assert matches[0][1]['age'] == 34
+
+
+def test_iter_birthdays_builds_extra_info_only_for_matches():
+    """测试逐个返回命中，未命中的收件人不会生成额外信息"""
+    today = date(2024, 3, 3)
+    recipients = [Recipient(name=f"P{i}", solar_birthday="1990-07-01") for i in range(1000)]
+    recipients[10] = Recipient(name="B", solar_birthday="1990-03-03")
+    recipients[900] = Recipient(name="C", solar_birthday="1991-03-04", reminder_days=1)
+    checker = BirthdayChecker()
+
+    with patch.object(checker, "_build_extra_info", wraps=checker._build_extra_info) as build, \
+            patch.object(checker, "_base_extra_info", wraps=checker._base_extra_info) as base:
+        matches = checker.iter_birthdays(recipients, today)
+        first = next(matches)
+        assert first[0].name == "B"
+        assert build.call_count == 1
+        assert [r.name for r, _ in matches] == ["C"]
+
+    assert build.call_count == 2
+    assert base.call_count == 2
+
+
+def test_lunar_table_matches_lunar_python():
+    """测试农历查找表与 lunar_python 的转换结果一致"""
+    table = LunarTable(2023, 2024)
+
+    for day in [date(2023, 1, 21), date(2023, 1, 22), date(2023, 4, 20), date(2024, 12, 31)]:
+        lunar = Solar.fromYmd(day.year, day.month, day.day).getLunar()
+        assert table.month_day(day) == (lunar.getMonth(), lunar.getDay())
+
+    # 2023 年有闰二月
+    assert table.lookup(date(2023, 4, 1)) == (2, 11, True)
+    assert not table.covers(date(2025, 1, 1))
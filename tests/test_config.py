@@ -0,0 +1,118 @@
+"""
+测试配置加载
+"""
+import pytest
+from datetime import date
+from unittest.mock import patch
+from src.core.config import CONFIG_CACHE_ENV, Config, Recipient, default_cache_dir
+
+
+def test_recipient_parses_birthdays(test_recipients):
+    """测试收件人生日在加载时解析为整数"""
+    zhangsan = test_recipients[0]
+    assert zhangsan.solar_ymd == (1990, 1, 1)
+    assert zhangsan.lunar_ymd == (1989, 12, 5)
+
+    recipient = Recipient(name="A", solar_birthday="1990-05-15", lunar_birthday=date(1988, 3, 20))
+    assert recipient.solar_ymd == (1990, 5, 15)
+    assert recipient.lunar_ymd == (1988, 3, 20)
+
+
+def test_recipient_rejects_invalid_birthday():
+    """测试无效的生日格式在加载时报错"""
+    with pytest.raises(ValueError, match="solar_birthday"):
+        Recipient(name="A", solar_birthday="1990-02-30")
+
+
+def test_recipient_zodiac_is_cached():
+    """测试生肖按收件人缓存"""
+    recipient = Recipient(name="A", solar_birthday="1990-05-15", lunar_birthday="1988-03-20")
+
+    assert recipient.zodiac == "龙"
+    assert recipient.__dict__["zodiac"] == "龙"
+
+
+def _write_config(path, name="张三"):
+    path.write_text(
+        "notification:\n"
+        "  serverchan:\n"
+        "    default_sckey: key\n"
+        "  start_notification: serverchan\n"
+        "recipients:\n"
+        f"  - name: {name}\n"
+        "    solar_birthday: 1990-01-01\n",
+        encoding="utf-8",
+    )
+
+
+def test_from_yaml_reuses_snapshot(tmp_path):
+    """测试文件未变化时直接加载快照，不再解析 YAML"""
+    config_path = tmp_path / "config.yml"
+    cache_dir = tmp_path / "cache"
+    _write_config(config_path)
+
+    first = Config.from_yaml(str(config_path), cache_dir=str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 1
+
+    with patch("src.core.config.yaml.load", side_effect=AssertionError("YAML parsed again")):
+        second = Config.from_yaml(str(config_path), cache_dir=str(cache_dir))
+    assert second == first
+    assert second is not first
+    assert second.recipients[0].solar_ymd == (1990, 1, 1)
+
+
+def test_from_yaml_invalidates_changed_file(tmp_path):
+    """测试文件内容变化后重新解析"""
+    config_path = tmp_path / "config.yml"
+    cache_dir = str(tmp_path / "cache")
+    _write_config(config_path)
+    Config.from_yaml(str(config_path), cache_dir=cache_dir)
+
+    _write_config(config_path, name="李四")
+    assert Config.from_yaml(str(config_path), cache_dir=cache_dir).recipients[0].name == "李四"
+
+
+def test_from_yaml_ignores_corrupt_snapshot(tmp_path):
+    """测试损坏的快照被忽略并重新生成"""
+    config_path = tmp_path / "config.yml"
+    cache_dir = tmp_path / "cache"
+    _write_config(config_path)
+    Config.from_yaml(str(config_path), cache_dir=str(cache_dir))
+    snapshot = next(cache_dir.iterdir())
+    snapshot.write_bytes(b"not a pickle")
+
+    assert Config.from_yaml(str(config_path), cache_dir=str(cache_dir)).recipients[0].name == "张三"
+    assert snapshot.read_bytes() != b"not a pickle"
+
+
+def test_config_cache_is_opt_in(tmp_path, monkeypatch):
+    """测试只有通过环境变量指定目录时才启用快照缓存，未指定时不写入快照"""
+    monkeypatch.delenv(CONFIG_CACHE_ENV, raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    assert default_cache_dir() is None
+    config_path = tmp_path / "config.yml"
+    _write_config(config_path)
+    Config.from_yaml(str(config_path))
+    assert not (tmp_path / "xdg").exists() and not (tmp_path / "home").exists()
+
+    monkeypatch.setenv(CONFIG_CACHE_ENV, "off")
+    assert default_cache_dir() is None
+    monkeypatch.setenv(CONFIG_CACHE_ENV, str(tmp_path))
+    assert default_cache_dir() == str(tmp_path)
+
+
+def test_snapshot_is_private_and_invalidated_by_code_changes(tmp_path):
+    """测试快照目录只允许当前用户访问，解析代码变化后旧快照失效"""
+    config_path = tmp_path / "config.yml"
+    cache_dir = tmp_path / "cache"
+    _write_config(config_path)
+    Config.from_yaml(str(config_path), cache_dir=str(cache_dir))
+    snapshot = next(cache_dir.iterdir())
+    assert cache_dir.stat().st_mode & 0o077 == 0
+    assert snapshot.stat().st_mode & 0o077 == 0
+
+    with patch("src.core.config._code_fingerprint", return_value="changed"), \
+            patch("src.core.config.yaml.load", side_effect=AssertionError("YAML parsed again")):
+        with pytest.raises(AssertionError, match="YAML parsed again"):
+            Config.from_yaml(str(config_path), cache_dir=str(cache_dir))
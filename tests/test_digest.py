@@ -0,0 +1,131 @@
+"""
+摘要合并测试
+"""
+from datetime import date
+from pathlib import Path
+import pytest
+from src.core.checker import BirthdayChecker
+from src.core.config import Recipient, SMTPConfig
+from src.notification.sender_email import EmailSender
+from src.notification.sender_serverchan import ServerChanSender
+
+TEMPLATES_DIR = str(Path(__file__).parent.parent / "templates")
+
+CONFIG = """\
+notification:
+  smtp:
+    host: smtp.example.com
+    port: 587
+    username: bot@example.com
+    password: secret
+    default_receive_email: team@example.com
+  serverchan:
+    default_sckey: key
+  start_notification: email,serverchan
+  digest:
+    enabled: {enabled}
+{ledger}recipients:
+  - name: 张三
+    solar_birthday: {birthday}
+  - name: 李四
+    solar_birthday: {other}
+  - name: 王五
+    solar_birthday: {birthday}
+  - name: 赵六
+    email: zhaoliu@example.com
+    solar_birthday: {birthday}
+"""
+
+
+@pytest.fixture
+def digest_reminder(make_reminder, tmp_path):
+    def make(enabled=True, ledger=False):
+        other = f"1988-{date.today().month % 12 + 1:02d}-15"
+        ledger_block = f"ledger:\n  path: {tmp_path / 'ledger.db'}\n" if ledger else ""
+        return make_reminder(CONFIG, enabled=str(enabled).lower(), ledger=ledger_block, other=other)
+
+    return make
+
+
+def _senders(reminder):
+    return {sender.channel: sender for sender in reminder.notification_senders}
+
+
+@pytest.mark.asyncio
+async def test_digest_groups_by_destination(digest_reminder):
+    """测试同一目的地的提醒合并为一条，单独的目的地仍逐条发送"""
+    reminder = digest_reminder()
+    senders = _senders(reminder)
+    await reminder.run()
+
+    email, serverchan = senders["email"], senders["serverchan"]
+    email.send_digest.assert_awaited_once()
+    digest = email.send_digest.await_args.kwargs
+    assert digest["destination"] == "team@example.com"
+    assert [r.name for r, _ in digest["entries"]] == ["张三", "王五"]
+    email.send.assert_awaited_once()
+    assert email.send.await_args.kwargs["recipient"].name == "赵六"
+
+    serverchan.send_digest.assert_awaited_once()
+    assert serverchan.send_digest.await_args.kwargs["destination"] == "key"
+    assert len(serverchan.send_digest.await_args.kwargs["entries"]) == 3
+    serverchan.send.assert_not_awaited()
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_digest_disabled_sends_individually(digest_reminder):
+    """测试未启用摘要时每条提醒单独发送"""
+    reminder = digest_reminder(enabled=False)
+    senders = _senders(reminder)
+    await reminder.run()
+
+    for sender in senders.values():
+        sender.send_digest.assert_not_awaited()
+        assert sender.send.await_count == 3
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_digest_respects_ledger(digest_reminder):
+    """测试摘要发送成功后记入台账，再次运行不会重复发送"""
+    reminder = digest_reminder(ledger=True)
+    senders = _senders(reminder)
+    await reminder.run()
+    await reminder.run()
+
+    senders["email"].send_digest.assert_awaited_once()
+    senders["email"].send.assert_awaited_once()
+    senders["serverchan"].send_digest.assert_awaited_once()
+    await reminder.close()
+
+
+def _entries():
+    today = date(2024, 6, 1)
+    checker = BirthdayChecker()
+    recipients = [
+        Recipient(name="张三", solar_birthday="1990-06-01"),
+        Recipient(name="李四", solar_birthday="1985-06-03", reminder_days=3),
+    ]
+    return checker.find_birthdays(recipients, today)
+
+
+def test_email_render_digest():
+    """测试邮件摘要模板列出每位收件人"""
+    sender = EmailSender(
+        SMTPConfig(host="smtp.example.com", port=587, username="bot", password="secret"), TEMPLATES_DIR
+    )
+    content = sender.render_digest(_entries(), "birthday_digest.html")
+
+    assert "共有 2 位" in content
+    assert "张三" in content and "今天是阳历生日" in content
+    assert "李四" in content and "2天后是阳历生日" in content
+
+
+def test_serverchan_render_digest():
+    """测试Server酱摘要每人一行"""
+    content = ServerChanSender("key").render_digest(_entries(), "")
+    lines = content.splitlines()
+
+    assert lines[0].startswith("- 张三（34岁") and lines[0].endswith("今天是阳历生日，祝生日快乐！🎉")
+    assert lines[1].startswith("- 李四（39岁") and lines[1].endswith("2天后是阳历生日！")
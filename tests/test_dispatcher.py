@@ -0,0 +1,120 @@
+"""
+测试发送调度器
+"""
+import asyncio
+import time
+import pytest
+from src.core.dispatcher import Dispatcher, TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_dispatch_bounds_channel_concurrency():
+    """测试通道并发数不超过上限"""
+    dispatcher = Dispatcher(workers=10, queue_size=5)
+    dispatcher.add_channel("email", max_concurrency=2)
+    active = peak = 0
+
+    async def handler(item):
+        nonlocal active, peak
+        async with dispatcher.limit("email"):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    assert await dispatcher.dispatch(range(10), handler) == 10
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_dispatch_channels_run_concurrently():
+    """测试不同通道互不阻塞"""
+    dispatcher = Dispatcher(workers=2)
+    dispatcher.add_channel("email", max_concurrency=1)
+    dispatcher.add_channel("serverchan", max_concurrency=1)
+    started = []
+
+    async def handler(channel):
+        async with dispatcher.limit(channel):
+            started.append(channel)
+            await asyncio.sleep(0.05)
+
+    start = time.monotonic()
+    await dispatcher.dispatch(["email", "serverchan"], handler)
+
+    assert sorted(started) == ["email", "serverchan"]
+    assert time.monotonic() - start < 0.09
+
+
+@pytest.mark.asyncio
+async def test_dispatch_queue_is_bounded():
+    """测试生产者不会超前于队列长度取出任务"""
+    dispatcher = Dispatcher(workers=1, queue_size=2)
+    produced = []
+    max_ahead = 0
+    handled = 0
+
+    def items():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    async def handler(item):
+        nonlocal max_ahead, handled
+        max_ahead = max(max_ahead, len(produced) - handled)
+        await asyncio.sleep(0)
+        handled += 1
+
+    await dispatcher.dispatch(items(), handler)
+
+    assert handled == 20
+    # 队列中的任务 + 工作协程正在处理的任务 + 生产者正在放入的任务
+    assert max_ahead <= 4
+
+
+@pytest.mark.asyncio
+async def test_dispatch_continues_after_handler_error():
+    """测试单个任务失败不影响其他任务"""
+    dispatcher = Dispatcher(workers=2)
+    handled = []
+
+    async def handler(item):
+        if item == 1:
+            raise RuntimeError("boom")
+        handled.append(item)
+
+    assert await dispatcher.dispatch(range(4), handler) == 4
+    assert sorted(handled) == [0, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_async_iterable_overlaps_production():
+    """测试异步迭代器边产生边处理"""
+    dispatcher = Dispatcher(workers=2)
+    handled = []
+    seen_while_producing = []
+
+    async def produce():
+        for item in range(3):
+            seen_while_producing.append(len(handled))
+            yield item
+            await asyncio.sleep(0.01)
+
+    async def handler(item):
+        handled.append(item)
+
+    assert await dispatcher.dispatch(produce(), handler) == 3
+    assert handled == [0, 1, 2]
+    assert seen_while_producing == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    """测试令牌桶按速率放行"""
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+
+    # 第一个令牌立即可用，之后每个间隔约 20ms
+    assert time.monotonic() - start >= 0.055
@@ -0,0 +1,61 @@
+"""
+发送台账测试
+"""
+from datetime import date
+import pytest
+from src.core.config import Recipient
+from src.core.ledger import LedgerKey, SendLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    """临时数据库中的发送台账"""
+    ledger = SendLedger(str(tmp_path / "ledger.db"), batch_size=2)
+    yield ledger
+    ledger.close()
+
+
+def test_ledger_key_uses_occurrence_date():
+    """测试标识中的日期是生日当天"""
+    recipient = Recipient(name="张三", email="a@example.com", solar_birthday="1990-01-05")
+    key = LedgerKey.for_send(recipient, "email", date(2024, 12, 30), 6)
+    assert key == LedgerKey("张三<a@example.com>", "email", "2025-01-05", 6)
+
+
+def test_sent_returns_only_recorded_keys(ledger):
+    """测试批量查询只返回已记录的标识"""
+    sent = LedgerKey("a", "email", "2025-01-05", 0)
+    pending = LedgerKey("a", "serverchan", "2025-01-05", 0)
+    ledger.record([sent])
+
+    assert ledger.sent([sent, pending]) == {sent}
+    assert ledger.sent([]) == set()
+
+
+@pytest.mark.asyncio
+async def test_add_batches_writes(ledger, tmp_path):
+    """测试发送记录先缓冲，达到批量大小或 flush 后写入"""
+    keys = [LedgerKey("a", "email", "2025-01-05", days) for days in range(3)]
+
+    await ledger.add(keys[0])
+    assert await ledger.sent_async(keys) == set()
+    await ledger.add(keys[1])
+    assert await ledger.sent_async(keys) == set(keys[:2])
+    await ledger.add(keys[2])
+    await ledger.flush()
+    assert await ledger.sent_async(keys) == set(keys)
+
+
+def test_close_persists_pending_keys(tmp_path):
+    """测试关闭时写入剩余记录，重新打开后仍可查询"""
+    path = str(tmp_path / "ledger.db")
+    key = LedgerKey("a", "email", "2025-01-05", 0)
+    ledger = SendLedger(path)
+    ledger._pending.append(key)
+    ledger.close()
+
+    reopened = SendLedger(path)
+    try:
+        assert reopened.sent([key]) == {key}
+    finally:
+        reopened.close()
@@ -70,13 +70,11 @@ async def test_birthday_reminder_initialization(reminder_and_checker, test_confi
 async def test_check_birthdays_no_birthdays(reminder_and_checker, test_recipients):
     """测试没有人过生日的情况"""
     reminder, mock_checker, mock_sender = reminder_and_checker
-    mock_checker.check_birthdays.return_value = [
-        (recipient, False, {}) for recipient in test_recipients
-    ]
+    mock_checker.iter_birthdays.return_value = iter([])
 
     await reminder.run()
 
-    mock_checker.check_birthdays.assert_called_once()
+    mock_checker.iter_birthdays.assert_called_once_with(test_recipients)
     mock_sender.render_content.assert_not_called()
     mock_sender.send.assert_not_called()
 
@@ -85,14 +83,11 @@ async def test_check_birthdays_no_birthdays(reminder_and_checker, test_recipient
 async def test_check_birthdays_with_birthday(reminder_and_checker, test_recipients, mock_extra_info):
     """测试有人过生日的情况"""
     reminder, mock_checker, mock_sender = reminder_and_checker
-    mock_checker.check_birthdays.return_value = [
-        (test_recipients[0], True, mock_extra_info),
-        (test_recipients[1], False, {})
-    ]
+    mock_checker.iter_birthdays.return_value = iter([(test_recipients[0], mock_extra_info)])
 
     await reminder.run()
 
-    mock_checker.check_birthdays.assert_called_once()
+    mock_checker.iter_birthdays.assert_called_once()
     mock_sender.render_content.assert_called_once_with(
         name=test_recipients[0].name,
         template_file=test_recipients[0].template_file,
@@ -142,7 +137,7 @@ async def test_error_handling_config_load():
 async def test_error_handling_birthday_check(reminder_and_checker):
     """测试生日检查错误处理"""
     reminder, mock_checker, _ = reminder_and_checker
-    mock_checker.check_birthdays.side_effect = Exception("Check error")
+    mock_checker.iter_birthdays.side_effect = Exception("Check error")
 
     with pytest.raises(Exception):
         await reminder.run()
@@ -189,3 +184,77 @@ def test_check_birthdays_method(reminder_and_checker, test_recipients):
 
     assert results == expected_results
     mock_checker.check_birthdays.assert_called_once_with(test_recipients)
+
+
+@pytest.mark.asyncio
+async def test_serve_stops_on_sigterm(reminder_and_checker):
+    """测试常驻模式收到 SIGTERM 后优雅退出"""
+    import os
+    import signal
+    reminder, _, mock_sender = reminder_and_checker
+    mock_sender.close = AsyncMock()
+
+    loop = asyncio.get_running_loop()
+    loop.call_later(0.05, os.kill, os.getpid(), signal.SIGTERM)
+    await asyncio.wait_for(reminder.serve(["08:00"]), timeout=2)
+
+    mock_sender.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_run_skips_reminders_in_ledger(reminder_and_checker, test_recipients, mock_extra_info, tmp_path):
+    """测试启用发送台账后，重复运行不会重复发送"""
+    from dataclasses import replace
+    from src.core.ledger import SendLedger
+    reminder, mock_checker, mock_sender = reminder_and_checker
+    mock_sender.channel = "email"
+    reminder._snapshot = replace(reminder._snapshot, ledger=SendLedger(str(tmp_path / "ledger.db")))
+    mock_checker.iter_birthdays.side_effect = lambda recipients: iter([(test_recipients[0], mock_extra_info)])
+
+    await reminder.run()
+    await reminder.run()
+
+    mock_sender.send.assert_called_once()
+    reminder.ledger.close()
+
+
+@pytest.mark.asyncio
+async def test_run_records_metrics(reminder_and_checker, test_recipients, mock_extra_info, tmp_path):
+    """测试运行结束后记录发送指标并写入文本文件"""
+    from src.core import metrics
+    reminder, mock_checker, mock_sender = reminder_and_checker
+    mock_sender.channel = "metrics-test"
+    reminder.config.metrics_config.textfile = str(tmp_path / "birthdayrs.prom")
+    mock_checker.iter_birthdays.return_value = iter([(test_recipients[0], mock_extra_info)])
+
+    before = metrics.SENDS_TOTAL.get(channel="metrics-test", result="success")
+    await reminder.run()
+
+    assert metrics.SENDS_TOTAL.get(channel="metrics-test", result="success") - before == 1
+    text = (tmp_path / "birthdayrs.prom").read_text(encoding="utf-8")
+    assert 'birthdayrs_sends_total{channel="metrics-test",result="success"}' in text
+    assert 'birthdayrs_stage_duration_seconds_count{stage="check"}' in text
+
+
+@pytest.mark.asyncio
+async def test_run_sends_before_check_finishes(reminder_and_checker, test_recipients, mock_extra_info):
+    """测试检查和发送流水线化：第一个命中在检查器产生下一个命中之前就交给发送"""
+    reminder, mock_checker, _ = reminder_and_checker
+    handled = []
+    handled_before_second = []
+
+    def matches(recipients):
+        yield test_recipients[0], mock_extra_info
+        handled_before_second.append(list(handled))
+        yield test_recipients[1], mock_extra_info
+
+    async def send_birthday_reminder(recipient, extra_info, snapshot=None):
+        handled.append(recipient.name)
+
+    mock_checker.iter_birthdays.side_effect = matches
+    reminder.send_birthday_reminder = send_birthday_reminder
+
+    await reminder.run()
+
+    assert handled_before_second == [[test_recipients[0].name]]
+    assert handled == [r.name for r in test_recipients[:2]]
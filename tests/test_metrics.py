@@ -0,0 +1,120 @@
+"""
+运行指标测试
+"""
+import asyncio
+import pytest
+from src.core.metrics import MetricsRegistry, SEND_RETRIES_TOTAL, SEND_SECONDS, start_metrics_server
+from src.notification.notification_base import timed_delivery
+from src.notification.sender_email import retry_on_failure
+
+
+@pytest.fixture
+def registry():
+    """独立的指标注册表"""
+    return MetricsRegistry()
+
+
+def test_counter_and_gauge_render(registry):
+    """测试计数器和数值的文本格式"""
+    sends = registry.counter("sends_total", "Sends", ("channel", "result"))
+    found = registry.gauge("found", "Found")
+    sends.inc(channel="email", result="success")
+    sends.inc(2, channel="email", result="success")
+    found.set(5)
+
+    text = registry.render()
+    assert "# TYPE sends_total counter" in text
+    assert 'sends_total{channel="email",result="success"} 3' in text
+    assert "found 5" in text
+    with pytest.raises(ValueError):
+        sends.inc(channel="email")
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    """测试直方图分桶累计计数、总和和次数"""
+    latency = registry.histogram("latency_seconds", "Latency", ("channel",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, channel="email")
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{channel="email",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{channel="email",le="1"} 2' in text
+    assert 'latency_seconds_bucket{channel="email",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{channel="email"} 5.55' in text
+    assert latency.count(channel="email") == 3
+
+
+def test_write_textfile(registry, tmp_path):
+    """测试写入 Prometheus 文本文件"""
+    registry.counter("runs_total", "Runs").inc()
+    path = tmp_path / "metrics" / "birthdayrs.prom"
+    registry.write_textfile(str(path))
+    assert path.read_text(encoding="utf-8") == registry.render()
+    assert [p.name for p in path.parent.iterdir()] == ["birthdayrs.prom"]
+
+
+@pytest.mark.asyncio
+async def test_metrics_server(registry):
+    """测试指标端点返回文本格式，其他路径返回 404"""
+    registry.counter("runs_total", "Runs").inc()
+    server = await start_metrics_server("127.0.0.1", 0, registry)
+    port = server.sockets[0].getsockname()[1]
+
+    async def get(path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        return response.decode()
+
+    try:
+        assert "runs_total 1" in await get("/metrics")
+        assert (await get("/other")).startswith("HTTP/1.1 404")
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_retry_on_failure_counts_retries():
+    """测试重试装饰器按通道记录重试次数"""
+    class FlakySender:
+        channel = "test-retry"
+
+        def __init__(self):
+            self.calls = 0
+
+        @retry_on_failure(max_retries=3, delay=0)
+        async def send(self):
+            self.calls += 1
+            if self.calls < 3:
+                raise ConnectionError("relay unavailable")
+
+    before = SEND_RETRIES_TOTAL.get(channel="test-retry")
+    await FlakySender().send()
+    assert SEND_RETRIES_TOTAL.get(channel="test-retry") - before == 2
+
+
+@pytest.mark.asyncio
+async def test_send_duration_times_each_attempt():
+    """测试发送耗时按每次投递记录，不包括重试之间的等待"""
+    class FlakySender:
+        channel = "test-timed"
+
+        def __init__(self):
+            self.calls = 0
+
+        @retry_on_failure(max_retries=2, delay=0.2)
+        async def send(self):
+            await self.deliver()
+
+        @timed_delivery
+        async def deliver(self):
+            self.calls += 1
+            if self.calls < 2:
+                raise ConnectionError("relay unavailable")
+
+    count, total = SEND_SECONDS.count(channel="test-timed"), SEND_SECONDS.total(channel="test-timed")
+    await FlakySender().send()
+    assert SEND_SECONDS.count(channel="test-timed") - count == 2
+    assert SEND_SECONDS.total(channel="test-timed") - total < 0.2
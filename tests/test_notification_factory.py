@@ -4,7 +4,7 @@
 import pytest
 from unittest.mock import Mock, patch
 from src.core.notification_factory import NotificationFactory
-from src.core.config import Config
+from src.core.config import CircuitBreakerConfig, Config
 
 
 class TestNotificationFactory:
@@ -18,7 +18,7 @@ class TestNotificationFactory:
     def test_create_senders_empty_config(self):
         """测试创建空的发送器列表"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = []
 
         senders = factory.create_senders(mock_config)
@@ -28,7 +28,7 @@ class TestNotificationFactory:
     def test_create_email_sender(self, mock_email_sender):
         """测试创建邮件发送器"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = ["email"]
         mock_config.smtp_config = Mock()
         mock_config.serverchan_config = None
@@ -46,7 +46,7 @@ class TestNotificationFactory:
     def test_create_serverchan_sender(self, mock_serverchan_sender):
         """测试创建ServerChan发送器"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = ["serverchan"]
         mock_config.smtp_config = None
         mock_config.serverchan_config = Mock()
@@ -59,14 +59,14 @@ class TestNotificationFactory:
 
         assert len(senders) == 1
         assert senders[0] == mock_sender
-        mock_serverchan_sender.assert_called_once_with("test_key")
+        mock_serverchan_sender.assert_called_once_with("test_key", mock_config.serverchan_config)
 
     @patch('src.notification.sender_email.EmailSender')
     @patch('src.notification.sender_serverchan.ServerChanSender')
     def test_create_multiple_senders(self, mock_serverchan_sender, mock_email_sender):
         """测试创建多个发送器"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = ["email", "serverchan"]
         mock_config.smtp_config = Mock()
         mock_config.serverchan_config = Mock()
@@ -86,7 +86,7 @@ class TestNotificationFactory:
     def test_create_unknown_sender_type(self):
         """测试创建未知的发送器类型"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = ["unknown"]
         mock_config.smtp_config = None
         mock_config.serverchan_config = None
@@ -98,7 +98,7 @@ class TestNotificationFactory:
     def test_create_email_sender_without_smtp_config(self):
         """测试创建邮件发送器但没有SMTP配置"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = ["email"]
         mock_config.smtp_config = None
         mock_config.serverchan_config = None
@@ -110,7 +110,7 @@ class TestNotificationFactory:
     def test_create_serverchan_sender_without_config(self):
         """测试创建ServerChan发送器但没有配置"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = ["serverchan"]
         mock_config.smtp_config = None
         mock_config.serverchan_config = None
@@ -123,7 +123,7 @@ class TestNotificationFactory:
     def test_create_email_sender_exception(self, mock_email_sender):
         """测试创建邮件发送器时发生异常"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = ["email"]
         mock_config.smtp_config = Mock()
         mock_config.serverchan_config = None
@@ -138,7 +138,7 @@ class TestNotificationFactory:
     def test_create_serverchan_sender_exception(self, mock_serverchan_sender):
         """测试创建ServerChan发送器时发生异常"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = ["serverchan"]
         mock_config.smtp_config = None
         mock_config.serverchan_config = Mock()
@@ -153,7 +153,7 @@ class TestNotificationFactory:
     def test_create_senders_with_mixed_valid_invalid(self):
         """测试创建发送器时混合有效和无效类型"""
         factory = NotificationFactory("/test/templates")
-        mock_config = Mock()
+        mock_config = Mock(circuit_breaker_config=CircuitBreakerConfig())
         mock_config.notification_types = ["email", "unknown", "serverchan"]
         mock_config.smtp_config = Mock()
         mock_config.serverchan_config = Mock()
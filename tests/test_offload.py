@@ -0,0 +1,141 @@
+"""
+检查和渲染执行器测试
+"""
+import asyncio
+import pickle
+import threading
+import time
+from functools import partial
+import pytest
+from src.core.config import Config, ExecutorConfig, SMTPConfig
+from src.core.offload import run_check, run_render, shutdown_executors
+from src.notification.sender_email import EmailSender
+from src.notification.sender_serverchan import ServerChanSender
+
+EXTRA_INFO = {
+    "days_until": 0, "age": 30, "zodiac": "马", "constellation": "天秤座",
+    "solar_match": True, "lunar_match": False, "lunar_month": "八月", "lunar_day": "初一",
+    "week_name": "一", "solar_term": "", "lunar_festival": "", "solar_festival": "",
+}
+
+CONFIG = """\
+notification:
+  serverchan:
+    default_sckey: key
+  start_notification: serverchan
+executor:
+  mode: {mode}
+recipients:
+  - name: 张三
+    solar_birthday: {birthday}
+"""
+
+
+@pytest.fixture(autouse=True)
+def executors():
+    yield
+    shutdown_executors()
+
+
+def _email_sender(test_templates_dir):
+    smtp_config = SMTPConfig(host="smtp.example.com", port=587, username="bot", password="secret")
+    return EmailSender(smtp_config, test_templates_dir)
+
+
+def test_executor_config_validation():
+    """测试执行模式和线程数校验"""
+    with pytest.raises(ValueError):
+        ExecutorConfig(mode="fiber")
+    with pytest.raises(ValueError):
+        ExecutorConfig(workers=0)
+
+    config = Config.from_dict({
+        "notification": {"serverchan": {"default_sckey": "key"}, "start_notification": "serverchan"},
+        "executor": {"mode": "process", "workers": 2},
+        "recipients": [{"name": "张三", "solar_birthday": "1990-01-01"}],
+    })
+    assert config.executor_config == ExecutorConfig(mode="process", workers=2)
+    assert Config.from_dict({"notification": {}}).executor_config.mode == "inline"
+
+
+@pytest.mark.asyncio
+async def test_inline_runs_on_event_loop_thread():
+    """测试 inline 模式直接在事件循环线程中执行，thread 模式在其他线程中执行"""
+    loop_thread = threading.get_ident()
+    assert await run_check(ExecutorConfig(), threading.get_ident) == loop_thread
+    assert await run_render(ExecutorConfig(), threading.get_ident) == loop_thread
+
+    config = ExecutorConfig(mode="thread", workers=2)
+    check_thread = await run_check(config, threading.get_ident)
+    assert check_thread != loop_thread
+    # 检查始终在同一个专用线程中推进
+    assert await run_check(config, threading.get_ident) == check_thread
+    assert await run_render(config, threading.get_ident) != loop_thread
+
+
+def test_senders_pickle_without_connections(test_templates_dir):
+    """测试发送器只按配置序列化，反序列化后渲染结果相同"""
+    email = _email_sender(test_templates_dir)
+    restored = pickle.loads(pickle.dumps(email))
+    assert restored.smtp_config == email.smtp_config
+    assert restored.pool is not email.pool
+    assert (restored.render_content("张三", "birthday.html", EXTRA_INFO)
+            == email.render_content("张三", "birthday.html", EXTRA_INFO))
+
+    serverchan = ServerChanSender("key")
+    assert serverchan.client is not None
+    restored = pickle.loads(pickle.dumps(serverchan))
+    assert restored.sckey == "key" and restored._client is None
+    assert restored.render_content("张三", "", EXTRA_INFO) == serverchan.render_content("张三", "", EXTRA_INFO)
+
+
+@pytest.mark.asyncio
+async def test_process_render_matches_inline(test_templates_dir):
+    """测试在进程池中渲染的结果与直接渲染一致"""
+    sender = _email_sender(test_templates_dir)
+    render = partial(sender.render_content, name="张三", template_file="birthday.html", extra_info=EXTRA_INFO)
+
+    content = await run_render(ExecutorConfig(mode="process", workers=1), render)
+    assert content == render()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["inline", "thread"])
+async def test_run_sends_in_every_mode(make_reminder, mode):
+    """测试各执行模式下的发送结果相同"""
+    reminder = make_reminder(CONFIG, mode=mode)
+    await reminder.run()
+
+    sender = reminder.notification_senders[0]
+    sender.send.assert_awaited_once()
+    assert sender.send.await_args.kwargs["content"].startswith("亲爱的张三：")
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_thread_mode_keeps_event_loop_responsive(make_reminder):
+    """测试 thread 模式下检查期间事件循环仍能处理其他协程"""
+    reminder = make_reminder(CONFIG, mode="thread")
+    original = reminder.birthday_checker.iter_birthdays
+
+    def slow_iter_birthdays(recipients):
+        time.sleep(0.3)
+        yield from original(recipients)
+
+    reminder.birthday_checker.iter_birthdays = slow_iter_birthdays
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.ensure_future(ticker())
+    try:
+        await reminder.run()
+    finally:
+        task.cancel()
+    assert ticks >= 10
+    reminder.notification_senders[0].send.assert_awaited_once()
+    await reminder.close()
@@ -0,0 +1,225 @@
+"""
+发件箱测试
+"""
+import asyncio
+import os
+import signal
+from unittest.mock import AsyncMock
+import pytest
+from src.core.config import Config, OutboxConfig
+from src.core.ledger import LedgerKey
+from src.core.outbox import Outbox, backoff_delay
+from src.notification.notification_base import Envelope
+
+KEY = LedgerKey("张三<>", "serverchan", "2024-06-01", 0)
+ENVELOPE = Envelope("key", "生日提醒- 张三 - 34岁 - 0天后", "亲爱的张三：")
+
+CONFIG = """\
+notification:
+  serverchan:
+    default_sckey: key
+  start_notification: serverchan
+{ledger}outbox:
+  path: {tmp_path}/outbox.db
+  base_delay: {base_delay}
+  jitter: 0
+  max_attempts: 3
+  retry_window: {retry_window}
+recipients:
+  - name: 张三
+    solar_birthday: {birthday}
+"""
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(OutboxConfig(path=str(tmp_path / "outbox.db"), base_delay=10, jitter=0, max_attempts=3))
+    yield outbox
+    outbox.close()
+
+
+def test_backoff_delay_doubles_with_jitter():
+    """测试退避时间按次数翻倍、不超过上限，并按抖动比例随机缩短"""
+    config = OutboxConfig(base_delay=10, max_delay=60, jitter=0.5)
+    assert [backoff_delay(n, config, rand=lambda: 0.0) for n in (1, 2, 3, 4, 5)] == [10, 20, 40, 60, 60]
+    assert backoff_delay(2, config, rand=lambda: 1.0) == 10
+    assert 10 <= backoff_delay(2, config) <= 20
+
+
+def test_outbox_config_validation():
+    """测试尝试次数和抖动比例校验"""
+    with pytest.raises(ValueError):
+        OutboxConfig(max_attempts=0)
+    with pytest.raises(ValueError):
+        OutboxConfig(jitter=1.5)
+    with pytest.raises(ValueError):
+        OutboxConfig(retry_window=-1)
+    config = Config.from_dict({"notification": {}, "outbox": {"path": "outbox.db", "base_delay": 5}})
+    assert config.outbox_config == OutboxConfig(path="outbox.db", base_delay=5)
+
+
+@pytest.mark.asyncio
+async def test_messages_become_due_after_backoff(outbox):
+    """测试消息到达下一次尝试时间后才被取出"""
+    assert await outbox.put("serverchan", ENVELOPE, [KEY], "boom", now=1000)
+    assert await outbox.due(10, now=1005) == []
+
+    [message] = await outbox.due(10, now=1010)
+    assert (message.channel, message.envelope, message.ledger_keys, message.attempts) == \
+        ("serverchan", ENVELOPE, (KEY,), 1)
+    assert await outbox.pending_keys() == {KEY}
+    assert await outbox.pending_count() == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_reschedules_then_gives_up(outbox):
+    """测试重试失败后按退避时间重新安排，达到最多尝试次数后放弃"""
+    await outbox.put("serverchan", ENVELOPE, [KEY], "boom", now=0)
+    [message] = await outbox.due(10, now=10)
+    assert await outbox.failed(message, "boom", now=10)
+    assert await outbox.due(10, now=29) == []
+
+    [message] = await outbox.due(10, now=30)
+    assert message.attempts == 2
+    assert not await outbox.failed(message, "boom", now=30)
+    assert await outbox.due(10, now=10 ** 9) == []
+    assert await outbox.pending_keys() == set()
+
+
+@pytest.mark.asyncio
+async def test_outbox_survives_reopen(outbox, tmp_path):
+    """测试消息持久化，重新打开后仍可取出，投递成功后删除"""
+    await outbox.put("serverchan", ENVELOPE, [], "boom", now=0)
+    reopened = Outbox(outbox.config)
+    try:
+        [message] = await reopened.due(10, now=100)
+        assert message.envelope == ENVELOPE
+        await reopened.succeeded(message)
+        assert await reopened.due(10, now=100) == []
+    finally:
+        reopened.close()
+
+
+@pytest.fixture
+def failing_reminder(make_reminder, tmp_path):
+    """发件箱已启用、投递总是失败的提醒应用及其发送器"""
+    def make(base_delay=0, ledger=True, retry_window=0):
+        ledger_block = f"ledger:\n  path: {tmp_path / 'ledger.db'}\n" if ledger else ""
+        reminder = make_reminder(CONFIG, base_delay=base_delay, ledger=ledger_block, retry_window=retry_window)
+        sender = reminder.notification_senders[0]
+        sender.deliver = AsyncMock(side_effect=ConnectionError("down"))
+        return reminder, sender
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_failed_send_is_retried_on_next_run(failing_reminder):
+    """测试首次发送失败的消息存入发件箱，下一次运行时投递并记入台账，不会重复发送"""
+    reminder, sender = failing_reminder()
+    await reminder.run()
+    sender.send.assert_not_awaited()
+    assert sender.deliver.await_count == 1
+    assert await reminder.outbox.pending_count() == 1
+
+    sender.deliver.side_effect = None
+    await reminder.run()
+    assert sender.deliver.await_count == 2
+    assert sender.deliver.await_args_list[0] == sender.deliver.await_args_list[1]
+    assert await reminder.outbox.pending_count() == 0
+
+    await reminder.run()
+    assert sender.deliver.await_count == 2
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_retried_in_same_run(failing_reminder):
+    """测试首次发送失败、在 retry_window 内到期的消息在同一次运行中重试并记入台账"""
+    reminder, sender = failing_reminder(base_delay=0.05, retry_window=5)
+    sender.deliver.side_effect = [ConnectionError("down"), None]
+    await reminder.run()
+
+    assert sender.deliver.await_count == 2
+    assert await reminder.outbox.pending_count() == 0
+    await reminder.run()
+    assert sender.deliver.await_count == 2
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_run_does_not_wait_beyond_retry_window(failing_reminder):
+    """测试下一次重试超出 retry_window 时运行立即结束，消息留给之后的运行"""
+    reminder, sender = failing_reminder(base_delay=3600, retry_window=5)
+    await asyncio.wait_for(reminder.run(), timeout=2)
+
+    assert sender.deliver.await_count == 1
+    assert await reminder.outbox.pending_count() == 1
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_message_is_not_sent_again(failing_reminder):
+    """测试消息还未到重试时间时，重新运行不会再次发送同一提醒"""
+    reminder, sender = failing_reminder(base_delay=3600)
+    await reminder.run()
+    sender.deliver.side_effect = None
+    await reminder.run()
+
+    assert sender.deliver.await_count == 1
+    assert await reminder.outbox.pending_count() == 1
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_message_is_not_sent_again_without_ledger(failing_reminder):
+    """测试未启用发送台账时，同一天重新运行也不会再次发送仍在发件箱中的提醒"""
+    reminder, sender = failing_reminder(base_delay=3600, ledger=False)
+    await reminder.run()
+    await reminder.run()
+
+    assert sender.deliver.await_count == 1
+    assert await reminder.outbox.pending_keys()
+    await reminder.close()
+
+
+SERVE_CONFIG = """\
+notification:
+  serverchan:
+    default_sckey: key
+  start_notification: serverchan
+  retry_budget:
+    ratio: 0
+    min_retries: 2
+outbox:
+  path: {tmp_path}/outbox.db
+  base_delay: 0.05
+  jitter: 0
+  poll_interval: 0.02
+  retry_window: 0
+recipients:
+{recipients}"""
+
+
+@pytest.mark.asyncio
+async def test_serve_drains_more_messages_than_retry_budget(make_reminder):
+    """测试常驻模式下两次运行之间的每轮投递使用新的重试预算，超过 min_retries 条的失败消息都能投递"""
+    recipients = "".join(f"  - name: 收件人{i}\n    solar_birthday: {{birthday}}\n" for i in range(5))
+    reminder = make_reminder(SERVE_CONFIG.replace("{recipients}", recipients))
+    [sender] = reminder.notification_senders
+    sender.deliver = AsyncMock(side_effect=ConnectionError("down"))
+    await reminder.run()
+    assert await reminder.outbox.pending_count() == 5
+
+    sender.deliver.side_effect = None
+    serve = asyncio.ensure_future(reminder.serve(["08:00"]))
+    try:
+        for _ in range(100):
+            if not await reminder.outbox.pending_count():
+                break
+            await asyncio.sleep(0.02)
+        assert await reminder.outbox.pending_count() == 0
+        assert sender.deliver.await_count == 10
+    finally:
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(serve, timeout=2)
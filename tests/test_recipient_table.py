@@ -0,0 +1,102 @@
+"""
+列式收件人表测试
+"""
+import pickle
+from datetime import date
+import pytest
+import yaml
+from benchmarks.generate import generate_recipients, write_config
+from src.core.checker import BirthdayChecker, CheckResults
+from src.core.config import Config, Recipient
+from src.core.recipient_table import RecipientTable
+from src.core.sharding import ShardSpec
+
+
+@pytest.fixture(scope="module")
+def recipients():
+    return [Recipient(**r) for r in generate_recipients(3000, seed=3)]
+
+
+@pytest.fixture(scope="module")
+def table(recipients):
+    return RecipientTable.from_recipients(recipients)
+
+
+def test_views_match_recipients(recipients, table):
+    """测试按下标取出的视图与原收件人一致"""
+    assert len(table) == len(recipients)
+    for i in (0, 1, len(recipients) // 2, -1):
+        view, original = table[i], recipients[i]
+        assert view == original
+        assert (view.solar_ymd, view.lunar_ymd) == (original.solar_ymd, original.lunar_ymd)
+        assert view.zodiac == original.zodiac
+    assert [r.name for r in table[10:13]] == [r.name for r in recipients[10:13]]
+    with pytest.raises(IndexError):
+        table[len(table)]
+
+
+def test_add_validates_like_recipient():
+    """测试添加收件人时的校验与 Recipient 相同"""
+    table = RecipientTable()
+    table.add(name="张三", solar_birthday=date(1990, 1, 15), reminder_days=3)
+    table.add(name="李四", lunar_birthday="1985-08-15")
+    assert table[0].solar_birthday == "1990-01-15"
+    assert table[1].reminder_days is None
+
+    with pytest.raises(ValueError):
+        table.add(name="王五")
+    with pytest.raises(ValueError):
+        table.add(name="王五", solar_birthday="1990/01/15")
+    with pytest.raises(TypeError):
+        table.add(name="王五", solar_birthday="1990-01-15", unknown=1)
+    assert len(table) == 2
+
+
+def test_table_equality_and_pickle(table):
+    """测试表的相等比较和序列化（用于配置快照）"""
+    restored = pickle.loads(pickle.dumps(table))
+    assert restored == table
+    assert restored != table[:-1]
+
+
+@pytest.mark.parametrize("day", [date(2024, 2, 10), date(2024, 9, 17), date(2024, 12, 30)])
+def test_checker_accepts_table(recipients, table, day):
+    """测试检查器对列式表的结果与收件人列表一致"""
+    expected = BirthdayChecker().find_birthdays(recipients, day)
+    result = BirthdayChecker().find_birthdays(table, day)
+    assert result == expected
+
+
+def test_check_birthdays_returns_lazy_results(recipients, table):
+    """测试列式表的 check_birthdays 结果只保存命中的收件人"""
+    expected = BirthdayChecker().check_birthdays(recipients)
+    results = BirthdayChecker().check_birthdays(table)
+
+    assert isinstance(results, CheckResults)
+    assert len(results) == len(expected)
+    assert results.birthday_count == sum(1 for _, hit, _ in expected if hit)
+    assert list(results.birthdays()) == [(r, info) for r, hit, info in expected if hit]
+    assert results[5] == expected[5]
+
+
+def test_table_shard_selection(recipients, table):
+    """测试列式表按分片筛选后仍为列式表且结果一致"""
+    checker = BirthdayChecker()
+    shard = ShardSpec(1, 4)
+    selected = checker.select_shard(table, shard)
+    assert isinstance(selected, RecipientTable)
+    assert list(selected) == BirthdayChecker().select_shard(recipients, shard)
+
+
+def test_config_columnar(tmp_path):
+    """测试 checker.columnar 开启时配置生成列式表，默认值照常应用"""
+    path = str(tmp_path / "config.yml")
+    write_config(path, generate_recipients(50), checker={"columnar": True})
+    data = yaml.safe_load(open(path, encoding="utf-8"))
+
+    config = Config.from_yaml(path)
+    plain = Config.from_dict({k: v for k, v in data.items() if k != "checker"})
+    assert isinstance(config.recipients, RecipientTable)
+    assert list(config.recipients) == plain.recipients
+    # 再次加载走快照
+    assert Config.from_yaml(path).recipients == config.recipients
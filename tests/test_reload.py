@@ -0,0 +1,185 @@
+"""
+配置热重载测试
+"""
+import asyncio
+import os
+import signal
+from datetime import date
+from unittest.mock import AsyncMock
+import pytest
+from src.core import metrics
+from src.core.ledger import LedgerKey, SendLedger
+from src.main import BirthdayReminder
+
+CONFIG = """\
+notification:
+  smtp:
+    host: {smtp_host}
+    port: 587
+    username: bot@example.com
+    password: secret
+    default_template_file: birthday.html
+  serverchan:
+    default_sckey: key
+  start_notification: email,serverchan
+recipients:
+  - name: 张三
+    email: zhangsan@example.com
+    solar_birthday: {birthday}
+    reminder_days: 0
+"""
+
+
+LEDGER_CONFIG = CONFIG.replace("recipients:", "ledger:\n  path: {tmp_path}/ledger.db\nrecipients:")
+
+
+@pytest.fixture
+def config_path(write_config):
+    return write_config(CONFIG, smtp_host="smtp.example.com")
+
+
+def _senders_by_channel(reminder):
+    return {sender.channel: sender for sender in reminder.notification_senders}
+
+
+@pytest.mark.asyncio
+async def test_reload_reuses_unchanged_components(config_path, write_config):
+    """测试重新加载只重建发生变化的部分"""
+    reminder = BirthdayReminder(str(config_path))
+    old = reminder._snapshot
+    old_senders = _senders_by_channel(reminder)
+    old_senders["email"].close = AsyncMock()
+
+    write_config(CONFIG, smtp_host="smtp2.example.com")
+    await reminder.reload()
+
+    new = reminder._snapshot
+    new_senders = _senders_by_channel(reminder)
+    assert new.version == old.version + 1
+    assert new.config.smtp_config.host == "smtp2.example.com"
+    assert new.checker is old.checker
+    assert new.config.recipients is old.config.recipients
+    assert new_senders["serverchan"] is old_senders["serverchan"]
+    assert new_senders["email"] is not old_senders["email"]
+    # 没有进行中的运行，旧的邮件发送器立即关闭
+    old_senders["email"].close.assert_awaited_once()
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_in_flight_run_finishes_on_old_snapshot(config_path, write_config):
+    """测试进行中的运行继续使用旧快照，旧发送器在运行结束后才关闭"""
+    reminder = BirthdayReminder(str(config_path))
+    release = asyncio.Event()
+    started = asyncio.Event()
+
+    async def slow_send(**kwargs):
+        started.set()
+        await release.wait()
+
+    old_senders = _senders_by_channel(reminder)
+    old_email = old_senders["email"]
+    old_email.send = AsyncMock(side_effect=slow_send)
+    old_email.close = AsyncMock()
+    old_senders["serverchan"].send = AsyncMock()
+
+    run = asyncio.ensure_future(reminder.run())
+    await asyncio.wait_for(started.wait(), timeout=2)
+
+    write_config(CONFIG, smtp_host="smtp2.example.com")
+    await reminder.reload()
+    new_email = _senders_by_channel(reminder)["email"]
+    assert new_email is not old_email
+    old_email.close.assert_not_awaited()
+
+    release.set()
+    await asyncio.wait_for(run, timeout=2)
+    old_email.send.assert_awaited_once()
+    old_email.close.assert_awaited_once()
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_reload_keeps_current_snapshot(config_path):
+    """测试加载失败时保留当前快照"""
+    reminder = BirthdayReminder(str(config_path))
+    snapshot = reminder._snapshot
+
+    config_path.write_text("recipients: [", encoding="utf-8")
+    with pytest.raises(Exception):
+        await reminder.reload()
+
+    assert reminder._snapshot is snapshot
+    assert reminder.config_manager.config is snapshot.config
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_sighup_reloads_while_serving(config_path, write_config):
+    """测试常驻模式收到 SIGHUP 后重新加载配置"""
+    reminder = BirthdayReminder(str(config_path))
+    write_config(CONFIG, smtp_host="smtp2.example.com")
+
+    serve = asyncio.ensure_future(reminder.serve(["08:00"]))
+    await asyncio.sleep(0.05)
+    os.kill(os.getpid(), signal.SIGHUP)
+    for _ in range(100):
+        if reminder.config.smtp_config.host == "smtp2.example.com":
+            break
+        await asyncio.sleep(0.02)
+    assert reminder.config.smtp_config.host == "smtp2.example.com"
+
+    os.kill(os.getpid(), signal.SIGTERM)
+    await asyncio.wait_for(serve, timeout=2)
+
+
+@pytest.mark.asyncio
+async def test_in_flight_run_keeps_old_ledger(write_config, tmp_path):
+    """测试重新加载去掉发送台账后，进行中的运行仍记入旧台账，旧台账在运行结束后才关闭"""
+    reminder = BirthdayReminder(str(write_config(LEDGER_CONFIG, smtp_host="smtp.example.com")))
+    old_ledger = reminder.ledger
+    release = asyncio.Event()
+    started = asyncio.Event()
+
+    async def slow_send(**kwargs):
+        started.set()
+        await release.wait()
+
+    senders = _senders_by_channel(reminder)
+    senders["email"].send = AsyncMock(side_effect=slow_send)
+    senders["serverchan"].send = AsyncMock()
+    failures = metrics.SENDS_TOTAL.get(channel="email", result="failure")
+
+    run = asyncio.ensure_future(reminder.run())
+    await asyncio.wait_for(started.wait(), timeout=2)
+    write_config(CONFIG, smtp_host="smtp.example.com")
+    await reminder.reload()
+    assert reminder.ledger is None
+    assert not old_ledger._executor._shutdown
+
+    release.set()
+    await asyncio.wait_for(run, timeout=2)
+    assert metrics.SENDS_TOTAL.get(channel="email", result="failure") == failures
+    assert old_ledger._executor._shutdown
+    await reminder.close()
+
+    recipient = reminder.config.recipients[0]
+    keys = [LedgerKey.for_send(recipient, channel, date.today(), 0) for channel in ("email", "serverchan")]
+    ledger = SendLedger(str(tmp_path / "ledger.db"))
+    try:
+        assert ledger.sent(keys) == set(keys)
+    finally:
+        ledger.close()
+
+
+def test_build_snapshot_does_not_modify_loaded_config(config_path):
+    """测试构建快照时不修改传入的配置，命令行覆盖和沿用的收件人只出现在新快照中"""
+    reminder = BirthdayReminder(str(config_path), engine="numpy")
+    previous = reminder._snapshot
+    config = reminder._load_fresh_config()
+    snapshot = reminder._build_snapshot(config, previous)
+
+    assert config.checker_config.engine == "python"
+    assert snapshot.config.checker_config.engine == "numpy"
+    assert snapshot.config.recipients is previous.config.recipients
+    assert config.recipients is not previous.config.recipients
@@ -0,0 +1,227 @@
+"""
+熔断器和重试预算测试
+"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+import pytest
+from src.core.config import CircuitBreakerConfig, Config
+from src.core.notification_factory import NotificationFactory
+from src.core.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, circuit_protected
+from src.notification.sender_email import retry_on_failure
+from src.notification.sender_serverchan import ServerChanSender
+
+CONFIG = """\
+notification:
+  serverchan:
+    default_sckey: key
+  start_notification: serverchan
+  circuit_breaker:
+    failure_threshold: 1
+    reset_timeout: 600
+ledger:
+  path: {tmp_path}/ledger.db
+outbox:
+  path: {tmp_path}/outbox.db
+  base_delay: 0
+  jitter: 0
+recipients:
+  - name: 张三
+    solar_birthday: {birthday}
+"""
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Flaky:
+    """按熔断器执行的发送方法，failures 为剩余的失败次数"""
+
+    def __init__(self, breaker, failures):
+        self.circuit_breaker = breaker
+        self.failures = failures
+        self.calls = 0
+
+    @circuit_protected
+    async def deliver(self):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("down")
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_fails_fast():
+    """测试连续失败达到阈值后打开熔断器，之后不再调用发送"""
+    clock = _Clock()
+    sender = _Flaky(CircuitBreaker("email", failure_threshold=3, reset_timeout=30, clock=clock), failures=10)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            await sender.deliver()
+    assert sender.circuit_breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 10
+    with pytest.raises(CircuitOpenError) as excinfo:
+        await sender.deliver()
+    assert excinfo.value.retry_after == 20
+    assert sender.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_breaker_half_open_probe():
+    """测试超时后只放行一次试探，试探失败重新打开，成功则关闭"""
+    clock = _Clock()
+    breaker = CircuitBreaker("email", failure_threshold=1, reset_timeout=30, clock=clock)
+    sender = _Flaky(breaker, failures=2)
+    with pytest.raises(ConnectionError):
+        await sender.deliver()
+
+    clock.now = 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(ConnectionError):
+        await sender.deliver()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 60
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.release()
+    await sender.deliver()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert sender.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_releases_half_open():
+    """测试试探发送被取消后可以重新试探"""
+    clock = _Clock()
+    breaker = CircuitBreaker("email", failure_threshold=1, reset_timeout=1, clock=clock)
+    breaker.record_failure()
+    clock.now = 1
+
+    class _Slow:
+        circuit_breaker = breaker
+
+        @circuit_protected
+        async def deliver(self):
+            await asyncio.sleep(10)
+
+    task = asyncio.ensure_future(_Slow().deliver())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    breaker.before_call()
+
+
+def test_breaker_from_config():
+    """测试 failure_threshold 为 0 时不启用熔断器"""
+    assert CircuitBreaker.from_config("email", CircuitBreakerConfig(failure_threshold=0)) is None
+    breaker = CircuitBreaker.from_config("email", CircuitBreakerConfig(failure_threshold=2, reset_timeout=5))
+    assert (breaker.name, breaker.failure_threshold, breaker.reset_timeout) == ("email", 2, 5)
+
+
+def test_retry_budget():
+    """测试重试预算随首次发送增长，用完后拒绝重试，重置后恢复"""
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    for _ in range(4):
+        budget.record_attempt()
+    assert budget.remaining == 2
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+    budget.reset()
+    assert budget.remaining == 1
+
+
+class _RetryingSender:
+    channel = "test-budget"
+
+    def __init__(self, budget, breaker=None):
+        self.retry_budget = budget
+        self.circuit_breaker = breaker
+        self.calls = 0
+
+    @retry_on_failure(max_retries=3, delay=0)
+    async def send(self):
+        await self.deliver()
+
+    @circuit_protected
+    async def deliver(self):
+        self.calls += 1
+        raise ConnectionError("down")
+
+
+@pytest.mark.asyncio
+async def test_retry_on_failure_respects_budget_and_breaker():
+    """测试重试预算用完后不再重试，熔断器打开后立即失败"""
+    budget = RetryBudget(ratio=0, min_retries=1)
+    first, second = _RetryingSender(budget), _RetryingSender(budget)
+    with pytest.raises(ConnectionError):
+        await first.send()
+    with pytest.raises(ConnectionError):
+        await second.send()
+    assert (first.calls, second.calls) == (2, 1)
+
+    sender = _RetryingSender(RetryBudget(), CircuitBreaker("test-budget", failure_threshold=1))
+    with pytest.raises(CircuitOpenError):
+        await sender.send()
+    assert sender.calls == 1
+
+
+def test_factory_attaches_breakers_and_shared_budget(test_templates_dir):
+    """测试工厂为每个发送器创建熔断器，并共享同一个重试预算"""
+    config = Config.from_dict({
+        "notification": {
+            "smtp": {"host": "smtp.example.com", "port": 587, "username": "bot", "password": "secret"},
+            "serverchan": {"default_sckey": "key"},
+            "start_notification": "email,serverchan",
+            "circuit_breaker": {"failure_threshold": 2},
+        },
+    })
+    budget = RetryBudget()
+    email, serverchan = NotificationFactory(test_templates_dir, budget).create_senders(config)
+
+    assert email.retry_budget is budget and serverchan.retry_budget is budget
+    assert email.circuit_breaker is not serverchan.circuit_breaker
+    assert (email.circuit_breaker.name, serverchan.circuit_breaker.failure_threshold) == ("email", 2)
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_postpones_outbox_retries(make_reminder):
+    """测试熔断器打开时发件箱中的消息被推迟，不计入尝试次数"""
+    reminder = make_reminder(CONFIG, mock_send=False)
+    [sender] = reminder.notification_senders
+    assert isinstance(sender, ServerChanSender)
+    sender._client = Mock(post=AsyncMock(side_effect=ConnectionError("down")), is_closed=False, aclose=AsyncMock())
+
+    await reminder.run()
+    assert sender.circuit_breaker.state == CircuitBreaker.OPEN
+    await reminder.run()
+
+    assert sender._client.post.await_count == 1
+    [message] = await reminder.outbox.due(10, now=10 ** 10)
+    assert message.attempts == 1
+    await reminder.close()
+
+
+@pytest.mark.asyncio
+async def test_short_circuited_send_is_not_counted_as_attempt(make_reminder):
+    """测试首次发送被熔断器拦下时存入发件箱，但不计入尝试次数"""
+    reminder = make_reminder(CONFIG, mock_send=False)
+    [sender] = reminder.notification_senders
+    sender._client = Mock(post=AsyncMock(), is_closed=False, aclose=AsyncMock())
+    sender.circuit_breaker.record_failure()
+
+    await reminder.run()
+
+    sender._client.post.assert_not_awaited()
+    [message] = await reminder.outbox.due(10, now=10 ** 10)
+    assert message.attempts == 0
+    await reminder.close()
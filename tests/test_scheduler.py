@@ -0,0 +1,48 @@
+"""
+测试每日定时调度
+"""
+import asyncio
+from datetime import datetime, time, timedelta
+from unittest.mock import patch
+import pytest
+from src.core.scheduler import DailyScheduler, next_run_time, parse_times
+
+
+def test_parse_times_sorts_and_deduplicates():
+    """测试解析触发时间"""
+    assert parse_times(["20:30", "08:00", "8:00"]) == [time(8, 0), time(20, 30)]
+
+    with pytest.raises(ValueError, match="HH:MM"):
+        parse_times(["25:00"])
+    with pytest.raises(ValueError):
+        parse_times([])
+
+
+def test_next_run_time():
+    """测试计算下一次触发时间"""
+    times = [time(8, 0), time(20, 0)]
+
+    assert next_run_time(datetime(2024, 3, 3, 7, 0), times) == datetime(2024, 3, 3, 8, 0)
+    assert next_run_time(datetime(2024, 3, 3, 8, 0), times) == datetime(2024, 3, 3, 20, 0)
+    assert next_run_time(datetime(2024, 3, 3, 21, 0), times) == datetime(2024, 3, 4, 8, 0)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_job_until_stopped():
+    """测试到达触发时间后执行任务，收到停止信号后退出"""
+    stop = asyncio.Event()
+    calls = []
+
+    async def job():
+        calls.append(datetime.now())
+        if len(calls) == 2:
+            stop.set()
+        raise RuntimeError("job errors are logged, not raised")
+
+    def fake_next_run_time(now, times):
+        return datetime.now() + timedelta(milliseconds=20)
+
+    with patch("src.core.scheduler.next_run_time", side_effect=fake_next_run_time):
+        await asyncio.wait_for(DailyScheduler([time(8, 0)]).run(job, stop), timeout=2)
+
+    assert len(calls) == 2
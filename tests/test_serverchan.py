@@ -0,0 +1,93 @@
+"""
+测试Server酱发送器
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.core.config import Recipient, ServerChanConfig
+from src.notification.sender_serverchan import ServerChanSender
+
+
+class _ServerChanHandler(BaseHTTPRequestHandler):
+    """模拟Server酱接口，记录连接数和请求路径"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.paths.append(self.path)
+        body = json.dumps({"code": 0}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def serverchan_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ServerChanHandler)
+    server.connections = 0
+    server.paths = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_serverchan_reuses_connection(serverchan_server):
+    """测试多次推送复用同一个长连接"""
+    host, port = serverchan_server.server_address
+    config = ServerChanConfig(default_sckey="SCKEY", base_url=f"http://{host}:{port}")
+    sender = ServerChanSender("SCKEY", config)
+    recipient = Recipient(name="张三", solar_birthday="1990-01-01")
+
+    try:
+        for _ in range(3):
+            await sender.send(recipient, "content", days_until=0, age=34)
+    finally:
+        await sender.close()
+
+    assert serverchan_server.paths == ["/SCKEY.send"] * 3
+    assert serverchan_server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_serverchan_close_releases_client():
+    """测试关闭后重新使用会创建新的客户端"""
+    sender = ServerChanSender("SCKEY")
+    client = sender.client
+    assert sender.client is client
+
+    await sender.close()
+
+    assert client.is_closed
+    assert sender.client is not client
+    await sender.close()
+
+
+@pytest.mark.asyncio
+async def test_deliver_uses_envelope_destination(serverchan_server):
+    """测试发件箱中的消息推送到消息记录的 sckey"""
+    host, port = serverchan_server.server_address
+    config = ServerChanConfig(default_sckey="SCKEY", base_url=f"http://{host}:{port}")
+    sender = ServerChanSender("SCKEY", config)
+    recipient = Recipient(name="张三", solar_birthday="1990-01-01")
+
+    envelope = sender.envelope(recipient, "content", days_until=0, age=34)
+    assert envelope == ("SCKEY", "生日提醒- 张三 - 34岁 - 0天后", "content")
+    try:
+        await sender.deliver(envelope._replace(destination="OLDKEY"))
+    finally:
+        await sender.close()
+    assert serverchan_server.paths == ["/OLDKEY.send"]
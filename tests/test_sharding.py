@@ -0,0 +1,113 @@
+"""
+收件人分片测试
+"""
+from datetime import date
+import pytest
+import yaml
+from benchmarks.generate import generate_recipients
+from src.core.checker import BirthdayChecker
+from src.core.config import Config, Recipient
+from src.core.config_manager import ConfigManager
+from src.core.sharding import ShardSpec, filter_recipients, shard_of
+
+
+@pytest.fixture(scope="module")
+def recipients():
+    return [Recipient(**r) for r in generate_recipients(2000, seed=7)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 7, 16])
+def test_shards_cover_all_recipients_without_overlap(recipients, count):
+    """测试各分片互不重叠且合起来覆盖全部收件人"""
+    shards = [filter_recipients(recipients, ShardSpec(i, count)) for i in range(count)]
+
+    seen = [id(r) for shard in shards for r in shard]
+    assert len(seen) == len(set(seen))
+    assert sorted(seen) == sorted(id(r) for r in recipients)
+    if count > 1:
+        assert all(shards)
+
+
+def test_shard_assignment_is_stable():
+    """测试分片结果只取决于姓名和邮箱"""
+    assert shard_of("张三", "zhangsan@example.com", 4) == shard_of("张三", "zhangsan@example.com", 4)
+    assert shard_of("张三", None, 4) == shard_of("张三", "", 4)
+    assert shard_of("张三", "zhangsan@example.com", 1) == 0
+    # 固定值，防止哈希方式被无意修改导致节点间分配不一致
+    assert [shard_of(f"user{i}", None, 5) for i in range(8)] == [4, 4, 0, 0, 3, 2, 1, 4]
+
+
+@pytest.mark.parametrize("value, expected", [("0/1", ShardSpec(0, 1)), ("3/4", ShardSpec(3, 4))])
+def test_parse_shard(value, expected):
+    """测试解析 i/N 格式"""
+    assert ShardSpec.parse(value) == expected
+    assert str(ShardSpec.parse(value)) == value
+
+
+@pytest.mark.parametrize("value", ["", "1", "4/4", "-1/4", "0/0", "a/b", "1/2/3"])
+def test_parse_invalid_shard(value):
+    """测试非法分片说明"""
+    with pytest.raises(ValueError):
+        ShardSpec.parse(value)
+
+
+def test_from_yaml_only_builds_own_recipients(tmp_path):
+    """测试加载配置时只构造属于本分片的收件人，分片使用应用默认值后的邮箱"""
+    data = {
+        "notification": {
+            "smtp": {
+                "host": "smtp.example.com",
+                "port": 587,
+                "username": "bot@example.com",
+                "password": "secret",
+                "default_receive_email": "team@example.com",
+            },
+        },
+        "recipients": [{"name": f"user{i}", "solar_birthday": "1990-01-01"} for i in range(200)],
+    }
+    path = tmp_path / "config.yml"
+    path.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+
+    full = Config.from_yaml(str(path))
+    parts = [Config.from_yaml(str(path), shard=ShardSpec(i, 3)) for i in range(3)]
+    # 再加载一次走快照，各分片的快照互不混淆
+    cached = [Config.from_yaml(str(path), shard=ShardSpec(i, 3)) for i in range(3)]
+
+    names = [r.name for part in parts for r in part.recipients]
+    assert sorted(names) == sorted(r.name for r in full.recipients)
+    assert len(names) == len(set(names))
+    for i, part in enumerate(parts):
+        assert part.recipients == cached[i].recipients
+        assert all(shard_of(r.name, "team@example.com", 3) == i for r in part.recipients)
+
+
+def test_empty_shard_is_valid(tmp_path):
+    """测试收件人较少时空分片仍然通过验证"""
+    path = tmp_path / "config.yml"
+    path.write_text(yaml.safe_dump({
+        "notification": {"serverchan": {"default_sckey": "key"}, "start_notification": "serverchan"},
+        "recipients": [{"name": "张三", "solar_birthday": "1990-01-01"}],
+    }, allow_unicode=True), encoding="utf-8")
+    owner = shard_of("张三", None, 2)
+
+    empty = ConfigManager(str(path), shard=ShardSpec(1 - owner, 2))
+    assert empty.config.recipients == []
+    assert empty.validate_config()
+    assert len(ConfigManager(str(path), shard=ShardSpec(owner, 2)).config.recipients) == 1
+
+
+def test_checker_shard_matches_filtered_list(recipients):
+    """测试检查器按分片检查的结果与先筛选再检查一致，且复用索引"""
+    checker = BirthdayChecker()
+    today = date(2024, 2, 10)
+    found = []
+    for i in range(3):
+        shard = ShardSpec(i, 3)
+        expected = BirthdayChecker().find_birthdays(filter_recipients(recipients, shard), today)
+        result = checker.find_birthdays(recipients, today, shard=shard)
+        assert [(r.name, info) for r, info in result] == [(r.name, info) for r, info in expected]
+        found.extend(r.name for r, _ in result)
+
+    assert sorted(found) == sorted(r.name for r, _ in BirthdayChecker().find_birthdays(recipients, today))
+    shard = ShardSpec(0, 3)
+    assert checker.select_shard(recipients, shard) is checker.select_shard(recipients, shard)
@@ -0,0 +1,116 @@
+"""
+测试SMTP连接池
+"""
+import pytest
+from unittest.mock import patch
+from src.core.config import SMTPConfig
+from src.notification.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """记录调用的假SMTP连接"""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.logins = 0
+        self.sent = 0
+        self.closed = False
+        self.noop_error = None
+        FakeSMTP.instances.append(self)
+
+    async def connect(self):
+        pass
+
+    async def login(self, username, password):
+        self.logins += 1
+
+    async def noop(self):
+        if self.noop_error:
+            raise self.noop_error
+
+    async def send_message(self, message):
+        self.sent += 1
+
+    async def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def smtp_config():
+    return SMTPConfig(host="smtp.example.com", port=587, username="user", password="pass",
+                      pool_size=2, max_messages_per_connection=3, idle_timeout=30)
+
+
+@pytest.fixture(autouse=True)
+def fake_smtp():
+    FakeSMTP.instances = []
+    with patch("src.notification.smtp_pool.aiosmtplib.SMTP", FakeSMTP):
+        yield
+
+
+async def _send(pool, count):
+    for _ in range(count):
+        async with pool.connection() as smtp:
+            await smtp.send_message("message")
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_logged_in_connection(smtp_config):
+    """测试连续发送复用同一个已登录连接"""
+    pool = SMTPConnectionPool(smtp_config)
+    await _send(pool, 2)
+
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].logins == 1
+    assert FakeSMTP.instances[0].sent == 2
+    assert pool.idle_count == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_recycles_after_message_cap(smtp_config):
+    """测试达到单连接发送上限后重建连接"""
+    pool = SMTPConnectionPool(smtp_config)
+    await _send(pool, 4)
+
+    assert len(FakeSMTP.instances) == 2
+    assert FakeSMTP.instances[0].closed
+    assert FakeSMTP.instances[0].sent == 3
+
+
+@pytest.mark.asyncio
+async def test_pool_drops_unhealthy_and_idle_connections(smtp_config):
+    """测试健康检查失败或空闲超时的连接不会被复用"""
+    pool = SMTPConnectionPool(smtp_config)
+    await _send(pool, 1)
+    FakeSMTP.instances[0].noop_error = ConnectionError("gone")
+    await _send(pool, 1)
+
+    assert FakeSMTP.instances[0].closed
+    assert len(FakeSMTP.instances) == 2
+
+    smtp_config.idle_timeout = -1
+    await _send(pool, 1)
+    assert FakeSMTP.instances[1].closed
+    assert len(FakeSMTP.instances) == 3
+
+
+@pytest.mark.asyncio
+async def test_pool_discards_connection_on_send_error(smtp_config):
+    """测试发送失败的连接被断开"""
+    pool = SMTPConnectionPool(smtp_config)
+    with pytest.raises(RuntimeError):
+        async with pool.connection():
+            raise RuntimeError("send failed")
+
+    assert FakeSMTP.instances[0].closed
+    assert pool.idle_count == 0
+
+    await _send(pool, 1)
+    await pool.close()
+    assert FakeSMTP.instances[1].closed
+    assert pool.idle_count == 0
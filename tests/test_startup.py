@@ -0,0 +1,48 @@
+"""
+启动开销测试 - 用 -X importtime 检查 CLI 冷启动
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# 导入 src.main 的累计耗时上限（微秒），可通过环境变量调整
+IMPORT_BUDGET_US = int(os.environ.get("BIRTHDAYRS_IMPORT_BUDGET_US", "300000"))
+
+# 只有具体命令和发送器才需要的重量级依赖
+LAZY_MODULES = ("lunar_python", "aiosmtplib", "httpx", "jinja2", "numpy", "sqlite3")
+
+
+def _import_main(cwd):
+    """在新进程中导入 src.main，返回 {模块名: 累计耗时(微秒)}"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=str(cwd), env=env, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_import_main_defers_heavy_dependencies(tmp_path):
+    """测试导入 src.main 不会导入重量级依赖，也不会创建日志文件"""
+    modules = _import_main(tmp_path)
+
+    assert "src.main" in modules
+    assert [name for name in LAZY_MODULES if name in modules] == []
+    assert not (tmp_path / "birthday_reminder.log").exists()
+
+
+def test_import_main_within_budget(tmp_path):
+    """测试导入 src.main 的耗时不超过预算（取多次中的最小值以减少抖动）"""
+    best = min(_import_main(tmp_path)["src.main"] for _ in range(3))
+    assert best <= IMPORT_BUDGET_US, f"import src.main took {best} us, budget {IMPORT_BUDGET_US} us"
@@ -0,0 +1,60 @@
+"""
+测试模板预编译
+"""
+import os
+from pathlib import Path
+from unittest.mock import patch
+from click.testing import CliRunner
+from src.core.recipient_table import RecipientTable
+from src.main import cli
+from src.notification.templates import compile_config_templates, get_environment, precompile_templates
+
+
+def test_environment_is_shared(test_templates_dir, tmp_path):
+    """测试同一模板目录共享一个 Jinja 环境"""
+    cache_dir = str(tmp_path / "jinja")
+    env = get_environment(test_templates_dir, cache_dir)
+
+    assert get_environment(test_templates_dir, cache_dir) is env
+    assert get_environment(test_templates_dir, str(tmp_path / "other")) is not env
+
+
+def test_precompile_writes_bytecode_cache(test_templates_dir, tmp_path):
+    """测试预编译结果写入字节码缓存目录"""
+    cache_dir = str(tmp_path / "jinja")
+    env = get_environment(test_templates_dir, cache_dir)
+
+    assert precompile_templates(env, ["birthday.html", None]) == {}
+    assert os.listdir(cache_dir)
+
+
+def test_compile_config_templates_reports_errors(test_config, test_templates_dir, tmp_path):
+    """测试启动时报告缺失或无法编译的模板"""
+    test_config.smtp_config.template_cache_dir = str(tmp_path / "jinja")
+
+    errors = compile_config_templates(test_config, test_templates_dir)
+
+    # config.example.yml 中的 custom_birthday.html 不存在
+    assert list(errors) == ["custom_birthday.html"]
+    assert "TemplateNotFound" in errors["custom_birthday.html"]
+
+
+def test_compile_config_templates_reads_table_column(test_config, test_templates_dir, tmp_path):
+    """测试列式收件人表直接读取模板列，不逐行构造收件人"""
+    test_config.smtp_config.template_cache_dir = str(tmp_path / "jinja")
+    test_config.recipients = RecipientTable.from_recipients(test_config.recipients)
+
+    with patch.object(RecipientTable, "__getitem__", side_effect=AssertionError("row access")):
+        errors = compile_config_templates(test_config, test_templates_dir)
+
+    assert list(errors) == ["custom_birthday.html"]
+
+
+def test_validate_fails_on_template_errors():
+    """测试模板编译失败时 validate 以非零状态退出"""
+    config_path = Path(__file__).parent.parent / "config.example.yml"
+    result = CliRunner().invoke(cli, ["--log-file", "", "validate", "-c", str(config_path)])
+
+    assert result.exit_code == 1
+    assert "custom_birthday.html" in result.output
+    assert "✅" not in result.output
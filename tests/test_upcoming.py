@@ -0,0 +1,130 @@
+"""
+日期范围生日查询测试
+"""
+import json
+import random
+from datetime import date, datetime, timedelta
+import pytest
+from click.testing import CliRunner
+from lunar_python import Solar
+from src.core.checker import BirthdayChecker
+from src.core.config import Recipient
+from src.core.sharding import ShardSpec
+from src.main import cli
+
+CONFIG = """\
+notification:
+  serverchan:
+    default_sckey: key
+  start_notification: serverchan
+recipients:
+  - name: 张三
+    solar_birthday: {later}
+    reminder_days: 0
+  - name: 李四
+    solar_birthday: {birthday}
+"""
+
+
+def _random_recipients(count, seed=7):
+    rng = random.Random(seed)
+    recipients = []
+    for i in range(count):
+        kwargs = {}
+        kind = rng.choice(["solar", "lunar", "both"])
+        if kind in ("solar", "both"):
+            kwargs["solar_birthday"] = f"{rng.randint(1950, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        if kind in ("lunar", "both"):
+            kwargs["lunar_birthday"] = f"{rng.randint(1950, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        recipients.append(Recipient(name=f"r{i}", reminder_days=rng.choice([0, 3, 30]), **kwargs))
+    recipients.append(Recipient(name="闰日", solar_birthday="2000-02-29"))
+    recipients.append(Recipient(name="三十", lunar_birthday="1990-01-30"))
+    return recipients
+
+
+def _brute_force(recipients, start, end):
+    """逐日逐人转换农历得到的期望结果"""
+    expected = []
+    day = start
+    while day <= end:
+        lunar = Solar.fromYmd(day.year, day.month, day.day).getLunar()
+        for recipient in recipients:
+            solar = bool(recipient.solar_ymd) and recipient.solar_ymd[1:] == (day.month, day.day)
+            lunar_hit = bool(recipient.lunar_ymd) and recipient.lunar_ymd[1:] == (lunar.getMonth(), lunar.getDay())
+            if solar or lunar_hit:
+                birth_year = (recipient.lunar_ymd if lunar_hit else recipient.solar_ymd)[0]
+                expected.append((day, recipient.name, solar, lunar_hit, day.year - birth_year))
+        day += timedelta(days=1)
+    return expected
+
+
+def _engines():
+    engines = [BirthdayChecker]
+    try:
+        from src.core.vectorized import NUMPY_AVAILABLE, VectorizedBirthdayChecker
+    except ImportError:  # pragma: no cover - 取决于运行环境
+        return engines
+    if NUMPY_AVAILABLE:
+        engines.append(VectorizedBirthdayChecker)
+    return engines
+
+
+@pytest.mark.parametrize("checker_class", _engines())
+def test_upcoming_matches_brute_force(checker_class):
+    """测试跨年、含闰日的日期范围查询结果与逐日转换一致，并按日期排序"""
+    recipients = _random_recipients(300)
+    start, end = date(2023, 12, 15), date(2024, 3, 13)
+    results = checker_class().upcoming(recipients, start, end)
+
+    assert [(item.day, item.recipient.name, item.solar_match, item.lunar_match, item.age)
+            for item in results] == _brute_force(recipients, start, end)
+    assert all(item.days_until == (item.day - start).days for item in results)
+    assert any(item.day == date(2024, 2, 29) for item in results)
+
+
+def test_upcoming_ignores_reminder_days_and_accepts_datetime():
+    """测试查询不受提前提醒天数影响，起止日期可以是 datetime"""
+    recipients = [Recipient(name="张三", solar_birthday="1990-06-20", reminder_days=0)]
+    checker = BirthdayChecker()
+    [item] = checker.upcoming(recipients, datetime(2024, 6, 1, 9), datetime(2024, 6, 30, 9))
+    assert (item.day, item.days_until, item.age) == (date(2024, 6, 20), 19, 34)
+    assert checker.upcoming(recipients, date(2024, 6, 21), date(2024, 6, 30)) == []
+
+
+def test_upcoming_with_shard():
+    """测试只返回属于分片的收件人"""
+    recipients = _random_recipients(100)
+    shard = ShardSpec(0, 2)
+    start, end = date(2024, 1, 1), date(2024, 12, 31)
+    checker = BirthdayChecker()
+    sharded = checker.upcoming(recipients, start, end, shard=shard)
+    assert sharded == [item for item in checker.upcoming(recipients, start, end)
+                       if shard.owns(item.recipient.name, item.recipient.email)]
+    assert 0 < len(sharded) < len(recipients)
+
+
+def test_upcoming_rejects_reversed_range():
+    """测试结束日期早于起始日期时报错"""
+    with pytest.raises(ValueError):
+        BirthdayChecker().upcoming([], date(2024, 2, 1), date(2024, 1, 1))
+
+
+def test_upcoming_command(write_config):
+    """测试 upcoming 命令按日期输出，--json 输出可解析的结果"""
+    today = date.today()
+    later = today + timedelta(days=5)
+    path = write_config(CONFIG, later=later.replace(year=2000).isoformat())
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["--log-file", "", "upcoming", "-c", str(path), "--days", "10"])
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert "李四" in lines[0] and "张三" in lines[1]
+
+    result = runner.invoke(cli, ["--log-file", "", "upcoming", "-c", str(path), "--days", "10", "--json"])
+    data = json.loads(result.output)
+    assert [(item["name"], item["days_until"], item["date"]) for item in data] == \
+        [("李四", 0, today.isoformat()), ("张三", 5, later.isoformat())]
+
+    result = runner.invoke(cli, ["--log-file", "", "upcoming", "-c", str(path), "--days", "5"])
+    assert "张三" not in result.output
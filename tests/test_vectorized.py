@@ -0,0 +1,51 @@
+"""
+测试向量化生日检查器
+"""
+import random
+from datetime import date, timedelta
+from unittest.mock import patch
+import pytest
+from src.core.checker import BirthdayChecker
+from src.core.config import CheckerConfig, Recipient
+
+np = pytest.importorskip("numpy")
+
+from src.core.vectorized import VectorizedBirthdayChecker, create_checker  # noqa: E402
+
+
+def _random_recipients(count, seed=42):
+    rng = random.Random(seed)
+    recipients = []
+    for i in range(count):
+        kwargs = {}
+        kind = rng.choice(["solar", "lunar", "both"])
+        if kind in ("solar", "both"):
+            kwargs["solar_birthday"] = f"{rng.randint(1950, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        if kind in ("lunar", "both"):
+            kwargs["lunar_birthday"] = f"{rng.randint(1950, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        recipients.append(Recipient(name=f"r{i}", reminder_days=rng.choice([0, 1, 3, 7, 30]), **kwargs))
+    return recipients
+
+
+def test_vectorized_matches_python_checker():
+    """测试向量化结果与纯 Python 检查器一致"""
+    recipients = _random_recipients(500)
+    python_checker = BirthdayChecker()
+    numpy_checker = VectorizedBirthdayChecker()
+
+    for offset in range(0, 365, 11):
+        today = date(2024, 1, 1) + timedelta(days=offset)
+        assert numpy_checker.find_birthdays(recipients, today) == \
+            python_checker.find_birthdays(recipients, today)
+
+
+def test_create_checker_selects_engine():
+    """测试按配置选择检查引擎"""
+    assert isinstance(create_checker(CheckerConfig(engine="numpy")), VectorizedBirthdayChecker)
+    assert type(create_checker(CheckerConfig())) is BirthdayChecker
+
+
+def test_create_checker_falls_back_without_numpy():
+    """测试 NumPy 不可用时回退到纯 Python 检查器"""
+    with patch("src.core.vectorized.NUMPY_AVAILABLE", False):
+        assert type(create_checker(CheckerConfig(engine="numpy"))) is BirthdayChecker